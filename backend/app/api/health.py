@@ -1 +1,157 @@
 # GET /api/health
+"""
+Endpoints de sante avec sondes "canary".
+
+- /live   : liveness, le processus et la boucle asyncio repondent
+- /ready  : readiness, demarrage termine et toutes les sondes OK (503 sinon)
+- /health : rapport complet (latence de chaque sonde, phases de demarrage)
+
+Chaque sonde execute une vraie operation minimale (prediction canary sur le
+modele actif, recherche canary dans l'index FAISS). Les resultats sont mis en
+cache quelques secondes: un load balancer qui interroge a haute frequence ne
+declenche qu'une sonde par periode.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+import numpy as np
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+import config
+from predict_rent_router import model_registry, warmup_samples
+from services import rag_fiscal
+from startup import startup_state
+
+router = APIRouter(tags=["Health"])
+
+API_VERSION = "1.0.0"
+STARTED_AT = time.time()
+
+
+# ============================================
+# SONDES
+# ============================================
+
+def _timed(probe) -> Dict:
+    """Execute une sonde et mesure sa latence"""
+    start = time.perf_counter()
+    try:
+        detail = probe()
+        status = "ok"
+    except LookupError as e:
+        detail, status = str(e), "missing"
+    except Exception as e:
+        detail, status = str(e), "error"
+    return {
+        "status": status,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 3),
+        "detail": detail,
+    }
+
+
+def probe_ml_model() -> str:
+    """Prediction canary sur la version active du modele"""
+    bundle = model_registry.active
+    if bundle is None:
+        raise LookupError(model_registry.last_error or "Modele non charge")
+    prediction = bundle.engine.predict_one(warmup_samples(bundle)[0])
+    if not np.isfinite(prediction):
+        raise ValueError(f"Prediction canary invalide: {prediction}")
+    return f"version {bundle.version}"
+
+
+def probe_rag_index() -> str:
+    """Recherche canary (1 voisin) dans l'index FAISS"""
+    index = rag_fiscal.get_index()
+    if index is None:
+        raise LookupError("Index FAISS non charge")
+    if index.ntotal == 0:
+        raise LookupError("Index FAISS vide")
+    _, ids = index.search(np.zeros((1, index.d), dtype=np.float32), 1)
+    if ids[0][0] < 0:
+        raise ValueError("Recherche canary sans resultat")
+    cache = rag_fiscal.query_cache_stats()
+    return f"{index.ntotal} vecteurs (cache requetes: {cache['size']} entrees, hit rate {cache['hit_rate']:.0%})"
+
+
+def probe_embedding_model() -> str:
+    """Le modele d'embedding est charge (l'encodage est couvert par les requetes RAG)"""
+    model = rag_fiscal.get_embedding_model()
+    if model is None:
+        raise LookupError("Modele d'embedding non charge")
+    cache = rag_fiscal.embedding_cache_stats()
+    return (f"{rag_fiscal.EMBEDDING_MODEL} [{model.backend}] "
+            f"(cache: {cache['size']} vecteurs, hit rate {cache['hit_rate']:.0%})")
+
+
+PROBES = {
+    "ml_model": probe_ml_model,
+    "rag_index": probe_rag_index,
+    "embedding_model": probe_embedding_model,
+}
+
+
+class ProbeCache:
+    """Resultats de sondes partages pendant `ttl` secondes"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._results: Optional[Dict] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> Dict:
+        if self._results is not None and time.monotonic() - self._checked_at < self.ttl:
+            return self._results
+
+        # Un seul appel lance les sondes, les autres attendent son resultat
+        async with self._lock:
+            if self._results is None or time.monotonic() - self._checked_at >= self.ttl:
+                self._results = await asyncio.to_thread(
+                    lambda: {name: _timed(probe) for name, probe in PROBES.items()}
+                )
+                self._checked_at = time.monotonic()
+            return self._results
+
+
+probe_cache = ProbeCache(ttl=config.HEALTH_PROBE_TTL)
+
+
+async def health_report() -> Dict:
+    components = await probe_cache.get()
+    # Un modele publie a chaud apres un demarrage degrade rend l'API prete
+    healthy = startup_state.finished and all(c["status"] == "ok" for c in components.values())
+    return {
+        "status": "healthy" if healthy else "degraded",
+        "api_version": API_VERSION,
+        "uptime_s": round(time.time() - STARTED_AT, 1),
+        "services": components,
+        "startup": startup_state.to_dict(),
+    }
+
+
+# ============================================
+# ENDPOINTS
+# ============================================
+
+@router.get("/live")
+async def live():
+    """Liveness: repond tant que la boucle asyncio n'est pas bloquee"""
+    return {"status": "alive", "uptime_s": round(time.time() - STARTED_AT, 1)}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness: 200 si le demarrage est termine et toutes les sondes passent, 503 sinon"""
+    report = await health_report()
+    return JSONResponse(status_code=200 if report["status"] == "healthy" else 503, content=report)
+
+
+@router.get("/health")
+async def health():
+    """Health check global: latence de chaque composant (503 si un composant manque)"""
+    report = await health_report()
+    return JSONResponse(status_code=200 if report["status"] == "healthy" else 503, content=report)
@@ -0,0 +1,97 @@
+# POST /api/v1/rag/search
+"""
+Recherche dans la base de connaissances fiscale (RAG).
+
+La recherche (embedding + FAISS + lecture des chunks) est bloquante:
+elle est executee dans un thread pour ne pas bloquer la boucle asyncio.
+Les filtres sont appliques avant le classement (pre-filtrage FAISS):
+une question "Geneve vs Vaud" ne consomme pas ses k places sur du BOFIP.
+Par defaut le classement vectoriel est fusionne avec un classement BM25
+(reciprocal-rank fusion) pour ne pas rater les termes exacts (IFI, DMTOI).
+Les chunks sous le seuil de similarite cosinus sont coupes: la reponse
+peut contenir moins de k resultats (voire aucun) plutot que du bruit.
+"""
+
+import asyncio
+from typing import List, Literal, Optional, Union
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+
+from services import rag_fiscal
+
+router = APIRouter(prefix="/api/v1/rag", tags=["RAG Advisor"])
+
+MAX_RESULTS = 50
+
+
+# ============================================
+# SCHEMAS
+# ============================================
+
+class RagSearchFilters(BaseModel):
+    """Filtres sur les metadonnees des documents (valeur unique ou liste)"""
+
+    canton: Optional[Union[str, List[str]]] = Field(None, description="Ex: GE, VD, ZH, BS, FR, CH")
+    doc_type: Optional[Union[str, List[str]]] = Field(None, description="Ex: feuille_cantonale, comparatif")
+    language: Optional[Union[str, List[str]]] = Field(None, description="fr, de")
+    source: Optional[Union[str, List[str]]] = Field(None, description="Nom du fichier source")
+
+
+class RagSearchRequest(BaseModel):
+    """Requete de recherche fiscale"""
+
+    query: str = Field(..., min_length=2, max_length=2000, description="Question en langage naturel")
+    k: int = Field(4, ge=1, le=MAX_RESULTS, description="Nombre de resultats")
+    filters: Optional[RagSearchFilters] = None
+    mode: Optional[Literal["vector", "bm25", "hybrid"]] = Field(
+        None, description="Classement: hybrid (RRF vecteur + BM25), vector ou bm25 (defaut: RAG_SEARCH_MODE)"
+    )
+    min_similarity: Optional[float] = Field(
+        None, ge=-1, le=1, description="Similarite cosinus minimale (defaut: RAG_MIN_SIMILARITY)"
+    )
+    max_gap: Optional[float] = Field(
+        None, ge=0, le=2, description="Ecart maximal au meilleur resultat, 0 = aucun (defaut: RAG_MAX_SIMILARITY_GAP)"
+    )
+
+
+class RagSearchResult(BaseModel):
+    id: str
+    content: str
+    source: str
+    canton: str
+    type: str
+    language: Optional[str] = None
+    score: Optional[float] = Field(
+        None, description="Score FAISS (similarite cosinus, ou distance L2 d'un ancien index), "
+                          "absent si hors classement vectoriel"
+    )
+    similarity: Optional[float] = Field(None, description="Similarite cosinus avec la requete (-1 a 1)")
+    bm25: Optional[float] = Field(None, description="Score BM25, absent si hors classement lexical")
+    fusion: Optional[float] = Field(None, description="Score de reciprocal-rank fusion (mode hybrid)")
+    relevance: float = Field(..., description="Pertinence (0-100): similarite cosinus x 100 si connue")
+
+
+class RagSearchResponse(BaseModel):
+    query: str
+    results: List[RagSearchResult]
+
+
+# ============================================
+# ENDPOINT
+# ============================================
+
+@router.post("/search", response_model=RagSearchResponse)
+async def rag_search(request: RagSearchRequest):
+    """Recherche les passages fiscaux les plus pertinents"""
+    filters = request.filters.model_dump(exclude_none=True) if request.filters else None
+    try:
+        results = await asyncio.to_thread(
+            rag_fiscal.search, request.query, request.k, filters, request.mode,
+            request.min_similarity, request.max_gap,
+        )
+    except (FileNotFoundError, ImportError) as e:
+        raise HTTPException(status_code=503, detail=f"RAG fiscal indisponible: {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RagSearchResponse(query=request.query, results=results)
@@ -1 +1,87 @@
 # Configuration (environment variables)
+"""
+Parametres du backend lus depuis les variables d'environnement.
+Les valeurs par defaut conviennent au developpement local.
+"""
+
+import os
+
+# ============================================
+# EXECUTION DES PREDICTIONS ML
+# ============================================
+
+# Mode d'execution de model.predict hors de la boucle asyncio:
+#   inline  : dans la boucle (debug uniquement, bloque uvicorn)
+#   thread  : pool de threads borne (XGBoost relache le GIL)
+#   process : pool de processus, modele precharge dans chaque worker
+PREDICT_EXECUTOR_MODE = os.getenv("PREDICT_EXECUTOR_MODE", "thread")
+
+# Nombre de workers du pool
+PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", "4"))
+
+# Requetes en attente tolerees au-dela des workers occupes (sinon 503)
+PREDICT_MAX_QUEUE = int(os.getenv("PREDICT_MAX_QUEUE", "64"))
+
+# ============================================
+# CACHE DES PREDICTIONS
+# ============================================
+
+# Nombre max d'entrees (0 = cache desactive)
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "4096"))
+
+# Duree de vie d'une entree (secondes)
+PREDICT_CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", "600"))
+
+# Quantification des features pour la cle (decimales)
+PREDICT_CACHE_DECIMALS = int(os.getenv("PREDICT_CACHE_DECIMALS", "4"))
+
+# ============================================
+# RECHARGEMENT A CHAUD DU MODELE
+# ============================================
+
+# Intervalle de surveillance de ml_models/ en secondes (0 = desactive)
+MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "30"))
+
+# ============================================
+# HEALTH CHECKS
+# ============================================
+
+# Duree de cache des sondes canary (secondes)
+HEALTH_PROBE_TTL = float(os.getenv("HEALTH_PROBE_TTL", "5"))
+
+# ============================================
+# RAG FISCAL
+# ============================================
+
+# Ouvrir index.faiss en memory-map (pages partagees entre workers uvicorn)
+RAG_INDEX_MMAP = os.getenv("RAG_INDEX_MMAP", "true").lower() in ("1", "true", "yes")
+
+# Filtrage par metadonnees (canton, doc_type...):
+#   prefilter  : IDSelector FAISS, seuls les chunks autorises sont compares
+#   postfilter : recherche globale puis filtrage (reference)
+RAG_FILTER_STRATEGY = os.getenv("RAG_FILTER_STRATEGY", "prefilter")
+
+# Classement des resultats:
+#   hybrid : fusion RRF du classement vectoriel et du classement BM25 (termes exacts)
+#   vector : recherche vectorielle seule
+#   bm25   : recherche lexicale seule
+RAG_SEARCH_MODE = os.getenv("RAG_SEARCH_MODE", "hybrid")
+
+# Seuils de pertinence (similarite cosinus, index normalise): les resultats
+# sous RAG_MIN_SIMILARITY ou a plus de RAG_MAX_SIMILARITY_GAP du meilleur
+# (0 = pas d'ecart maximal) sont coupes, quitte a rendre moins de k chunks
+RAG_MIN_SIMILARITY = float(os.getenv("RAG_MIN_SIMILARITY", "0.25"))
+RAG_MAX_SIMILARITY_GAP = float(os.getenv("RAG_MAX_SIMILARITY_GAP", "0"))
+
+# Lignes max du cache disque des embeddings de requetes (0 = desactive)
+RAG_EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("RAG_EMBEDDING_CACHE_MAX_ROWS", "100000"))
+
+# Backend d'encodage des requetes: torch, onnx ou onnx-int8
+# (modele ONNX exporte par ml_training/export_onnx_embedder.py)
+RAG_EMBEDDING_BACKEND = os.getenv("RAG_EMBEDDING_BACKEND", "torch")
+
+# Cache des resultats de recherche (services/query_cache.py): entrees max
+# (0 = desactive) et similarite cosinus minimale entre deux requetes pour
+# reutiliser les resultats d'une requete quasi identique (> 1 = exacte seule)
+RAG_QUERY_CACHE_SIZE = int(os.getenv("RAG_QUERY_CACHE_SIZE", "1024"))
+RAG_QUERY_CACHE_SIMILARITY = float(os.getenv("RAG_QUERY_CACHE_SIMILARITY", "0.95"))
@@ -1 +1,13 @@
 # Custom Exceptions
+
+
+class SwissRelocatorError(Exception):
+    """Erreur de base du backend SwissRelocator"""
+
+
+class PredictionQueueFullError(SwissRelocatorError):
+    """Le pool de prediction est sature (backpressure -> HTTP 503)"""
+
+
+class ModelVersionError(SwissRelocatorError):
+    """Le fichier du modele ne correspond plus a la version demandee (rechargement en cours -> HTTP 503)"""
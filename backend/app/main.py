@@ -5,8 +5,9 @@
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
 import time
 import logging
 
@@ -14,6 +15,13 @@ import logging
 # from app.routers import predict_rent, fiscal, rag_advisor
 # Pour l'instant, on simule l'import direct
 from predict_rent_router import router as predict_rent_router
+from predict_rent_router import executor as prediction_executor
+from predict_rent_router import load_model, model_registry, MODEL_RELOAD_INTERVAL
+from api.health import router as health_router
+from api.rag import router as rag_router
+from core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, REGISTRY
+from services import rag_fiscal
+from startup import run_startup
 
 # ============================================
 # CONFIGURATION LOGGING
@@ -29,18 +37,42 @@ logger = logging.getLogger(__name__)
 # LIFESPAN (startup/shutdown)
 # ============================================
 
+async def startup():
+    """Charge les ressources en parallèle et chronomètre chaque phase"""
+    state = await run_startup({
+        "rent_model": load_model,
+        "faiss_index": rag_fiscal.load_index,
+        "embedding_model": rag_fiscal.load_embedding_model,
+    })
+
+    for name, phase in state.phases.items():
+        icon = "✅" if phase.status == "ok" else "❌"
+        detail = f" ({phase.error})" if phase.error else ""
+        logger.info(f"{icon} {name} : {phase.status} en {phase.duration_s:.2f}s{detail}")
+
+    # Surveillance de ml_models/ (y compris si aucun modèle n'est encore entraîné)
+    model_registry.start_watching(MODEL_RELOAD_INTERVAL)
+
+    if state.ready:
+        logger.info(f"✅ API prête en {state.total_duration_s:.2f}s")
+    else:
+        logger.warning(f"⚠️ API dégradée après {state.total_duration_s:.2f}s (readiness = 503)")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestion du cycle de vie de l'application"""
-    # Startup
+    # Startup: chargement en tâche de fond, /ready passe à 200 une fois terminé
     logger.info("🚀 Démarrage SwissRelocator API...")
-    logger.info("✅ Modèle ML chargé")
-    logger.info("✅ API prête")
+    startup_task = asyncio.create_task(startup())
     
     yield
     
     # Shutdown
     logger.info("👋 Arrêt SwissRelocator API...")
+    startup_task.cancel()
+    model_registry.stop_watching()
+    prediction_executor.shutdown()
 
 # ============================================
 # APPLICATION FASTAPI
@@ -88,15 +120,29 @@ app.add_middleware(
 )
 
 
-# Middleware de logging des requêtes
+# Middleware de métriques et de logging des requêtes
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log toutes les requêtes avec leur temps de réponse"""
-    start_time = time.time()
+    """Mesure chaque requête (perf_counter) : histogramme par route, requêtes en cours, log"""
+    start_time = time.perf_counter()
+    HTTP_REQUESTS_IN_FLIGHT.inc(method=request.method)
+    status_code = 500
     
-    response = await call_next(request)
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        process_time = time.perf_counter() - start_time
+        HTTP_REQUESTS_IN_FLIGHT.dec(method=request.method)
+        
+        # Template de la route (/api/v1/predict-rent) plutôt que le chemin brut :
+        # les 404 sont regroupés pour borner la cardinalité
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        HTTP_REQUEST_DURATION.observe(
+            process_time, method=request.method, route=route_path, status=str(status_code)
+        )
     
-    process_time = time.time() - start_time
     logger.info(
         f"{request.method} {request.url.path} - "
         f"{response.status_code} - {process_time:.3f}s"
@@ -131,18 +177,29 @@ async def global_exception_handler(request: Request, exc: Exception):
 # INCLUSION DES ROUTERS
 # ============================================
 
+# Health checks (liveness / readiness avec sondes canary)
+app.include_router(health_router)
+
 # ML Predictions (loyers)
 app.include_router(predict_rent_router)
 
+# RAG fiscal (recherche dans la base de connaissances)
+app.include_router(rag_router)
+
 # TODO: Ajouter les autres routers
 # app.include_router(fiscal_router, prefix="/api/v1", tags=["Fiscal"])
-# app.include_router(rag_router, prefix="/api/v1", tags=["RAG Advisor"])
 
 
 # ============================================
 # ENDPOINTS RACINE
 # ============================================
 
+@app.get("/metrics", tags=["Monitoring"], response_class=PlainTextResponse)
+async def metrics():
+    """Métriques au format texte Prometheus"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/", tags=["Root"])
 async def root():
     """Page d'accueil de l'API"""
@@ -153,22 +210,13 @@ async def root():
         "documentation": "/docs",
         "endpoints": {
             "predict_rent": "/api/v1/predict-rent",
+            "predict_rent_batch": "/api/v1/predict-rent/batch",
             "model_info": "/api/v1/model-info",
-            "health": "/api/v1/health"
-        }
-    }
-
-
-@app.get("/health", tags=["Health"])
-async def health():
-    """Health check global de l'API"""
-    return {
-        "status": "healthy",
-        "api_version": "1.0.0",
-        "services": {
-            "ml_model": "operational",
-            "rag_system": "operational",
-            "database": "operational"
+            "rag_search": "/api/v1/rag/search",
+            "health": "/api/v1/health",
+            "liveness": "/live",
+            "readiness": "/ready",
+            "metrics": "/metrics"
         }
     }
 
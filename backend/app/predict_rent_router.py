@@ -4,13 +4,23 @@
 # ============================================
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Literal
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from typing import Any, Dict, List, Optional, Literal
+from collections import Counter
 from pathlib import Path
-import joblib
+import time
 import numpy as np
 import pandas as pd
 
+import config
+from core.exceptions import ModelVersionError, PredictionQueueFullError
+from core.metrics import PREDICTION_STAGE_DURATION, RENT_PREDICTIONS
+from services.model_registry import ModelBundle, ModelRegistry
+from services.prediction_cache import PredictionCache
+from services.prediction_executor import PredictionExecutor
+from services import rent_features
+from services.rent_features import RentFeatureTransformer
+
 router = APIRouter(prefix="/api/v1", tags=["ML Predictions"])
 
 # ============================================
@@ -22,58 +32,103 @@ ML_MODELS_DIR = Path(__file__).parent.parent / "ml_models"
 MODEL_PATH = ML_MODELS_DIR / "immo_ch_model.pkl"
 SCALER_PATH = ML_MODELS_DIR / "immo_ch_scaler.pkl"
 FEATURES_PATH = ML_MODELS_DIR / "immo_ch_features.txt"
+METADATA_PATH = ML_MODELS_DIR / "immo_ch_model_meta.json"
+FEATURE_STATE_PATH = ML_MODELS_DIR / rent_features.FEATURE_STATE_FILENAME
 
-# Centres-villes pour calcul de distance
-CITY_CENTERS = {
-    'Geneve': {'lat': 46.2044, 'lon': 6.1432, 'encoded': 2},
-    'Lausanne': {'lat': 46.5197, 'lon': 6.6323, 'encoded': 3},
-    'Zurich': {'lat': 47.3769, 'lon': 8.5417, 'encoded': 4},
-    'Basel': {'lat': 47.5596, 'lon': 7.5886, 'encoded': 0},
-}
-
-# Mapping noms de ville (FR/DE/EN -> normalized)
-CITY_NORMALIZATION = {
-    'geneve': 'Geneve', 'genève': 'Geneve', 'geneva': 'Geneve', 'genf': 'Geneve',
-    'lausanne': 'Lausanne',
-    'zurich': 'Zurich', 'zürich': 'Zurich',
-    'basel': 'Basel', 'bale': 'Basel', 'bâle': 'Basel', 'basle': 'Basel',
-}
-
-# ============================================
-# CHARGEMENT DU MODELE (au demarrage)
-# ============================================
+# Intervalle de surveillance de ml_models/ pour le rechargement a chaud
+MODEL_RELOAD_INTERVAL = config.MODEL_RELOAD_INTERVAL
 
-model = None
-scaler = None
-features_list = None
+# Villes de l'API -> noms du dataset d'entrainement (rent_features.CITY_CENTERS)
+API_CITIES = {'Geneve': 'Genève', 'Lausanne': 'Lausanne', 'Zurich': 'Zürich', 'Basel': 'Basel'}
+DATASET_CITIES = {dataset: api for api, dataset in API_CITIES.items()}
 
+# Centres-villes (coordonnees GPS par defaut)
+CITY_CENTERS = {
+    api: dict(zip(('lat', 'lon'), rent_features.CITY_CENTERS[dataset]))
+    for api, dataset in API_CITIES.items()
+}
 
-def load_model():
-    """Charge le modele ML et le scaler au demarrage"""
-    global model, scaler, features_list
-
-    try:
-        if MODEL_PATH.exists():
-            model = joblib.load(MODEL_PATH)
-            print(f"[ML] Modele charge: {MODEL_PATH}")
-        else:
-            print(f"[ML] Modele non trouve: {MODEL_PATH}")
+# Types de bien de l'API -> types du dataset (source_bien_type)
+PROPERTY_TYPES = {'bureau': 'Bureau', 'commercial': 'Commercial'}
 
-        if SCALER_PATH.exists():
-            scaler = joblib.load(SCALER_PATH)
-            print(f"[ML] Scaler charge: {SCALER_PATH}")
+# Ordre des 18 features attendu par le modele (cf. immo_ch_features.txt)
+FEATURE_NAMES = rent_features.FEATURE_NAMES
 
-        if FEATURES_PATH.exists():
-            with open(FEATURES_PATH, 'r') as f:
-                features_list = f.read().strip().split('\n')
-            print(f"[ML] Features chargees: {len(features_list)} features")
+# Taille max d'un batch de prediction (screening de portefeuille)
+MAX_BATCH_SIZE = 10000
 
-    except Exception as e:
-        print(f"[ML] Erreur chargement modele: {e}")
+# Metriques du modele XGBoost (sans data leakage)
+MODEL_MAE_CHF = 1425
+CHF_TO_EUR = 0.92  # Taux CHF/EUR approximatif
 
+# ============================================
+# CHARGEMENT DU MODELE (registre versionne)
+# ============================================
 
-# Charger au import du module
-load_model()
+# Pool d'execution des predictions (hors boucle asyncio, avec backpressure)
+executor = PredictionExecutor(
+    mode=config.PREDICT_EXECUTOR_MODE,
+    workers=config.PREDICT_WORKERS,
+    max_queue=config.PREDICT_MAX_QUEUE,
+)
+
+# Cache LRU/TTL des predictions (cle = vecteur de features quantifie)
+prediction_cache = PredictionCache(
+    max_size=config.PREDICT_CACHE_SIZE,
+    ttl_seconds=config.PREDICT_CACHE_TTL,
+    decimals=config.PREDICT_CACHE_DECIMALS,
+)
+
+
+def warmup_samples(bundle: Optional[ModelBundle] = None) -> List[Dict[str, float]]:
+    """Quelques biens synthetiques (un par ville) pour chauffer un nouveau modele"""
+    transformer = bundle.transformer if bundle is not None else None
+    return [
+        build_feature_vector(PredictRentRequest(city=city, surface=surface, etage=etage), transformer)
+        for city, surface, etage in [
+            ('Geneve', 120, 3), ('Lausanne', 80, None), ('Zurich', 250, 6), ('Basel', 45, 0),
+        ]
+    ]
+
+
+# Registre: surveille ml_models/ et publie les nouvelles versions a chaud
+model_registry = ModelRegistry(
+    models_dir=ML_MODELS_DIR,
+    model_filename=MODEL_PATH.name,
+    scaler_filename=SCALER_PATH.name,
+    features_filename=FEATURES_PATH.name,
+    metadata_filename=METADATA_PATH.name,
+    default_features=FEATURE_NAMES,
+    feature_state_filename=FEATURE_STATE_PATH.name,
+    warmup_samples=warmup_samples,
+)
+
+
+def _on_model_published(bundle: ModelBundle) -> None:
+    """Branche la nouvelle version sur l'executor et le cache"""
+    executor.configure(bundle.engine, bundle.model_path, bundle.features_list,
+                       token=bundle.token, model_stat=bundle.model_stat)
+    if prediction_cache.bind_model(bundle.token):
+        print("[ML] Cache des predictions reinitialise")
+
+
+model_registry.subscribe(_on_model_published)
+
+
+def load_model() -> Optional[ModelBundle]:
+    """Charge (ou recharge) le modele ML, le scaler et les features depuis ml_models/"""
+    return model_registry.load()
+
+
+def active_bundle() -> ModelBundle:
+    """Version du modele a utiliser pour toute la duree d'une requete"""
+    bundle = model_registry.active
+    if bundle is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Modele ML non disponible. Veuillez reessayer plus tard."
+        )
+    return bundle
 
 
 # ============================================
@@ -134,8 +189,7 @@ class PredictRentRequest(BaseModel):
     @classmethod
     def normalize_city(cls, v):
         """Normalise les noms de ville"""
-        v_lower = v.lower().strip()
-        normalized = CITY_NORMALIZATION.get(v_lower)
+        normalized = DATASET_CITIES.get(rent_features.canonical_city(v))
         if normalized is None:
             raise ValueError(f"Ville non supportee: {v}. Villes valides: Geneve, Lausanne, Zurich, Basel")
         return normalized
@@ -153,6 +207,34 @@ class PredictRentResponse(BaseModel):
     model_info: dict = Field(..., description="Informations sur le modele")
 
 
+class BatchPredictRentRequest(BaseModel):
+    """Requete de prediction de loyers en lot"""
+
+    items: List[Dict[str, Any]] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_SIZE,
+        description="Liste de biens au format PredictRentRequest (valides individuellement)"
+    )
+
+
+class BatchPredictItemResult(BaseModel):
+    """Resultat d'un element du lot (prediction ou erreur de validation)"""
+
+    index: int = Field(..., description="Position de l'element dans le lot")
+    prediction: Optional[PredictRentResponse] = Field(None, description="Prediction si l'element est valide")
+    error: Optional[str] = Field(None, description="Erreur de validation sinon")
+
+
+class BatchPredictRentResponse(BaseModel):
+    """Reponse de prediction de loyers en lot"""
+
+    total: int = Field(..., description="Nombre d'elements recus")
+    succeeded: int = Field(..., description="Nombre de predictions reussies")
+    failed: int = Field(..., description="Nombre d'elements rejetes")
+    results: List[BatchPredictItemResult]
+
+
 class ModelInfoResponse(BaseModel):
     """Informations sur le modele ML"""
 
@@ -163,28 +245,56 @@ class ModelInfoResponse(BaseModel):
     features: list
     supported_cities: list
     last_trained: str
+    version: str
+    loaded_at: str
+    inference_engine: str
+    history: list
 
 
 # ============================================
 # FONCTIONS UTILITAIRES
 # ============================================
 
-def calculate_distance_from_center(lat: float, lon: float, city: str) -> float:
-    """Calcule la distance euclidienne du centre-ville en km"""
-    if city not in CITY_CENTERS:
-        return 0.0
+def active_transformer() -> RentFeatureTransformer:
+    """Etat des features de la version active (legacy si aucun modele charge)"""
+    bundle = model_registry.active
+    return bundle.transformer if bundle is not None else RentFeatureTransformer.legacy()
 
-    center = CITY_CENTERS[city]
-    lat_diff = lat - center['lat']
-    lon_diff = lon - center['lon']
 
-    # Conversion approximative en km
-    return np.sqrt((lat_diff * 111)**2 + (lon_diff * 85)**2)
+def feature_columns(requests: List[PredictRentRequest]) -> Dict[str, Any]:
+    """Champs des requetes en colonnes, noms du dataset (arguments de RentFeatureTransformer.transform)"""
+    n = len(requests)
 
+    def column(getter):
+        # None -> NaN pour les champs optionnels
+        return np.fromiter(
+            (np.nan if (v := getter(r)) is None else v for r in requests),
+            dtype=np.float64,
+            count=n
+        )
 
-def prepare_features(request: PredictRentRequest) -> pd.DataFrame:
+    return {
+        'city': np.array([API_CITIES[r.city] for r in requests], dtype=object),
+        'surface': column(lambda r: r.surface),
+        'latitude': column(lambda r: r.latitude),
+        'longitude': column(lambda r: r.longitude),
+        'pieces': column(lambda r: r.pieces),
+        'etage': column(lambda r: r.etage),
+        'bien_type': np.array([PROPERTY_TYPES[r.property_type] for r in requests], dtype=object),
+        'has_parking': column(lambda r: r.has_parking),
+        'has_lift': column(lambda r: r.has_lift),
+    }
+
+
+def build_feature_vector(request: PredictRentRequest,
+                         transformer: Optional[RentFeatureTransformer] = None) -> Dict[str, float]:
     """
-    Prepare le vecteur de features pour la prediction.
+    Calcule le vecteur de features pour la prediction (dict nom -> valeur).
+
+    Meme calcul qu'a l'entrainement (RentFeatureTransformer, etat sauvegarde
+    a cote du modele), en version scalaire (transform_one): un bien ne passe
+    pas par les colonnes NumPy de prepare_features_batch. Pieces non
+    fournies: mediane apprise par ville et taille de surface.
 
     Features (18 au total, SANS data leakage):
     - latitude, longitude, distance_centre, ville_encoded
@@ -195,68 +305,105 @@ def prepare_features(request: PredictRentRequest) -> pd.DataFrame:
     - has_parking_int, has_lift_int
     - surface_ville, surface_distance
     """
+    transformer = transformer or active_transformer()
+    return transformer.transform_one(
+        city=API_CITIES[request.city], surface=request.surface,
+        latitude=request.latitude, longitude=request.longitude,
+        pieces=request.pieces, etage=request.etage,
+        bien_type=PROPERTY_TYPES[request.property_type],
+        has_parking=request.has_parking, has_lift=request.has_lift,
+    )
+
+
+def prepare_features(request: PredictRentRequest) -> pd.DataFrame:
+    """DataFrame une ligne (chemin historique, conserve pour les benchmarks)"""
+    return pd.DataFrame([build_feature_vector(request)])
+
+
+def prepare_features_batch(requests: List[PredictRentRequest],
+                           transformer: Optional[RentFeatureTransformer] = None) -> np.ndarray:
+    """
+    Version colonnaire de build_feature_vector pour un lot de requetes.
+
+    Chaque feature est calculee en une operation NumPy sur tout le lot.
+    Retourne une matrice (n, 18) dans l'ordre de FEATURE_NAMES.
+    """
+    transformer = transformer or active_transformer()
+    return transformer.transform(**feature_columns(requests))
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    """Resume une ValidationError pydantic en une ligne lisible"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}"
+        for err in exc.errors()
+    )
 
-    city = request.city
-
-    # Coordonnees (defaut = centre-ville)
-    lat = request.latitude or CITY_CENTERS[city]['lat']
-    lon = request.longitude or CITY_CENTERS[city]['lon']
-
-    # Distance du centre
-    distance_centre = calculate_distance_from_center(lat, lon, city)
-
-    # Encodage ville (Basel=0, Centre=1, Geneve=2, Lausanne=3, Zurich=4)
-    ville_encoded = CITY_CENTERS[city]['encoded']
-
-    # Surface features
-    surface = request.surface
-    surface_log = np.log1p(surface)
-    surface_squared = surface ** 2
-
-    # Pieces (estimation si non fourni: ~25m2 par piece pour bureaux)
-    pieces_filled = request.pieces if request.pieces is not None else max(1, surface / 25)
-    pieces_unknown = 0 if request.pieces is not None else 1
-
-    # Etage
-    etage_filled = request.etage if request.etage is not None else -1
-    etage_unknown = 0 if request.etage is not None else 1
-    is_ground_floor = 1 if request.etage == 0 else 0
-    is_high_floor = 1 if request.etage is not None and request.etage >= 5 else 0
-
-    # Type de bien
-    type_bien_encoded = 0 if request.property_type == 'bureau' else 1
-
-    # Equipements
-    has_parking_int = 1 if request.has_parking else 0
-    has_lift_int = 1 if request.has_lift else 0
-
-    # Interaction features (SANS data leakage - pas de prix_m2)
-    surface_ville = surface * ville_encoded
-    surface_distance = surface * distance_centre
-
-    # Construire le DataFrame avec les features dans l'ORDRE du modele
-    features = {
-        'latitude': lat,
-        'longitude': lon,
-        'distance_centre': distance_centre,
-        'ville_encoded': ville_encoded,
-        'surface': surface,
-        'surface_log': surface_log,
-        'surface_squared': surface_squared,
-        'pieces_filled': pieces_filled,
-        'pieces_unknown': pieces_unknown,
-        'etage_filled': etage_filled,
-        'etage_unknown': etage_unknown,
-        'is_ground_floor': is_ground_floor,
-        'is_high_floor': is_high_floor,
-        'type_bien_encoded': type_bien_encoded,
-        'has_parking_int': has_parking_int,
-        'has_lift_int': has_lift_int,
-        'surface_ville': surface_ville,
-        'surface_distance': surface_distance
+
+def model_summary(bundle: ModelBundle) -> Dict[str, Any]:
+    """Metriques de la version active (metadonnees d'entrainement si disponibles)"""
+    return {
+        "model_type": bundle.metadata.get("model_type", "XGBoost Regressor"),
+        "r2_score": bundle.metadata.get("r2_score", 0.763),
+        "mae_chf": bundle.metadata.get("mae_chf", MODEL_MAE_CHF),
+        "version": bundle.version,
+        "last_trained": bundle.last_trained,
     }
 
-    return pd.DataFrame([features])
+
+def build_prediction_response(request: PredictRentRequest, predicted_rent: float,
+                              bundle: ModelBundle) -> PredictRentResponse:
+    """Construit la reponse a partir du loyer brut predit par le modele"""
+
+    summary = model_summary(bundle)
+
+    # S'assurer que le loyer est positif
+    predicted_rent = max(float(predicted_rent), 0.0)
+
+    # Calculs derives
+    price_per_m2 = predicted_rent / request.surface
+    predicted_rent_eur = predicted_rent * CHF_TO_EUR
+
+    # Fourchette de confiance (+/-MAE du modele)
+    mae = summary["mae_chf"]
+
+    return PredictRentResponse(
+        predicted_rent_chf=round(predicted_rent, 2),
+        predicted_rent_eur=round(predicted_rent_eur, 2),
+        price_per_m2_chf=round(price_per_m2, 2),
+        confidence_range={
+            "min_chf": round(max(0, predicted_rent - mae), 2),
+            "max_chf": round(predicted_rent + mae, 2),
+            "mae_chf": mae
+        },
+        city=request.city,
+        surface=request.surface,
+        model_info={
+            "model_type": summary["model_type"],
+            "r2_score": summary["r2_score"],
+            "training_data": "ImmoScout24 Suisse",
+            "last_updated": summary["last_trained"],
+            "version": summary["version"]
+        }
+    )
+
+
+def raise_saturated(exc: PredictionQueueFullError):
+    """Backpressure: le pool de prediction est plein, le client doit reessayer"""
+    raise HTTPException(
+        status_code=503,
+        detail=f"Service de prediction sature, veuillez reessayer. ({exc})",
+        headers={"Retry-After": "1"}
+    )
+
+
+def raise_model_reloading(exc: ModelVersionError):
+    """Le modele a change pendant la requete: le client reessaie sur la nouvelle version"""
+    raise HTTPException(
+        status_code=503,
+        detail=f"Modele en cours de rechargement, veuillez reessayer. ({exc})",
+        headers={"Retry-After": "1"}
+    )
 
 
 # ============================================
@@ -275,47 +422,31 @@ async def predict_rent(request: PredictRentRequest):
     **Precision du modele:** R2 = 0.763, MAE = 1425 CHF
     """
 
-    if model is None:
-        raise HTTPException(
-            status_code=503,
-            detail="Modele ML non disponible. Veuillez reessayer plus tard."
-        )
+    bundle = active_bundle()
 
     try:
         # Preparer les features
-        features_df = prepare_features(request)
-
-        # Prediction
-        predicted_rent = float(model.predict(features_df)[0])
-
-        # S'assurer que le loyer est positif
-        predicted_rent = max(predicted_rent, 0.0)
-
-        # Calculs derives
-        price_per_m2 = predicted_rent / request.surface
-        predicted_rent_eur = predicted_rent * 0.92  # Taux CHF/EUR approximatif
-
-        # Fourchette de confiance (+/-MAE du modele)
-        mae = 1425  # MAE du modele XGBoost sans data leakage
-
-        return PredictRentResponse(
-            predicted_rent_chf=round(predicted_rent, 2),
-            predicted_rent_eur=round(predicted_rent_eur, 2),
-            price_per_m2_chf=round(price_per_m2, 2),
-            confidence_range={
-                "min_chf": round(max(0, predicted_rent - mae), 2),
-                "max_chf": round(predicted_rent + mae, 2),
-                "mae_chf": mae
-            },
-            city=request.city,
-            surface=request.surface,
-            model_info={
-                "model_type": "XGBoost Regressor",
-                "r2_score": 0.763,
-                "training_data": "ImmoScout24 Suisse",
-                "last_updated": "2025-12"
-            }
-        )
+        start = time.perf_counter()
+        features = build_feature_vector(request, bundle.transformer)
+        PREDICTION_STAGE_DURATION.observe(time.perf_counter() - start, stage="feature_preparation", kind="single")
+
+        # Cache (le wizard renvoie souvent les memes combinaisons)
+        cache_key = prediction_cache.make_key(features, bundle.features_list)
+        predicted_rent = prediction_cache.get(cache_key)
+
+        if predicted_rent is None:
+            # Prediction hors boucle asyncio (booster natif, sans DataFrame)
+            predicted_rent = await executor.predict_one(features, engine=bundle.engine, token=bundle.token)
+            prediction_cache.put(cache_key, predicted_rent, token=bundle.token)
+
+        RENT_PREDICTIONS.inc(city=request.city, property_type=request.property_type)
+        return build_prediction_response(request, predicted_rent, bundle)
+
+    except PredictionQueueFullError as e:
+        raise_saturated(e)
+
+    except ModelVersionError as e:
+        raise_model_reloading(e)
 
     except Exception as e:
         raise HTTPException(
@@ -324,20 +455,83 @@ async def predict_rent(request: PredictRentRequest):
         )
 
 
+@router.post("/predict-rent/batch", response_model=BatchPredictRentResponse)
+async def predict_rent_batch(batch: BatchPredictRentRequest):
+    """
+    Predit les loyers d'un lot de biens en un seul appel au modele.
+
+    Chaque element est valide individuellement: un element invalide est
+    signale dans `results[i].error` sans faire echouer le reste du lot.
+    Les features sont construites de facon colonnaire (NumPy) pour tout le lot.
+    """
+
+    bundle = active_bundle()
+
+    results: List[BatchPredictItemResult] = []
+    valid_requests: List[PredictRentRequest] = []
+    valid_positions: List[int] = []
+
+    # Validation element par element
+    for i, item in enumerate(batch.items):
+        try:
+            valid_requests.append(PredictRentRequest.model_validate(item))
+            valid_positions.append(i)
+            results.append(BatchPredictItemResult(index=i))
+        except ValidationError as e:
+            results.append(BatchPredictItemResult(index=i, error=format_validation_error(e)))
+
+    if valid_requests:
+        try:
+            start = time.perf_counter()
+            features = prepare_features_batch(valid_requests, bundle.transformer)
+            PREDICTION_STAGE_DURATION.observe(time.perf_counter() - start, stage="feature_preparation", kind="batch")
+            predictions = await executor.predict_matrix(features, columns=FEATURE_NAMES,
+                                                        engine=bundle.engine, token=bundle.token)
+        except PredictionQueueFullError as e:
+            raise_saturated(e)
+        except ModelVersionError as e:
+            raise_model_reloading(e)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Erreur de prediction: {str(e)}"
+            )
+
+        for position, request, predicted_rent in zip(valid_positions, valid_requests, predictions):
+            results[position].prediction = build_prediction_response(request, predicted_rent, bundle)
+
+        for (city, property_type), count in Counter((r.city, r.property_type) for r in valid_requests).items():
+            RENT_PREDICTIONS.inc(count, city=city, property_type=property_type)
+
+    return BatchPredictRentResponse(
+        total=len(batch.items),
+        succeeded=len(valid_requests),
+        failed=len(batch.items) - len(valid_requests),
+        results=results
+    )
+
+
 @router.get("/model-info", response_model=ModelInfoResponse)
 async def get_model_info():
     """
-    Retourne les informations sur le modele ML de prediction de loyers.
+    Retourne les informations sur la version active du modele ML de prediction de loyers.
     """
 
+    bundle = active_bundle()
+    summary = model_summary(bundle)
+
     return ModelInfoResponse(
-        model_type="XGBoost Regressor",
-        r2_score=0.763,
-        mae_chf=1425,
-        features_count=len(features_list) if features_list else 18,
-        features=features_list or [],
+        model_type=summary["model_type"],
+        r2_score=summary["r2_score"],
+        mae_chf=summary["mae_chf"],
+        features_count=len(bundle.features_list),
+        features=bundle.features_list,
         supported_cities=list(CITY_CENTERS.keys()),
-        last_trained="2025-12"
+        last_trained=summary["last_trained"],
+        version=bundle.version,
+        loaded_at=bundle.loaded_at,
+        inference_engine=bundle.engine.name,
+        history=model_registry.history
     )
 
 
@@ -345,9 +539,16 @@ async def get_model_info():
 async def health_check():
     """Verifie l'etat de l'API ML"""
 
+    bundle = model_registry.active
+
     return {
-        "status": "healthy" if model is not None else "degraded",
-        "model_loaded": model is not None,
-        "scaler_loaded": scaler is not None,
-        "features_loaded": features_list is not None
+        "status": "healthy" if bundle is not None else "degraded",
+        "model_loaded": bundle is not None,
+        "model_version": bundle.version if bundle is not None else None,
+        "scaler_loaded": bundle is not None and bundle.scaler is not None,
+        "features_loaded": bundle is not None and model_registry.features_path.exists(),
+        "inference_engine": bundle.engine.name if bundle is not None else None,
+        "last_reload_error": model_registry.last_error,
+        "executor": executor.stats(),
+        "prediction_cache": prediction_cache.stats()
     }
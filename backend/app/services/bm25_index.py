@@ -0,0 +1,188 @@
+# BM25 Index - Inverted index for lexical retrieval over RAG chunks
+"""
+Index inverse BM25 des chunks du RAG fiscal, aligne sur les lignes du
+store de chunks (services/chunk_store.py): la ligne r du BM25 est la
+ligne r du store.
+
+Complete la recherche vectorielle sur les termes exacts que MiniLM
+rate (IFI, DMTOI, numeros d'articles, codes cantonaux).
+
+Quatre fichiers dans le dossier de l'index FAISS:
+- bm25_meta.json    : parametres (k1, b), nombre de documents, vocabulaire
+- bm25_offsets.npy  : debut des postings de chaque terme (n_terms + 1)
+- bm25_rows.npy     : ligne du store de chaque posting (uint32)
+- bm25_weights.npy  : poids BM25 precalcule de chaque posting (float32)
+
+Le poids idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)) est
+calcule a l'ecriture: le score d'une requete est une simple somme des
+poids des postings de ses termes. Les tableaux sont ouverts en memory-map.
+
+Ecrit par ml_training/index_faiss.py, lu par services/rag_fiscal.py.
+"""
+
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+BM25_META_FILE = "bm25_meta.json"
+BM25_OFFSETS_FILE = "bm25_offsets.npy"
+BM25_ROWS_FILE = "bm25_rows.npy"
+BM25_WEIGHTS_FILE = "bm25_weights.npy"
+
+BM25_FORMAT_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Mots outils FR/DE/EN sans valeur discriminante
+STOPWORDS = frozenset("""
+le la les l un une des de du d et ou a au aux en dans par pour sur avec sans ce cette ces
+est sont qui que quoi dont il elle ils elles on se sa son ses leur leurs ne pas plus
+der die das den dem des ein eine und oder in im mit von zu fur ist
+the of and or to in for on is are a an
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Minuscules sans accents, mots alphanumeriques (les nombres et sigles sont gardes)"""
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+    return [t for t in _TOKEN_RE.findall(text) if t not in STOPWORDS]
+
+
+# ============================================
+# ECRITURE
+# ============================================
+
+class BM25Writer:
+    """
+    Construit l'index inverse a partir des chunks, dans l'ordre des lignes
+    du store. Les fichiers sont ecrits a cote puis renommes a la fermeture.
+    """
+
+    def __init__(self, directory: Path, k1: float = BM25_K1, b: float = BM25_B):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._lengths: List[int] = []
+
+    def add(self, text: str) -> int:
+        """Ajoute le chunk de la ligne suivante et renvoie son numero de ligne"""
+        row = len(self._lengths)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self._postings.setdefault(term, []).append((row, tf))
+        self._lengths.append(len(tokens))
+        return row
+
+    def close(self) -> None:
+        n_docs = len(self._lengths)
+        lengths = np.asarray(self._lengths, dtype=np.float32)
+        avgdl = float(lengths.mean()) if n_docs and lengths.sum() else 1.0
+        norms = self.k1 * (1 - self.b + self.b * lengths / avgdl)
+
+        terms = sorted(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(self._postings[t]) for t in terms])
+        rows = np.empty(offsets[-1], dtype=np.uint32)
+        weights = np.empty(offsets[-1], dtype=np.float32)
+
+        for i, term in enumerate(terms):
+            postings = np.asarray(self._postings[term], dtype=np.int64)
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            tf = postings[:, 1].astype(np.float32)
+            start, end = offsets[i], offsets[i + 1]
+            rows[start:end] = postings[:, 0]
+            weights[start:end] = idf * tf * (self.k1 + 1) / (tf + norms[postings[:, 0]])
+
+        tmp_paths = []
+        for name, array in ((BM25_OFFSETS_FILE, offsets), (BM25_ROWS_FILE, rows), (BM25_WEIGHTS_FILE, weights)):
+            tmp = self.directory / f"{name}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            tmp_paths.append((tmp, self.directory / name))
+
+        meta_tmp = self.directory / f"{BM25_META_FILE}.tmp"
+        meta_tmp.write_text(json.dumps({
+            "format_version": BM25_FORMAT_VERSION,
+            "count": n_docs,
+            "avgdl": avgdl,
+            "k1": self.k1,
+            "b": self.b,
+            "terms": terms,
+        }, ensure_ascii=False), encoding="utf-8")
+
+        # Le fichier meta en dernier: il fait foi pour le nombre de lignes
+        for tmp, path in tmp_paths:
+            os.replace(tmp, path)
+        os.replace(meta_tmp, self.directory / BM25_META_FILE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+
+# ============================================
+# LECTURE
+# ============================================
+
+class BM25Index:
+    """Classement BM25 en lecture seule (memory-map)"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        meta_path = self.directory / BM25_META_FILE
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Index BM25 introuvable: {meta_path} (relancer ml_training/index_faiss.py)")
+
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        self.count: int = meta["count"]
+        self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(meta["terms"])}
+        self.offsets = np.load(self.directory / BM25_OFFSETS_FILE, mmap_mode="r")
+        self.rows = np.load(self.directory / BM25_ROWS_FILE, mmap_mode="r")
+        self.weights = np.load(self.directory / BM25_WEIGHTS_FILE, mmap_mode="r")
+        if len(self.offsets) != len(self.term_ids) + 1 or len(self.rows) != self.offsets[-1]:
+            raise ValueError(f"Index BM25 incoherent: {self.directory}")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        Les k lignes de meilleur score BM25: liste de (ligne du store, score).
+        `allowed` (masque booleen des lignes) restreint les candidats.
+        """
+        term_ids = [self.term_ids[t] for t in set(tokenize(query)) if t in self.term_ids]
+        if k <= 0 or not term_ids:
+            return []
+
+        rows = np.concatenate([self.rows[self.offsets[t]:self.offsets[t + 1]] for t in term_ids])
+        weights = np.concatenate([self.weights[self.offsets[t]:self.offsets[t + 1]] for t in term_ids])
+        if allowed is not None:
+            keep = allowed[rows]
+            rows, weights = rows[keep], weights[keep]
+            if len(rows) == 0:
+                return []
+
+        # Somme des poids par ligne candidate (seules les lignes qui contiennent un terme)
+        candidates, inverse = np.unique(rows, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights).astype(np.float32)
+        if len(candidates) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.lexsort((candidates[top], -scores[top]))]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
@@ -0,0 +1,225 @@
+# Chunk Store - Compact offset-indexed storage for RAG chunks
+"""
+Stockage des chunks du RAG fiscal sans pickle.
+
+Trois fichiers dans le dossier de l'index FAISS:
+- chunks.bin         : textes UTF-8 concatenes
+- chunks_offsets.npy : une ligne par chunk (offset, longueur, source, rang, label)
+- chunks_meta.json   : metadonnees des documents sources + ids des chunks
+
+index.faiss est un IndexIDMap2 dont les ids sont les labels des chunks
+(id md5 converti en int64): l'index peut etre mis a jour sans que
+l'ordre des lignes du store suive celui des vecteurs. Les anciens stores
+(format 1) utilisent le numero de ligne comme id FAISS.
+
+Les deux premiers fichiers sont ouverts en memory-map: les workers
+uvicorn partagent les pages du cache OS et seuls les chunks retournes
+sont decodes.
+
+Ecrit par ml_training/index_faiss.py, lu par services/rag_fiscal.py.
+"""
+
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+CHUNK_TEXT_FILE = "chunks.bin"
+CHUNK_OFFSETS_FILE = "chunks_offsets.npy"
+CHUNK_META_FILE = "chunks_meta.json"
+
+STORE_FORMAT_VERSION = 2
+
+# Ids renvoyes par FAISS: labels des chunks (IndexIDMap2) ou numeros de ligne
+ID_MODES = ("label", "row")
+
+ROW_DTYPE = np.dtype([
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("source", "<u4"),       # index dans sources[] de chunks_meta.json
+    ("chunk_index", "<u4"),  # rang du chunk dans son document
+    ("label", "<i8"),        # id int64 derive de l'id md5 du chunk
+])
+
+# Valeurs acceptees par filtre: une valeur ou une liste de valeurs
+Filters = Dict[str, Union[str, Sequence[str]]]
+
+
+def chunk_label(chunk_id: str) -> int:
+    """Id md5 tronque (12 hex = 48 bits) -> entier int64 positif"""
+    return int(chunk_id, 16)
+
+
+# ============================================
+# ECRITURE
+# ============================================
+
+class ChunkStoreWriter:
+    """
+    Ecrit les chunks du store (en mode "row", dans l'ordre des vecteurs).
+
+    Les fichiers sont ecrits a cote puis renommes a la fermeture: un
+    lecteur ne voit jamais de store partiel.
+    """
+
+    def __init__(self, directory: Path, id_mode: str = "label", index_version: Optional[str] = None):
+        if id_mode not in ID_MODES:
+            raise ValueError(f"Mode d'id inconnu: {id_mode}. Modes valides: {', '.join(ID_MODES)}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.id_mode = id_mode
+        self.index_version = index_version
+        self._text_tmp = self.directory / f"{CHUNK_TEXT_FILE}.tmp"
+        self._text_file = open(self._text_tmp, "wb")
+        self._offset = 0
+        self._rows: List[tuple] = []
+        self._chunk_ids: List[str] = []
+        self._sources: List[Dict] = []
+        self._source_ids: Dict[str, int] = {}
+
+    def add(self, chunk_id: str, text: str, metadata: Dict) -> int:
+        """Ajoute un chunk et renvoie son numero de ligne"""
+        source_name = metadata.get("source", "")
+        source_id = self._source_ids.get(source_name)
+        if source_id is None:
+            source_id = self._source_ids[source_name] = len(self._sources)
+            self._sources.append({k: v for k, v in metadata.items() if k != "chunk_index"})
+
+        data = text.encode("utf-8")
+        self._text_file.write(data)
+        self._rows.append((
+            self._offset, len(data), source_id, metadata.get("chunk_index", 0), chunk_label(chunk_id)
+        ))
+        self._chunk_ids.append(chunk_id)
+        self._offset += len(data)
+        return len(self._rows) - 1
+
+    def close(self) -> None:
+        self._text_file.close()
+
+        offsets_tmp = self.directory / f"{CHUNK_OFFSETS_FILE}.tmp"
+        with open(offsets_tmp, "wb") as f:
+            np.save(f, np.array(self._rows, dtype=ROW_DTYPE))
+
+        meta_tmp = self.directory / f"{CHUNK_META_FILE}.tmp"
+        meta_tmp.write_text(json.dumps({
+            "format_version": STORE_FORMAT_VERSION,
+            "id_mode": self.id_mode,
+            "index_version": self.index_version,
+            "count": len(self._rows),
+            "sources": self._sources,
+            "chunk_ids": self._chunk_ids,
+        }, ensure_ascii=False), encoding="utf-8")
+
+        # Le fichier meta en dernier: il fait foi pour le nombre de lignes
+        os.replace(self._text_tmp, self.directory / CHUNK_TEXT_FILE)
+        os.replace(offsets_tmp, self.directory / CHUNK_OFFSETS_FILE)
+        os.replace(meta_tmp, self.directory / CHUNK_META_FILE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._text_file.close()
+            self._text_tmp.unlink(missing_ok=True)
+
+
+# ============================================
+# LECTURE
+# ============================================
+
+class ChunkStore:
+    """Acces en lecture seule (memory-map) aux chunks indexes"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        meta_path = self.directory / CHUNK_META_FILE
+        if not meta_path.exists():
+            raise FileNotFoundError(
+                f"Store de chunks introuvable: {meta_path} (relancer ml_training/index_faiss.py)"
+            )
+
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        self.sources: List[Dict] = meta["sources"]
+        self.chunk_ids: List[str] = meta["chunk_ids"]
+        self.id_mode: str = meta.get("id_mode", "row")
+        # Version de l'index ecrite par ml_training/index_faiss.py (None pour les anciens stores)
+        self.index_version: Optional[str] = meta.get("index_version")
+        self.rows = np.load(self.directory / CHUNK_OFFSETS_FILE, mmap_mode="r")
+        if len(self.rows) != meta["count"]:
+            raise ValueError(f"Store de chunks incoherent: {len(self.rows)} lignes pour {meta['count']} attendues")
+
+        # Table label -> ligne (labels tries) pour traduire les ids FAISS
+        self.labels = np.ascontiguousarray(self.rows["label"], dtype=np.int64)
+        self._label_order = np.argsort(self.labels, kind="stable")
+        self._sorted_labels = self.labels[self._label_order]
+
+        text_path = self.directory / CHUNK_TEXT_FILE
+        self._text_file = open(text_path, "rb")
+        size = text_path.stat().st_size
+        self._text = mmap.mmap(self._text_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def text(self, row: int) -> str:
+        offset, length = int(self.rows[row]["offset"]), int(self.rows[row]["length"])
+        return self._text[offset:offset + length].decode("utf-8")
+
+    def metadata(self, row: int) -> Dict:
+        return {
+            **self.sources[int(self.rows[row]["source"])],
+            "chunk_index": int(self.rows[row]["chunk_index"]),
+        }
+
+    def record(self, row: int) -> Dict:
+        """Chunk complet {id, text, metadata} (meme forme que la dataclass Chunk)"""
+        return {"id": self.chunk_ids[row], "text": self.text(row), "metadata": self.metadata(row)}
+
+    @property
+    def ids_are_labels(self) -> bool:
+        return self.id_mode == "label"
+
+    def rows_for_ids(self, ids: np.ndarray) -> np.ndarray:
+        """Ids renvoyes par FAISS -> numeros de ligne (-1 si inconnu ou absent)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not self.ids_are_labels:
+            return np.where((ids >= 0) & (ids < len(self.rows)), ids, -1)
+        if len(self._sorted_labels) == 0:
+            return np.full(ids.shape, -1, dtype=np.int64)
+        positions = np.searchsorted(self._sorted_labels, ids).clip(max=len(self._sorted_labels) - 1)
+        found = self._sorted_labels[positions] == ids
+        return np.where(found, self._label_order[positions], -1)
+
+    def ids_for_rows(self, mask: np.ndarray) -> np.ndarray:
+        """Ids FAISS (int64) des lignes selectionnees par un masque booleen"""
+        if self.ids_are_labels:
+            return np.ascontiguousarray(self.labels[mask])
+        return np.flatnonzero(mask).astype(np.int64)
+
+    def source_mask(self, filters: Optional[Filters]) -> np.ndarray:
+        """Documents sources qui satisfont tous les filtres (canton, doc_type, language, source...)"""
+        mask = np.ones(len(self.sources), dtype=bool)
+        for key, expected in (filters or {}).items():
+            allowed = {expected} if isinstance(expected, str) else set(expected)
+            mask &= np.fromiter((s.get(key) in allowed for s in self.sources), dtype=bool, count=len(self.sources))
+        return mask
+
+    def row_mask(self, filters: Optional[Filters]) -> np.ndarray:
+        """Masque booleen des lignes (chunks) qui satisfont les filtres"""
+        return self.source_mask(filters)[self.rows["source"]]
+
+    def iter_records(self, rows: Iterable[int]):
+        for row in rows:
+            yield self.record(int(row))
+
+    def close(self) -> None:
+        if isinstance(self._text, mmap.mmap):
+            self._text.close()
+        self._text_file.close()
@@ -0,0 +1,208 @@
+# Embedding Backend - Pluggable sentence embedding runtimes (PyTorch / ONNX)
+"""
+Backends d'encodage du modele d'embedding du RAG fiscal:
+- torch     : sentence-transformers (PyTorch), reference
+- onnx      : meme reseau exporte en ONNX, execute par onnxruntime (CPU)
+- onnx-int8 : export ONNX avec quantification dynamique int8 des poids
+
+Les trois exposent encode(texts, batch_size) -> ndarray (n, d) float32.
+L'export (export_onnx) se lance une fois via ml_training/export_onnx_embedder.py;
+onnxruntime et transformers ne sont importes que si un backend ONNX est choisi.
+
+Le pooling (moyenne masquee, normalisation eventuelle) reproduit celui du
+SentenceTransformer exporte, decrit dans embedder.json.
+
+Utilise par services/rag_fiscal.py (requetes) et ml_training/embedding_pipeline.py
+(indexation).
+"""
+
+import json
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model_int8.onnx"
+EMBEDDER_CONFIG_FILE = "embedder.json"
+
+
+def cache_model_name(model_name: str, backend: str) -> str:
+    """Nom du modele pour le cache d'embeddings: les vecteurs int8 ne se melangent pas aux vecteurs torch"""
+    return model_name if backend == "torch" else f"{model_name}@{backend}"
+
+
+def onnx_model_dir(root: Path, model_name: str) -> Path:
+    return Path(root) / model_name.replace("/", "_")
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """Embeddings de norme 1: le produit scalaire (index FAISS IP) est la similarite cosinus"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=-1, keepdims=True), 1e-12, None)
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class TorchEmbedder:
+    """Modele sentence-transformers (PyTorch)"""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str, threads: int = 0):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model_name = model_name
+        self._model = SentenceTransformer(model_name)
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        return np.asarray(self._model.encode(list(texts), batch_size=batch_size), dtype=np.float32)
+
+
+class OnnxEmbedder:
+    """Reseau exporte par export_onnx(), execute par onnxruntime sur CPU"""
+
+    def __init__(self, directory: Path, quantized: bool = True, threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        directory = Path(directory)
+        config_path = directory / EMBEDDER_CONFIG_FILE
+        if not config_path.exists():
+            raise FileNotFoundError(
+                f"Modele ONNX introuvable: {config_path} (lancer ml_training/export_onnx_embedder.py)"
+            )
+        config = json.loads(config_path.read_text(encoding="utf-8"))
+
+        self.backend = "onnx-int8" if quantized else "onnx"
+        self.model_name = config["model_name"]
+        self.max_seq_length = config["max_seq_length"]
+        self.normalize = config["normalize"]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        model_path = directory / (ONNX_INT8_MODEL_FILE if quantized else ONNX_MODEL_FILE)
+        self._session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self._tokenizer = AutoTokenizer.from_pretrained(str(directory))
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self._tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        mask = tokens["attention_mask"].astype(np.int64)
+        hidden = self._session.run(None, {
+            "input_ids": tokens["input_ids"].astype(np.int64),
+            "attention_mask": mask,
+        })[0]
+
+        # Pooling moyen sur les tokens reels (MEME CALCUL QUE sentence_transformers.models.Pooling)
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        # Textes tries par longueur: moins de padding dans chaque lot
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        out = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            vectors = self._encode_batch([texts[i] for i in rows])
+            if out.shape[1] == 0:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[rows] = vectors
+        return out
+
+
+def load_embedder(backend: str, model_name: str, onnx_root: Path, threads: int = 0):
+    """Embedder du backend demande (torch, onnx, onnx-int8)"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Backend d'embedding inconnu: {backend}. Valides: {', '.join(EMBEDDING_BACKENDS)}")
+    if backend == "torch":
+        return TorchEmbedder(model_name, threads)
+    return OnnxEmbedder(onnx_model_dir(onnx_root, model_name), quantized=backend == "onnx-int8", threads=threads)
+
+
+# ============================================
+# EXPORT
+# ============================================
+
+def export_onnx(model_name: str, onnx_root: Path, quantize: bool = True, opset: int = 14) -> Path:
+    """
+    Exporte le transformer du SentenceTransformer en ONNX (axes batch et
+    sequence dynamiques), sauvegarde le tokenizer et, si demande, une
+    version quantifiee int8 (quantification dynamique des poids).
+
+    Returns:
+        Dossier contenant model.onnx, model_int8.onnx, embedder.json et le tokenizer
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    modules = list(model)
+    pooling = next((m for m in modules if type(m).__name__ == "Pooling"), None)
+    if pooling is None or pooling.get_pooling_mode_str() != "mean":
+        raise ValueError(f"Export ONNX limite au pooling moyen ({model_name})")
+
+    directory = onnx_model_dir(onnx_root, model_name)
+    directory.mkdir(parents=True, exist_ok=True)
+    model.tokenizer.save_pretrained(str(directory))
+
+    class _Encoder(torch.nn.Module):
+        def __init__(self, transformer):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, input_ids, attention_mask):
+            return self.transformer(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    encoder = _Encoder(modules[0].auto_model).eval()
+    sample = model.tokenizer(["Impot sur le revenu a Geneve"], return_tensors="pt")
+    fp32_path = directory / ONNX_MODEL_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            encoder,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+        )
+    print(f"[ONNX] Modele exporte: {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = directory / ONNX_INT8_MODEL_FILE
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        print(f"[ONNX] Modele quantifie int8: {int8_path}")
+
+    (directory / EMBEDDER_CONFIG_FILE).write_text(json.dumps({
+        "model_name": model_name,
+        "max_seq_length": model.max_seq_length,
+        "normalize": any(type(m).__name__ == "Normalize" for m in modules),
+        "dimension": model.get_sentence_embedding_dimension(),
+        "quantized": quantize,
+        "opset": opset,
+    }, indent=1), encoding="utf-8")
+    return directory
@@ -0,0 +1,238 @@
+# Embedding Cache - Content-addressed on-disk cache for sentence embeddings
+"""
+Cache disque des embeddings, adresse par le contenu.
+
+Cle = blake2b(nom du modele + texte). Un sous-dossier par modele:
+- vectors.f32 : matrice float32 (lignes ajoutees a la fin), lue en memory-map
+- keys.bin    : une cle de 16 octets par ligne, dans le meme ordre
+- meta.json   : modele et dimension
+
+Les ajouts se font sous verrou fichier (fcntl): l'indexeur et plusieurs
+workers uvicorn peuvent partager le meme cache. Les vecteurs sont ecrits
+avant les cles, une cle lue a donc toujours son vecteur complet.
+
+Utilise par ml_training/index_faiss.py (re-indexation) et
+services/rag_fiscal.py (requetes).
+"""
+
+import hashlib
+import json
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: verrou inter-processus indisponible
+    fcntl = None
+
+KEY_SIZE = 16
+VECTORS_FILE = "vectors.f32"
+KEYS_FILE = "keys.bin"
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+
+
+def _slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+
+
+@dataclass
+class CacheLookup:
+    """Resultat d'une recherche dans le cache pour un lot de textes"""
+
+    texts: Sequence[str]
+    keys: List[bytes]
+    rows: List[Optional[int]]          # ligne du cache, None si absent
+    missing: Dict[bytes, List[int]]    # cle absente -> positions dans texts
+
+    @property
+    def missing_texts(self) -> List[str]:
+        return [self.texts[positions[0]] for positions in self.missing.values()]
+
+
+@contextmanager
+def _file_lock(path: Path):
+    with open(path, "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class EmbeddingCache:
+    """Cache d'embeddings persistant (append-only, borne a max_rows lignes)"""
+
+    def __init__(self, directory: Path, model_name: str, max_rows: int = 500_000):
+        self.model_name = model_name
+        self.max_rows = max_rows
+        self.directory = Path(directory) / _slug(model_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._rows: Dict[bytes, int] = {}
+        self._count = 0           # lignes indexees (cles lues)
+        self._vectors = None      # memmap en lecture
+        self._mapped_rows = 0
+        self.dimension: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+        with self._lock:
+            self._sync_keys()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_rows > 0
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(f"{self.model_name}\0{text}".encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+    def __len__(self) -> int:
+        return self._count
+
+    # --------------------------------------------
+    # Lecture
+    # --------------------------------------------
+
+    def _sync_keys(self) -> None:
+        """Indexe les cles ajoutees depuis la derniere lecture (y compris par un autre processus)"""
+        if self.dimension is None:
+            # Cache cree par un autre processus (indexeur, autre worker) depuis l'ouverture
+            meta_path = self.directory / META_FILE
+            if not meta_path.exists():
+                return
+            self.dimension = json.loads(meta_path.read_text(encoding="utf-8"))["dimension"]
+        keys_path = self.directory / KEYS_FILE
+        if not keys_path.exists():
+            return
+        row_bytes = 4 * self.dimension
+        vectors_path = self.directory / VECTORS_FILE
+        n_vectors = vectors_path.stat().st_size // row_bytes if vectors_path.exists() else 0
+
+        with open(keys_path, "rb") as f:
+            f.seek(self._count * KEY_SIZE)
+            data = f.read((max(n_vectors - self._count, 0)) * KEY_SIZE)
+
+        for i in range(len(data) // KEY_SIZE):
+            self._rows[data[i * KEY_SIZE:(i + 1) * KEY_SIZE]] = self._count
+            self._count += 1
+
+    def _read(self, rows: Sequence[int]) -> np.ndarray:
+        if max(rows) >= self._mapped_rows:
+            self._vectors = np.memmap(
+                self.directory / VECTORS_FILE, dtype="<f4", mode="r", shape=(self._count, self.dimension)
+            )
+            self._mapped_rows = self._count
+        return np.asarray(self._vectors[list(rows)], dtype=np.float32)
+
+    # --------------------------------------------
+    # Ecriture
+    # --------------------------------------------
+
+    def _append(self, keys: List[bytes], vectors: np.ndarray) -> None:
+        with self._lock, _file_lock(self.directory / LOCK_FILE):
+            if self.dimension is None:
+                self.dimension = int(vectors.shape[1])
+                (self.directory / META_FILE).write_text(
+                    json.dumps({"model": self.model_name, "dimension": self.dimension}), encoding="utf-8"
+                )
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"Dimension {vectors.shape[1]} != {self.dimension} du cache {self.directory}")
+
+            self._sync_keys()
+            new = [(k, v) for k, v in zip(keys, vectors) if k not in self._rows]
+            new = new[:max(0, self.max_rows - self._count)]
+            if not new:
+                return
+
+            # Un ecrivain interrompu a pu laisser des vecteurs sans cle: on les ecrase
+            vectors_path = self.directory / VECTORS_FILE
+            with open(vectors_path, "ab") as f:
+                f.truncate(self._count * 4 * self.dimension)
+                f.write(np.stack([v for _, v in new]).astype("<f4").tobytes())
+            with open(self.directory / KEYS_FILE, "ab") as f:
+                f.truncate(self._count * KEY_SIZE)
+                f.write(b"".join(k for k, _ in new))
+
+            for k, _ in new:
+                self._rows[k] = self._count
+                self._count += 1
+
+    # --------------------------------------------
+    # API
+    # --------------------------------------------
+
+    def lookup(self, texts: Sequence[str]) -> CacheLookup:
+        """Separe les textes deja en cache des textes a encoder (une fois par texte distinct)"""
+        keys = [self.key(t) for t in texts]
+        if self.enabled:
+            with self._lock:
+                rows = [self._rows.get(k) for k in keys]
+                if None in rows:
+                    # Cles absentes: peut-etre ajoutees par un autre processus depuis la derniere lecture
+                    self._sync_keys()
+                    rows = [self._rows.get(k) if row is None else row for k, row in zip(keys, rows)]
+        else:
+            rows = [None] * len(keys)
+
+        missing: Dict[bytes, List[int]] = {}
+        for i, (k, row) in enumerate(zip(keys, rows)):
+            if row is None:
+                missing.setdefault(k, []).append(i)
+
+        n_missing = sum(len(positions) for positions in missing.values())
+        self.hits += len(texts) - n_missing
+        self.misses += n_missing
+        return CacheLookup(texts=texts, keys=keys, rows=rows, missing=missing)
+
+    def complete(self, lookup: CacheLookup, computed: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Embeddings (n, d) float32 des textes du lookup. `computed` contient
+        les embeddings de lookup.missing_texts, ajoutes au cache.
+        """
+        if computed is not None:
+            computed = np.asarray(computed, dtype=np.float32)
+            if self.enabled:
+                self._append(list(lookup.missing), computed)
+
+        dimension = computed.shape[1] if computed is not None else self.dimension
+        out = np.empty((len(lookup.texts), dimension or 0), dtype=np.float32)
+
+        hit_positions = [i for i, row in enumerate(lookup.rows) if row is not None]
+        if hit_positions:
+            with self._lock:
+                out[hit_positions] = self._read([lookup.rows[i] for i in hit_positions])
+        if computed is not None:
+            for vector, positions in zip(computed, lookup.missing.values()):
+                out[positions] = vector
+        return out
+
+    def encode(self, texts: Sequence[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Embeddings (n, d) float32 de `texts`: lus dans le cache si presents,
+        sinon calcules par encode_fn (une seule fois par texte distinct) puis
+        ajoutes au cache.
+        """
+        lookup = self.lookup(texts)
+        computed = encode_fn(lookup.missing_texts) if lookup.missing else None
+        return self.complete(lookup, computed)
+
+    def stats(self) -> Dict:
+        requests = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "size": self._count,
+            "max_rows": self.max_rows,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 4) if requests else 0.0,
+        }
@@ -0,0 +1,260 @@
+# Model Registry - Versioned rent model with hot reload
+"""
+Registre versionne du modele de loyers.
+
+Un "bundle" regroupe tout ce qui est charge depuis ml_models/:
+modele, scaler, liste des features, etat des features (rent_features),
+metadonnees d'entrainement et moteur d'inference. Le registre:
+
+1. charge un nouveau bundle en arriere-plan (thread de surveillance),
+2. le chauffe avec quelques predictions synthetiques,
+3. le publie par simple reassignation de reference (atomique).
+
+Les requetes en cours gardent la reference du bundle avec lequel elles
+ont demarre: aucune n'est perdue pendant un rechargement.
+"""
+
+import hashlib
+import json
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import joblib
+
+from services.real_estate_predictor import create_engine
+from services.rent_features import RentFeatureTransformer
+
+
+@dataclass
+class ModelBundle:
+    """Modele charge et pret a servir"""
+
+    version: str
+    model: Any
+    scaler: Any
+    features_list: List[str]
+    engine: Any
+    model_path: Path
+    fingerprint: Tuple
+    metadata: Dict = field(default_factory=dict)
+    transformer: RentFeatureTransformer = field(default_factory=RentFeatureTransformer.legacy)
+    loaded_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec="seconds"))
+
+    @property
+    def token(self) -> Tuple:
+        """Identifie la version publiee (invalidation du cache des predictions)"""
+        return (self.version, self.fingerprint)
+
+    @property
+    def model_stat(self) -> Optional[Tuple[int, int]]:
+        """(taille, mtime_ns) du fichier modele lu pour ce bundle"""
+        for name, size, mtime_ns in self.fingerprint:
+            if name == self.model_path.name and size is not None:
+                return size, mtime_ns
+        return None
+
+    @property
+    def last_trained(self) -> str:
+        """Date d'entrainement (metadonnees, sinon date du fichier modele)"""
+        trained_at = self.metadata.get("trained_at")
+        if trained_at:
+            return trained_at[:7]
+        mtime = self.model_path.stat().st_mtime if self.model_path.exists() else time.time()
+        return datetime.fromtimestamp(mtime, timezone.utc).strftime("%Y-%m")
+
+
+class ModelRegistry:
+    """Charge, chauffe et publie atomiquement les versions du modele"""
+
+    def __init__(self, models_dir: Path, model_filename: str, scaler_filename: str,
+                 features_filename: str, metadata_filename: str,
+                 default_features: Sequence[str],
+                 feature_state_filename: Optional[str] = None,
+                 warmup_samples: Optional[Callable[[ModelBundle], List[Dict[str, float]]]] = None,
+                 history_size: int = 10):
+        self.models_dir = Path(models_dir)
+        self.model_path = self.models_dir / model_filename
+        self.scaler_path = self.models_dir / scaler_filename
+        self.features_path = self.models_dir / features_filename
+        self.metadata_path = self.models_dir / metadata_filename
+        self.feature_state_path = self.models_dir / feature_state_filename if feature_state_filename else None
+        self.default_features = list(default_features)
+        self.warmup_samples = warmup_samples
+        self.history_size = history_size
+
+        self.active: Optional[ModelBundle] = None
+        self.history: List[Dict] = []
+        self.last_error: Optional[str] = None
+
+        self._listeners: List[Callable[[ModelBundle], None]] = []
+        self._load_lock = threading.Lock()
+        self._watch_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._pending_fingerprint: Optional[Tuple] = None
+        # Empreinte d'un bundle invalide: pas de nouvel essai tant qu'elle ne change pas
+        self._failed_fingerprint: Optional[Tuple] = None
+
+    # ============================================
+    # CHARGEMENT
+    # ============================================
+
+    def fingerprint(self) -> Tuple:
+        """Empreinte (taille, mtime) de tous les fichiers du bundle"""
+        parts = []
+        paths = [self.model_path, self.scaler_path, self.features_path, self.metadata_path]
+        if self.feature_state_path is not None:
+            paths.append(self.feature_state_path)
+        for path in paths:
+            try:
+                stat = path.stat()
+                parts.append((path.name, stat.st_size, stat.st_mtime_ns))
+            except OSError:
+                parts.append((path.name, None, None))
+        return tuple(parts)
+
+    def subscribe(self, callback: Callable[[ModelBundle], None]) -> None:
+        """Appele avec le nouveau bundle apres chaque publication"""
+        self._listeners.append(callback)
+
+    def _read_bundle(self, fingerprint: Tuple) -> ModelBundle:
+        model = joblib.load(self.model_path)
+        scaler = joblib.load(self.scaler_path) if self.scaler_path.exists() else None
+
+        features_list = self.default_features
+        if self.features_path.exists():
+            features_list = self.features_path.read_text().strip().split('\n')
+
+        # Etat des features du modele (absent: modele entraine avant, etat legacy)
+        transformer = RentFeatureTransformer.legacy()
+        if self.feature_state_path is not None:
+            transformer = RentFeatureTransformer.load_or_legacy(self.feature_state_path)
+
+        metadata = {}
+        if self.metadata_path.exists():
+            metadata = json.loads(self.metadata_path.read_text(encoding='utf-8'))
+
+        version = metadata.get("version")
+        if not version:
+            version = hashlib.sha1(self.model_path.read_bytes()).hexdigest()[:12]
+
+        return ModelBundle(
+            version=version,
+            model=model,
+            scaler=scaler,
+            features_list=features_list,
+            engine=create_engine(model, features_list),
+            model_path=self.model_path,
+            fingerprint=fingerprint,
+            metadata=metadata,
+            transformer=transformer,
+        )
+
+    def _warm(self, bundle: ModelBundle) -> None:
+        """Predictions synthetiques: chauffe le booster et valide le bundle"""
+        if self.warmup_samples is None:
+            return
+        for features in self.warmup_samples(bundle):
+            if not all(math.isfinite(value) for value in features.values()):
+                raise ValueError("Features de chauffe invalides (etat des features incompatible)")
+            prediction = bundle.engine.predict_one(features)
+            if not math.isfinite(prediction):
+                raise ValueError(f"Prediction de chauffe invalide: {prediction}")
+
+    def _publish(self, bundle: ModelBundle) -> None:
+        previous = self.active
+
+        # Executor et cache d'abord, puis publication pour les nouvelles requetes
+        for callback in self._listeners:
+            callback(bundle)
+        self.active = bundle  # Reassignation de reference: atomique
+
+        self.history.append({"version": bundle.version, "loaded_at": bundle.loaded_at})
+        del self.history[:-self.history_size]
+
+        if previous is None:
+            print(f"[ML] Modele {bundle.version} actif ({bundle.engine.name})")
+        else:
+            print(f"[ML] Modele {previous.version} -> {bundle.version} (rechargement a chaud)")
+
+    def load(self) -> Optional[ModelBundle]:
+        """Charge, chauffe et publie la version presente sur disque"""
+        with self._load_lock:
+            fingerprint = self.fingerprint()
+            if not self.model_path.exists():
+                self.last_error = f"Modele non trouve: {self.model_path}"
+                self._failed_fingerprint = fingerprint
+                print(f"[ML] {self.last_error}")
+                return None
+
+            try:
+                bundle = self._read_bundle(fingerprint)
+                self._warm(bundle)
+            except Exception as e:
+                # On garde la version active: un fichier en cours d'ecriture
+                # sera retente au prochain tour de surveillance
+                self.last_error = str(e)
+                self._failed_fingerprint = fingerprint
+                print(f"[ML] Erreur chargement modele: {e}")
+                return None
+
+            self.last_error = None
+            self._failed_fingerprint = None
+            self._publish(bundle)
+            return bundle
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recharge si les fichiers ont change.
+
+        L'empreinte doit etre stable sur deux tours consecutifs pour
+        eviter de charger un fichier en cours d'ecriture. Une empreinte
+        deja en echec n'est pas rechargee (erreur journalisee une fois).
+        """
+        fingerprint = self.fingerprint()
+        if self.active is not None and fingerprint == self.active.fingerprint:
+            self._pending_fingerprint = None
+            return False
+
+        if fingerprint == self._failed_fingerprint:
+            self._pending_fingerprint = None
+            return False
+
+        if fingerprint != self._pending_fingerprint:
+            self._pending_fingerprint = fingerprint
+            return False
+
+        self._pending_fingerprint = None
+        return self.load() is not None
+
+    # ============================================
+    # SURVEILLANCE DE ml_models/
+    # ============================================
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop_event.wait(interval):
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"[ML] Erreur surveillance modele: {e}")
+
+    def start_watching(self, interval: float) -> None:
+        if interval <= 0 or self._watch_thread is not None:
+            return
+        self._stop_event.clear()
+        self._watch_thread = threading.Thread(
+            target=self._watch, args=(interval,), name="model-watcher", daemon=True
+        )
+        self._watch_thread.start()
+        print(f"[ML] Surveillance de {self.models_dir} toutes les {interval:g}s")
+
+    def stop_watching(self) -> None:
+        if self._watch_thread is None:
+            return
+        self._stop_event.set()
+        self._watch_thread.join()
+        self._watch_thread = None
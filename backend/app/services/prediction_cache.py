@@ -0,0 +1,108 @@
+# Prediction Cache - LRU/TTL cache in front of the rent model
+"""
+Cache en memoire des predictions de loyer.
+
+La cle est le vecteur des 18 features arrondi (quantifie) a `decimals`
+decimales: deux requetes du wizard qui ne different que par du bruit
+(coordonnees a 1e-5 pres, par ex.) partagent la meme entree.
+
+Le cache est lie a la version du modele publiee par le registre: quand
+load_model() charge un fichier different, bind_model() vide le cache.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+
+class PredictionCache:
+    """Cache LRU borne avec expiration (TTL) et compteurs hit/miss"""
+
+    def __init__(self, max_size: int = 4096, ttl_seconds: float = 600, decimals: int = 4):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.decimals = decimals
+        self.model_token = None
+
+        self._entries: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def make_key(self, features: Dict[str, float], feature_names: Sequence[str]) -> Tuple:
+        """Vecteur de features quantifie, dans l'ordre du modele"""
+        return tuple(round(float(features[name]), self.decimals) for name in feature_names)
+
+    def get(self, key: Hashable) -> Optional[float]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: Hashable, value: float, token=None) -> None:
+        """Stocke une prediction; ignoree si elle vient d'un modele remplace entre-temps"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if token is not None and token != self.model_token:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def bind_model(self, token) -> bool:
+        """Associe le cache a un modele; vide le cache si le modele a change"""
+        with self._lock:
+            if token == self.model_token:
+                return False
+            if self.model_token is not None:
+                self._invalidations += 1
+            self.model_token = token
+            self._entries.clear()
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
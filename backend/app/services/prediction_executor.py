@@ -0,0 +1,237 @@
+# Prediction Executor - Off-loop ML inference with backpressure
+"""
+Execute les predictions du modele de loyers hors de la boucle asyncio.
+
+Modes (cf. config.PREDICT_EXECUTOR_MODE):
+- inline  : appel direct dans la boucle (reference / debug)
+- thread  : ThreadPoolExecutor borne, moteur partage entre threads
+- process : ProcessPoolExecutor; chaque tache porte la version (token) du
+            bundle qui a calcule les features, le worker recharge le modele
+            si la sienne differe (les 2 dernieres versions restent en memoire)
+
+Le nombre de predictions en cours + en attente est borne a
+workers + max_queue: au-dela, PredictionQueueFullError est levee
+et le router repond 503 au lieu d'empiler les requetes.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.exceptions import ModelVersionError, PredictionQueueFullError
+from core.metrics import PREDICTION_STAGE_DURATION
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+# Versions du modele gardees par worker / connues de l'executor (requetes en vol pendant un rechargement)
+WORKER_ENGINES_KEPT = 2
+MODEL_SPECS_KEPT = 4
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Version du modele envoyee avec chaque tache du mode process"""
+
+    token: Hashable
+    model_path: str
+    feature_names: Tuple[str, ...]
+    model_stat: Optional[Tuple[int, int]] = None   # (taille, mtime_ns) du fichier lu par le bundle
+
+
+# ============================================
+# WORKERS (mode process)
+# ============================================
+
+_worker_engines: "OrderedDict[Hashable, object]" = OrderedDict()
+
+
+def _file_stat(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _worker_engine(spec: ModelSpec):
+    """Moteur de la version demandee, charge depuis le disque si le worker ne l'a pas"""
+    engine = _worker_engines.get(spec.token)
+    if engine is not None:
+        _worker_engines.move_to_end(spec.token)
+        return engine
+
+    import joblib
+    from services.real_estate_predictor import create_engine
+
+    path = Path(spec.model_path)
+    before = _file_stat(path)
+    model = joblib.load(path)
+    # Le fichier doit etre celui du bundle (pas remplace avant ou pendant la lecture)
+    if spec.model_stat is not None and not (before == _file_stat(path) == spec.model_stat):
+        raise ModelVersionError(f"Modele {path.name} remplace sur disque depuis la version demandee")
+
+    engine = create_engine(model, list(spec.feature_names))
+    _worker_engines[spec.token] = engine
+    while len(_worker_engines) > WORKER_ENGINES_KEPT:
+        _worker_engines.popitem(last=False)
+    return engine
+
+
+def _init_worker(spec: ModelSpec) -> None:
+    """Initializer des processus: precharge la version courante"""
+    _worker_engine(spec)
+
+
+def _timed_call(fn, *args):
+    """Execute fn dans le worker et renvoie (resultat, duree de calcul)"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _worker_predict_one(spec: ModelSpec, features: Dict[str, float]) -> float:
+    return _worker_engine(spec).predict_one(features)
+
+
+def _worker_predict_matrix(spec: ModelSpec, X: np.ndarray, columns: Optional[Sequence[str]]) -> np.ndarray:
+    return _worker_engine(spec).predict_matrix(X, columns=columns)
+
+
+# ============================================
+# EXECUTOR
+# ============================================
+
+class PredictionExecutor:
+    """Pool de prediction borne avec backpressure"""
+
+    def __init__(self, mode: str = "thread", workers: int = 4, max_queue: int = 64):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Mode d'execution inconnu: {mode}. Modes valides: {', '.join(EXECUTOR_MODES)}")
+
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.capacity = self.workers + self.max_queue
+
+        self._engine = None
+        self._token: Optional[Hashable] = None
+        self._specs: "OrderedDict[Hashable, ModelSpec]" = OrderedDict()
+        self._configured = 0
+        self._pool = None
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def configure(self, engine, model_path: Optional[Path] = None,
+                  feature_names: Optional[Sequence[str]] = None, token: Optional[Hashable] = None,
+                  model_stat: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Branche le moteur d'inference courant.
+
+        `token` identifie la version (bundle.token): en mode process, les
+        taches qui le portent sont calculees par cette version, chargee
+        depuis model_path par chaque worker qui ne l'a pas encore (le
+        fichier doit encore avoir la taille / mtime `model_stat`).
+        """
+        self._configured += 1
+        self._engine = engine
+        self._token = token if token is not None else ("configure", self._configured)
+
+        if self.mode == "thread" and self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="predict")
+
+        elif self.mode == "process":
+            if model_path is None:
+                raise ValueError("Le mode process necessite le chemin du modele")
+            spec = ModelSpec(self._token, str(model_path), tuple(feature_names or engine.feature_names), model_stat)
+            self._specs[self._token] = spec
+            while len(self._specs) > MODEL_SPECS_KEPT:
+                self._specs.popitem(last=False)
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(spec,),
+                )
+
+    def _spec(self, token: Optional[Hashable]) -> ModelSpec:
+        """Version a executer en mode process (celle de la requete, sinon la courante)"""
+        token = self._token if token is None else token
+        spec = self._specs.get(token)
+        if spec is None:
+            raise ModelVersionError("Version du modele de la requete plus disponible (rechargement)")
+        return spec
+
+    @property
+    def ready(self) -> bool:
+        return self._engine is not None
+
+    async def _submit(self, kind: str, token: Optional[Hashable], local_fn, worker_fn, *args):
+        if self._pending >= self.capacity:
+            self._rejected += 1
+            raise PredictionQueueFullError(
+                f"File de prediction saturee ({self._pending}/{self.capacity})"
+            )
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            if self.mode == "inline":
+                result, compute_s = _timed_call(local_fn, *args)
+            elif self.mode == "process":
+                spec = self._spec(token)
+                loop = asyncio.get_running_loop()
+                result, compute_s = await loop.run_in_executor(self._pool, _timed_call, worker_fn, spec, *args)
+            else:
+                loop = asyncio.get_running_loop()
+                result, compute_s = await loop.run_in_executor(self._pool, _timed_call, local_fn, *args)
+            self._completed += 1
+        finally:
+            self._pending -= 1
+
+        # Attente dans la file (+ transfert inter-processus) vs calcul du modele
+        total_s = time.perf_counter() - start
+        PREDICTION_STAGE_DURATION.observe(max(total_s - compute_s, 0.0), stage="queue_wait", kind=kind)
+        PREDICTION_STAGE_DURATION.observe(compute_s, stage="model_predict", kind=kind)
+        return result
+
+    async def predict_one(self, features: Dict[str, float], engine=None,
+                          token: Optional[Hashable] = None) -> float:
+        """
+        Prediction unitaire par la version du modele vue par la requete:
+        `engine` en mode inline/thread, `token` (bundle.token) en mode
+        process. ModelVersionError si cette version n'est plus disponible.
+        """
+        engine = engine or self._engine
+        return await self._submit("single", token, engine.predict_one, _worker_predict_one, features)
+
+    async def predict_matrix(self, X: np.ndarray, columns: Optional[Sequence[str]] = None,
+                             engine=None, token: Optional[Hashable] = None) -> np.ndarray:
+        engine = engine or self._engine
+        return await self._submit(
+            "batch",
+            token,
+            lambda X, columns: engine.predict_matrix(X, columns=columns),
+            _worker_predict_matrix,
+            X, columns
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,161 @@
+# Query Cache - Exact and near-duplicate result cache for RAG search
+"""
+Cache des resultats de recherche RAG, devant services/rag_fiscal.search():
+1. requete normalisee identique (minuscules, sans accents ni ponctuation):
+   ni embedding ni recherche FAISS
+2. requete quasi identique: similarite cosinus des embeddings au-dessus
+   du seuil, parmi les requetes en cache avec les memes parametres
+   (k, filtres, mode, seuils): l'embedding est calcule, pas la recherche.
+   Une cle lexicale, si fournie, doit aussi etre identique. En mode
+   hybrid c'est le classement BM25 (lignes) qui entre dans la fusion:
+   "article 33 GE" et "article 33 VD" sont proches en cosinus mais ne
+   remontent pas les memes chunks BM25, alors que deux formulations qui
+   les remontent donnent la meme fusion
+
+Taille bornee, eviction LRU. Chaque entree porte la version de l'index
+(ecrite par ml_training/index_faiss.py dans le store de chunks): le cache
+est vide des qu'une autre version est consultee.
+"""
+
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+_SEPARATORS_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_query(query: str) -> str:
+    """Forme canonique d'une requete pour la correspondance exacte"""
+    query = unicodedata.normalize("NFKD", query.lower()).encode("ascii", "ignore").decode("ascii")
+    return _SEPARATORS_RE.sub(" ", query).strip()
+
+
+@dataclass
+class _Entry:
+    vector: Optional[np.ndarray]   # embedding normalise, None si recherche sans vecteur (bm25)
+    results: List[Dict]
+    lexical: Optional[Hashable] = None   # cle lexicale requise pour une correspondance semantique
+
+
+class QueryCache:
+    """Cache LRU thread-safe: (parametres, requete normalisee) -> resultats"""
+
+    def __init__(self, max_entries: int = 1024, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.version: Optional[str] = None
+        self._entries: "OrderedDict[Tuple[Hashable, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version: str) -> None:
+        """Invalidation: une autre version de l'index rend toutes les entrees perimees"""
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    @staticmethod
+    def _copy(results: List[Dict]) -> List[Dict]:
+        return [dict(result) for result in results]
+
+    @staticmethod
+    def _unit(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _exact(self, version: str, key: Tuple[Hashable, str]) -> Optional[List[Dict]]:
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits["exact"] += 1
+            return self._copy(entry.results)
+
+    def _similar(self, version: str, params: Hashable, vector: np.ndarray,
+                 lexical: Optional[Hashable]) -> Optional[List[Dict]]:
+        with self._lock:
+            self._check_version(version)
+            candidates = [(key, entry) for key, entry in self._entries.items()
+                          if key[0] == params and entry.vector is not None and entry.lexical == lexical]
+            if not candidates:
+                return None
+            similarities = np.stack([entry.vector for _, entry in candidates]) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+            key, entry = candidates[best]
+            self._entries.move_to_end(key)
+            self.hits["semantic"] += 1
+            return self._copy(entry.results)
+
+    def lookup(self, version: str, params: Hashable, query: str, encode: Optional[Callable[[], np.ndarray]] = None,
+               lexical: Optional[Callable[[], Hashable]] = None
+               ) -> Tuple[Optional[List[Dict]], Optional[np.ndarray]]:
+        """
+        Resultats en cache pour la requete, et son embedding s'il a fallu le
+        calculer (encode, appele seulement apres un echec de la correspondance
+        exacte; None = pas de correspondance semantique). Avec `lexical`
+        (appele au meme moment), une correspondance semantique exige la meme
+        cle lexicale; put() recoit ensuite cette cle.
+
+        Returns:
+            (resultats ou None, embedding ou None)
+        """
+        results = self._exact(version, (params, normalize_query(query)))
+        if results is not None:
+            return results, None
+        if encode is None:
+            self.misses += 1
+            return None, None
+
+        vector = encode()
+        results = self._similar(version, params, self._unit(vector), lexical() if lexical is not None else None)
+        if results is None:
+            self.misses += 1
+        return results, vector
+
+    def put(self, version: str, params: Hashable, query: str, vector: Optional[np.ndarray],
+            results: List[Dict], lexical: Optional[Hashable] = None) -> None:
+        if not self.enabled:
+            return
+        if vector is not None:
+            vector = self._unit(vector)
+        key = (params, normalize_query(query))
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = _Entry(vector=vector, results=self._copy(results), lexical=lexical)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        hits = self.hits["exact"] + self.hits["semantic"]
+        requests = hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "version": self.version,
+            "exact_hits": self.hits["exact"],
+            "semantic_hits": self.hits["semantic"],
+            "misses": self.misses,
+            "hit_rate": round(hits / requests, 4) if requests else 0.0,
+        }
@@ -1 +1,550 @@
 # RAG Fiscal - Vector search for fiscal knowledge
+"""
+Service de recherche du RAG fiscal: index FAISS construit par
+ml_training/index_faiss.py, store de chunks (services/chunk_store.py)
+et modele d'embedding sentence-transformers.
+
+- L'index est ouvert en memory-map (config.RAG_INDEX_MMAP): plusieurs
+  workers uvicorn partagent les memes pages du cache OS.
+- Le texte des chunks est lu a la demande dans le store offset-indexe,
+  sans depickler la liste complete des chunks.
+- Le modele d'embedding est un singleton du processus, partage par
+  l'API, les sondes de sante et les scripts. Son backend (PyTorch, ONNX,
+  ONNX int8) est choisi par config.RAG_EMBEDDING_BACKEND.
+- Les embeddings des requetes deja vues sont relus dans le cache disque
+  (services/embedding_cache.py), partage avec l'indexeur.
+- Recherche hybride (config.RAG_SEARCH_MODE): le classement vectoriel et
+  le classement BM25 (services/bm25_index.py) sont fusionnes par
+  reciprocal-rank fusion, pour les termes exacts (IFI, articles, cantons).
+- Les embeddings sont normalises et l'index est en produit scalaire: le
+  score vectoriel est une similarite cosinus, seuillable
+  (config.RAG_MIN_SIMILARITY, config.RAG_MAX_SIMILARITY_GAP). Les anciens
+  index L2 restent lisibles, sans seuil.
+- Les resultats des requetes deja vues (meme requete normalisee, ou
+  embedding quasi identique: mode vector, ou hybrid avec le meme
+  classement BM25) sont servis par services/query_cache.py, invalide a
+  chaque nouvelle version de l'index.
+
+Les dependances lourdes (faiss, sentence_transformers) sont importees au
+chargement pour que l'API demarre meme sans elles (RAG indisponible).
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import config
+from services.bm25_index import BM25Index
+from services.chunk_store import ChunkStore, Filters
+from services.embedding_backend import cache_model_name, l2_normalize, load_embedder
+from services.embedding_cache import EmbeddingCache
+from services.query_cache import QueryCache
+
+logger = logging.getLogger(__name__)
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+# Index (MEME CHEMIN QUE ml_training/index_faiss.py)
+FAISS_INDEX_DIR = Path(__file__).parent.parent / "data" / "faiss_index"
+INDEX_PATH = FAISS_INDEX_DIR / "index.faiss"
+
+# Modele d'embedding (MEME QUE ml_training/index_faiss.py)
+EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# Cache disque des embeddings (MEME CHEMIN QUE ml_training/index_faiss.py)
+EMBEDDING_CACHE_DIR = Path(__file__).parent.parent / "data" / "embedding_cache"
+
+# Modeles ONNX exportes (MEME CHEMIN QUE ml_training/export_onnx_embedder.py)
+EMBEDDING_ONNX_DIR = Path(__file__).parent.parent / "data" / "embedding_onnx"
+
+# Filtres acceptes par search() (metadonnees de DOCUMENTS_META)
+FILTER_KEYS = ("canton", "doc_type", "language", "source")
+FILTER_STRATEGIES = ("prefilter", "postfilter")
+
+# Selecteurs FAISS memorises par combinaison de filtres
+SELECTOR_CACHE_SIZE = 128
+MAX_FILTERED_EF_SEARCH = 1024
+
+# Recherche hybride: candidats par classement (k * facteur) et constante RRF
+SEARCH_MODES = ("vector", "bm25", "hybrid")
+RRF_K = 60
+RRF_FETCH_FACTOR = 4
+
+_index = None
+_chunk_store: Optional[ChunkStore] = None
+_bm25: Optional[BM25Index] = None
+_embedding_model = None
+_embedding_lock = threading.Lock()
+_embedding_cache: Optional[EmbeddingCache] = None
+_selector_cache: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+_selector_lock = threading.Lock()
+_query_cache = QueryCache(config.RAG_QUERY_CACHE_SIZE, config.RAG_QUERY_CACHE_SIMILARITY)
+
+
+# ============================================
+# CHARGEMENT
+# ============================================
+
+def _read_index(path: Path):
+    """Lit l'index FAISS, en memory-map si possible"""
+    import faiss
+
+    if config.RAG_INDEX_MMAP:
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        # Les versions recentes de faiss mappent aussi les codes des index plats
+        flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        try:
+            return faiss.read_index(str(path), flags)
+        except RuntimeError as e:
+            logger.warning(f"[RAG] Memory-map impossible ({e}), lecture en memoire")
+
+    return faiss.read_index(str(path))
+
+
+def _load_bm25(store: ChunkStore) -> Optional[BM25Index]:
+    """Index BM25 aligne sur le store, None s'il est absent (index construit avant le BM25)"""
+    try:
+        bm25 = BM25Index(FAISS_INDEX_DIR)
+    except FileNotFoundError as e:
+        logger.warning(f"[RAG] {e}: recherche vectorielle seule")
+        return None
+    if len(bm25) != len(store):
+        logger.warning(f"[RAG] Index BM25 ({len(bm25)} chunks) et store ({len(store)}) desynchronises, BM25 ignore")
+        return None
+    return bm25
+
+
+def load_index():
+    """Charge l'index FAISS, le store de chunks et l'index BM25 (leve une exception si FAISS ou le store manquent)"""
+    global _index, _chunk_store, _bm25
+
+    if not INDEX_PATH.exists():
+        raise FileNotFoundError(f"Index FAISS introuvable: {INDEX_PATH}")
+
+    index = _read_index(INDEX_PATH)
+    store = ChunkStore(FAISS_INDEX_DIR)
+    if index.ntotal != len(store):
+        raise ValueError(f"Index FAISS ({index.ntotal} vecteurs) et store ({len(store)} chunks) desynchronises")
+
+    _index, _chunk_store, _bm25 = index, store, _load_bm25(store)
+    with _selector_lock:
+        _selector_cache.clear()
+    _query_cache.clear()
+    print(f"[RAG] Index FAISS charge: {index.ntotal} vecteurs (BM25: {'oui' if _bm25 else 'non'})")
+    return _index
+
+
+def load_embedding_model():
+    """Charge le modele d'embedding avec le backend configure (une fois par processus)"""
+    global _embedding_model
+
+    with _embedding_lock:
+        if _embedding_model is None:
+            _embedding_model = load_embedder(config.RAG_EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_ONNX_DIR)
+            print(f"[RAG] Modele d'embedding charge: {EMBEDDING_MODEL} ({_embedding_model.backend})")
+    return _embedding_model
+
+
+def get_index():
+    return _index
+
+
+def get_chunk_store() -> Optional[ChunkStore]:
+    return _chunk_store
+
+
+def get_bm25() -> Optional[BM25Index]:
+    return _bm25
+
+
+def get_embedding_model():
+    return _embedding_model
+
+
+# ============================================
+# RECHERCHE
+# ============================================
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _embedding_cache
+    with _embedding_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(
+                EMBEDDING_CACHE_DIR,
+                cache_model_name(EMBEDDING_MODEL, config.RAG_EMBEDDING_BACKEND),
+                max_rows=config.RAG_EMBEDDING_CACHE_MAX_ROWS,
+            )
+    return _embedding_cache
+
+
+def _encode_texts(texts: List[str]) -> np.ndarray:
+    model = _embedding_model or load_embedding_model()
+    return model.encode(texts)
+
+
+def encode_query(query: str) -> np.ndarray:
+    """Embedding (1, d) float32 de la requete (cache disque, puis modele)"""
+    return get_embedding_cache().encode([query], _encode_texts)
+
+
+def embedding_cache_stats() -> Dict:
+    return get_embedding_cache().stats()
+
+
+def get_query_cache() -> QueryCache:
+    return _query_cache
+
+
+def query_cache_stats() -> Dict:
+    return _query_cache.stats()
+
+
+def _validate_filters(filters: Optional[Filters]) -> Optional[Filters]:
+    if not filters:
+        return None
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Filtres inconnus: {', '.join(sorted(unknown))}. Filtres valides: {', '.join(FILTER_KEYS)}")
+    return filters
+
+
+def _filters_key(filters: Filters) -> Tuple:
+    return tuple(sorted(
+        (key, (value,) if isinstance(value, str) else tuple(sorted(value)))
+        for key, value in filters.items()
+    ))
+
+
+def _id_selector(store: ChunkStore, filters: Filters) -> Tuple[object, int]:
+    """
+    Selecteur FAISS (bitmap des lignes autorisees) et nombre de lignes
+    autorisees, memorises par combinaison de filtres.
+    """
+    import faiss
+
+    # Le store fait partie de la cle: un rechargement ne reutilise jamais un bitmap perime
+    key = (id(store), _filters_key(filters))
+    with _selector_lock:
+        cached = _selector_cache.get(key)
+        if cached is not None:
+            _selector_cache.move_to_end(key)
+            return cached[0], cached[2]
+
+    mask = store.row_mask(filters)
+    if store.ids_are_labels:
+        # Labels md5 (48 bits): ensemble d'ids, traduit par l'IndexIDMap2
+        ids = store.ids_for_rows(mask)
+        selector = faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids))
+        cached = (selector, ids, len(ids))
+    else:
+        bitmap = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        # Le bitmap est garde en vie avec le selecteur (faiss ne le copie pas)
+        cached = (selector, bitmap, int(mask.sum()))
+
+    with _selector_lock:
+        _selector_cache[key] = cached
+        if len(_selector_cache) > SELECTOR_CACHE_SIZE:
+            _selector_cache.popitem(last=False)
+    return cached[0], cached[2]
+
+
+def _search_params(index, selector, k: int, n_allowed: int):
+    """
+    Parametres de recherche avec pre-filtrage. Plus le filtre est selectif,
+    plus nprobe (IVF) / efSearch (HNSW) sont elargis pour trouver k voisins
+    autorises.
+    """
+    import faiss
+
+    widen = index.ntotal / max(n_allowed, 1)
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        nprobe = min(ivf.nlist, int(np.ceil(ivf.nprobe * widen)))
+        return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+
+    inner = faiss.downcast_index(index.index) if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)) else index
+    hnsw = getattr(inner, "hnsw", None)
+    if hnsw is not None:
+        ef_search = min(MAX_FILTERED_EF_SEARCH, max(hnsw.efSearch, int(k * widen)))
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+
+    return faiss.SearchParameters(sel=selector)
+
+
+def is_cosine_index(index) -> bool:
+    """Index en produit scalaire sur embeddings normalises (score = similarite cosinus)"""
+    import faiss
+
+    return index.metric_type == faiss.METRIC_INNER_PRODUCT
+
+
+def _hits(store: ChunkStore, ids: np.ndarray, distances: np.ndarray) -> List[Tuple[int, float]]:
+    """Ids FAISS -> (ligne du store, score FAISS), ids absents (-1) ignores"""
+    rows = store.rows_for_ids(ids[0])
+    return [(int(row), float(distance)) for row, distance in zip(rows, distances[0]) if row >= 0]
+
+
+def _resources():
+    """Index FAISS, store et BM25 d'un meme chargement, meme si un rechargement a lieu en parallele"""
+    index, store, bm25 = _index, _chunk_store, _bm25
+    if index is None or store is None:
+        load_index()
+        index, store, bm25 = _index, _chunk_store, _bm25
+    return index, store, bm25
+
+
+def _search_rows(query_vector: np.ndarray, k: int, filters: Optional[Filters],
+                 strategy: Optional[str]) -> Tuple[Optional[ChunkStore], List[Tuple[int, float]]]:
+    index, store, _ = _resources()
+    return store, _search_index(index, store, query_vector, k, filters, strategy)
+
+
+def search_vector(query_vector: np.ndarray, k: int = 4, filters: Optional[Filters] = None,
+                  strategy: Optional[str] = None) -> List[Tuple[int, float]]:
+    """
+    Recherche par embedding: liste de (ligne du store, score FAISS), du plus
+    proche au plus lointain (similarite cosinus sur un index normalise,
+    distance L2 sur un ancien index).
+
+    strategy (defaut config.RAG_FILTER_STRATEGY):
+    - prefilter  : seuls les vecteurs autorises sont compares (IDSelector FAISS)
+    - postfilter : recherche globale puis filtrage, elargie tant qu'il manque des resultats
+    """
+    return _search_rows(query_vector, k, filters, strategy)[1]
+
+
+def _search_index(index, store: ChunkStore, query_vector: np.ndarray, k: int,
+                  filters: Optional[Filters], strategy: Optional[str]) -> List[Tuple[int, float]]:
+    strategy = strategy or config.RAG_FILTER_STRATEGY
+    if strategy not in FILTER_STRATEGIES:
+        raise ValueError(f"Strategie de filtrage inconnue: {strategy}. Valides: {', '.join(FILTER_STRATEGIES)}")
+
+    filters = _validate_filters(filters)
+    if k <= 0 or index.ntotal == 0:
+        return []
+
+    query_vector = np.ascontiguousarray(query_vector, dtype=np.float32).reshape(1, -1)
+    if is_cosine_index(index):
+        query_vector = l2_normalize(query_vector)
+
+    if filters is None:
+        distances, ids = index.search(query_vector, min(k, index.ntotal))
+        return _hits(store, ids, distances)
+
+    if strategy == "prefilter":
+        selector, n_allowed = _id_selector(store, filters)
+        if n_allowed == 0:
+            return []
+        distances, ids = index.search(
+            query_vector, min(k, n_allowed), params=_search_params(index, selector, k, n_allowed)
+        )
+        return _hits(store, ids, distances)
+
+    allowed = store.row_mask(filters)
+    if not allowed.any():
+        return []
+
+    fetch = min(k * 4, index.ntotal)
+    while True:
+        distances, ids = index.search(query_vector, fetch)
+        hits = [(row, distance) for row, distance in _hits(store, ids, distances) if allowed[row]]
+        if len(hits) >= k or fetch >= index.ntotal:
+            return hits[:k]
+        fetch = min(fetch * 4, index.ntotal)
+
+
+def _search_bm25(store: ChunkStore, bm25: BM25Index, query: str, k: int,
+                 filters: Optional[Filters]) -> List[Tuple[int, float]]:
+    filters = _validate_filters(filters)
+    return bm25.search(query, k, store.row_mask(filters) if filters else None)
+
+
+def fuse_rrf(rankings: List[List[int]], k: int) -> List[Tuple[int, float]]:
+    """
+    Reciprocal-rank fusion: score(ligne) = somme sur les classements de
+    1 / (RRF_K + rang). Rend les k meilleures lignes (ligne, score).
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            scores[row] = scores.get(row, 0.0) + 1.0 / (RRF_K + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def cutoff(hits: List[Tuple[int, float]], min_similarity: float, max_gap: float) -> List[Tuple[int, float]]:
+    """
+    Coupe un classement par similarite cosinus decroissante: arret au
+    premier resultat sous min_similarity ou a plus de max_gap du meilleur
+    (0 = pas d'ecart maximal). Peut rendre moins de k resultats, voire aucun.
+    """
+    if not hits:
+        return hits
+    floor = min_similarity
+    if max_gap > 0:
+        floor = max(floor, hits[0][1] - max_gap)
+    kept = []
+    for row, similarity in hits:
+        if similarity < floor:
+            break
+        kept.append((row, similarity))
+    return kept
+
+
+def search_rows(query: str, query_vector: Optional[np.ndarray], k: int = 4, filters: Optional[Filters] = None,
+                mode: Optional[str] = None, min_similarity: Optional[float] = None,
+                max_gap: Optional[float] = None, bm25_hits: Optional[List[Tuple[int, float]]] = None
+                ) -> Tuple[ChunkStore, List[Tuple[int, Dict[str, float]]]]:
+    """
+    Classement selon le mode (defaut config.RAG_SEARCH_MODE):
+    - vector : score FAISS seul
+    - bm25   : score BM25 seul
+    - hybrid : fusion RRF des deux classements (k * RRF_FETCH_FACTOR candidats chacun)
+
+    Sur un index normalise, les candidats vectoriels sous le seuil de
+    similarite (defauts config.RAG_MIN_SIMILARITY / RAG_MAX_SIMILARITY_GAP)
+    sont ecartes, y compris du classement BM25 du mode hybrid. Les resultats
+    purement lexicaux (termes exacts, hors candidats vectoriels) sont gardes.
+    bm25_hits: classement BM25 du mode hybrid deja calcule (k * RRF_FETCH_FACTOR)
+
+    Returns:
+        (store, [(ligne, {"score", "similarity", "bm25", "fusion"})]), scores absents = None
+    """
+    mode = mode or config.RAG_SEARCH_MODE
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Mode de recherche inconnu: {mode}. Valides: {', '.join(SEARCH_MODES)}")
+    min_similarity = config.RAG_MIN_SIMILARITY if min_similarity is None else min_similarity
+    max_gap = config.RAG_MAX_SIMILARITY_GAP if max_gap is None else max_gap
+
+    index, store, bm25 = _resources()
+    if bm25 is None and mode != "vector":
+        if mode == "bm25":
+            raise FileNotFoundError("Index BM25 absent (relancer ml_training/index_faiss.py)")
+        mode = "vector"
+
+    if mode == "bm25":
+        hits = _search_bm25(store, bm25, query, k, filters)
+        return store, [(row, {"score": None, "similarity": None, "bm25": s, "fusion": None}) for row, s in hits]
+
+    cosine = is_cosine_index(index)
+    fetch = k if mode == "vector" else k * RRF_FETCH_FACTOR
+    candidates = _search_index(index, store, query_vector, fetch, filters, None)
+    vector_hits = cutoff(candidates, min_similarity, max_gap) if cosine else candidates
+    scores = dict(vector_hits)
+    # Candidats vectoriels coupes: leur similarite est connue et insuffisante
+    rejected = {row for row, _ in candidates} - set(scores)
+
+    def vector_scores(row: int) -> Dict[str, float]:
+        score = scores.get(row)
+        return {"score": score, "similarity": score if cosine else None, "bm25": None, "fusion": None}
+
+    if mode == "vector":
+        return store, [(row, vector_scores(row)) for row, _ in vector_hits]
+
+    if bm25_hits is None:
+        bm25_hits = _search_bm25(store, bm25, query, fetch, filters)
+    bm25_hits = [(row, score) for row, score in bm25_hits if row not in rejected]
+    bm25_scores = dict(bm25_hits)
+    fused = fuse_rrf([[row for row, _ in vector_hits], [row for row, _ in bm25_hits]], k)
+    return store, [
+        (row, {**vector_scores(row), "bm25": bm25_scores.get(row), "fusion": fusion})
+        for row, fusion in fused
+    ]
+
+
+def _index_version(store: ChunkStore) -> str:
+    """Version ecrite par index_faiss.py; a defaut (ancien store), identite du store charge"""
+    return store.index_version or f"store-{id(store)}"
+
+
+def _relevance(scores: Dict[str, float]) -> float:
+    """
+    Pertinence 0-100: similarite cosinus si connue, sinon rang fusionne
+    (100 = premier des deux classements), sinon ancienne heuristique L2.
+    """
+    if scores["similarity"] is not None:
+        return max(0.0, scores["similarity"]) * 100
+    if scores["fusion"] is not None:
+        return min(100.0, scores["fusion"] * (RRF_K + 1) / 2 * 100)
+    if scores["score"] is not None:
+        return max(0.0, (20 - scores["score"]) / 20 * 100)
+    return 0.0
+
+
+def _format_result(store: ChunkStore, row: int, scores: Dict[str, float]) -> Dict:
+    meta = store.metadata(row)
+    return {
+        "id": store.chunk_ids[row],
+        "content": store.text(row),
+        "source": meta.get("source", "Inconnu"),
+        "canton": meta.get("canton", "N/A"),
+        "type": meta.get("doc_type", "Autre"),
+        "language": meta.get("language"),
+        "score": scores["score"],
+        "similarity": scores["similarity"],
+        "bm25": scores["bm25"],
+        "fusion": scores["fusion"],
+        "relevance": _relevance(scores),
+    }
+
+
+def search(query: str, k: int = 4, filters: Optional[Filters] = None, mode: Optional[str] = None,
+           min_similarity: Optional[float] = None, max_gap: Optional[float] = None) -> List[Dict]:
+    """
+    Recherche les k chunks les plus pertinents pour la requete.
+
+    Args:
+        query: question en langage naturel
+        k: nombre de resultats
+        filters: ex. {"canton": "GE"} ou {"canton": ["GE", "VD"], "doc_type": "comparatif"}
+                 (pre-filtrage: seuls les chunks correspondants sont compares)
+        mode: vector, bm25 ou hybrid (defaut config.RAG_SEARCH_MODE)
+        min_similarity: similarite cosinus minimale (defaut config.RAG_MIN_SIMILARITY)
+        max_gap: ecart maximal au meilleur resultat, 0 = aucun (defaut config.RAG_MAX_SIMILARITY_GAP)
+
+    Returns:
+        Liste de dicts (id, content, source, canton, type, language, score, similarity, bm25,
+        fusion, relevance), du plus pertinent au moins pertinent; moins de k si rien n'est pertinent
+    """
+    mode = mode or config.RAG_SEARCH_MODE
+
+    # Cle du cache: tout ce qui change les resultats, hors requete
+    params = (
+        k,
+        _filters_key(_validate_filters(filters)) if filters else None,
+        mode,
+        config.RAG_MIN_SIMILARITY if min_similarity is None else min_similarity,
+        config.RAG_MAX_SIMILARITY_GAP if max_gap is None else max_gap,
+        config.RAG_FILTER_STRATEGY,
+    )
+    _, store, bm25 = _resources()
+    encode = (lambda: encode_query(query)) if mode in ("vector", "hybrid") else None
+
+    # Correspondance semantique (requete quasi identique) en mode hybrid: meme
+    # classement BM25, calcule apres un echec exact et reutilise par la recherche
+    bm25_hits: Optional[List[Tuple[int, float]]] = None
+
+    def bm25_ranking():
+        nonlocal bm25_hits
+        bm25_hits = _search_bm25(store, bm25, query, k * RRF_FETCH_FACTOR, filters)
+        return tuple(row for row, _ in bm25_hits)
+
+    lexical = bm25_ranking if mode == "hybrid" and bm25 is not None else None
+
+    # Embedding calcule par le cache apres un echec de la correspondance exacte
+    results, query_vector = _query_cache.lookup(_index_version(store), params, query, encode, lexical)
+    if results is not None:
+        return results
+
+    store, hits = search_rows(query, query_vector, k, filters, mode, min_similarity, max_gap, bm25_hits)
+    results = [_format_result(store, row, scores) for row, scores in hits]
+    lexical_key = tuple(row for row, _ in bm25_hits) if bm25_hits is not None else None
+    _query_cache.put(_index_version(store), params, query, query_vector, results, lexical_key)
+    return results
@@ -1 +1,115 @@
 # Real Estate Predictor - ML rent prediction
+"""
+Moteurs d'inference du modele de loyers (immo_ch_model.pkl).
+
+- BoosterEngine : appelle directement le booster XGBoost natif sur un
+  buffer float32 preallouee (un par thread), sans DataFrame pandas.
+- PandasEngine  : chemin historique (DataFrame + wrapper scikit-learn),
+  utilise pour les modeles non-XGBoost (Random Forest, Ridge, ...).
+
+Les deux moteurs exposent la meme interface:
+    predict_one(features: dict) -> float
+    predict_matrix(X: np.ndarray, columns: list) -> np.ndarray
+"""
+
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def _reorder_columns(X: np.ndarray, columns: Optional[Sequence[str]], feature_names: List[str]) -> np.ndarray:
+    """Remet les colonnes de X dans l'ordre attendu par le modele"""
+    if columns is None or list(columns) == feature_names:
+        return X
+    positions = [list(columns).index(name) for name in feature_names]
+    return X[:, positions]
+
+
+class BoosterEngine:
+    """Inference via le booster XGBoost natif (inplace_predict sur float32)"""
+
+    name = "xgboost-booster"
+
+    def __init__(self, booster, feature_names: Sequence[str], iteration_range=(0, 0)):
+        self.booster = booster
+        self.feature_names = list(feature_names)
+        self.iteration_range = iteration_range
+        self._local = threading.local()
+
+        # Verifier une fois pour toutes l'ordre des features du booster:
+        # on peut ensuite desactiver la validation a chaque prediction
+        booster_names = booster.feature_names
+        if booster_names is not None and list(booster_names) != self.feature_names:
+            raise ValueError(
+                f"Ordre des features incompatible avec le booster: "
+                f"{list(booster_names)} != {self.feature_names}"
+            )
+
+    def _buffer(self) -> np.ndarray:
+        """Buffer (1, n_features) float32 preallouee, propre a chaque thread"""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = np.empty((1, len(self.feature_names)), dtype=np.float32)
+            self._local.buffer = buffer
+        return buffer
+
+    def predict_one(self, features: Dict[str, float]) -> float:
+        buffer = self._buffer()
+        row = buffer[0]
+        for i, name in enumerate(self.feature_names):
+            row[i] = features[name]
+
+        prediction = self.booster.inplace_predict(
+            buffer,
+            iteration_range=self.iteration_range,
+            validate_features=False
+        )
+        return float(prediction[0])
+
+    def predict_matrix(self, X: np.ndarray, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        X = _reorder_columns(X, columns, self.feature_names)
+        return self.booster.inplace_predict(
+            np.ascontiguousarray(X, dtype=np.float32),
+            iteration_range=self.iteration_range,
+            validate_features=False
+        )
+
+
+class PandasEngine:
+    """Inference via le wrapper scikit-learn (DataFrame pandas)"""
+
+    name = "sklearn-pandas"
+
+    def __init__(self, model, feature_names: Sequence[str]):
+        self.model = model
+        self.feature_names = list(feature_names)
+
+    def predict_one(self, features: Dict[str, float]) -> float:
+        df = pd.DataFrame([features], columns=self.feature_names)
+        return float(self.model.predict(df)[0])
+
+    def predict_matrix(self, X: np.ndarray, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        X = _reorder_columns(X, columns, self.feature_names)
+        return self.model.predict(pd.DataFrame(X, columns=self.feature_names))
+
+
+def create_engine(model, feature_names: Sequence[str]):
+    """
+    Choisit le moteur d'inference adapte au modele charge.
+
+    Un XGBRegressor est servi par son booster natif; tout autre estimateur
+    scikit-learn (le "meilleur modele" de train_immo_ch.py peut etre un
+    Random Forest) retombe sur le chemin pandas.
+    """
+
+    if hasattr(model, 'get_booster'):
+        try:
+            best_iteration = model.best_iteration
+        except AttributeError:
+            best_iteration = None
+        iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+        return BoosterEngine(model.get_booster(), feature_names, iteration_range)
+
+    return PandasEngine(model, feature_names)
@@ -0,0 +1,368 @@
+# Rent Features - Shared feature engineering for the rent model
+"""
+Les 18 features du modele de loyers, calculees par le meme code a
+l'entrainement (ml_training/train_immo_ch.py) et en production
+(predict_rent_router.py, ml_training/predict_price.py).
+
+RentFeatureTransformer:
+- fit(): etat appris sur le dataset d'entrainement: codes des villes et des
+  types de bien (ordre de LabelEncoder), medianes des pieces par ville et
+  taille de surface, mediane globale
+- transform(): matrice (n, 18) dans l'ordre de FEATURE_NAMES, operations
+  NumPy sur des colonnes (aucun apply ligne a ligne): lots, entrainement
+- transform_one(): un seul bien en Python scalaire (acces dict, math), memes
+  valeurs que transform() pour le chemin de prediction unitaire de l'API
+- save() / load(): etat JSON ecrit a cote du modele (FEATURE_STATE_FILENAME)
+
+Pieces manquantes: mediane (ville, taille) apprise, sinon mediane globale,
+a l'entrainement comme en production. legacy() reproduit l'ancien
+comportement du router (max(1, surface / 25)) pour les modeles entraines
+avant l'etat de features.
+"""
+
+import bisect
+import json
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+FEATURE_STATE_FILENAME = "immo_ch_feature_state.json"
+FEATURE_STATE_VERSION = 1
+
+# Ordre des 18 features attendu par le modele (cf. immo_ch_features.txt)
+FEATURE_NAMES = [
+    'latitude', 'longitude', 'distance_centre', 'ville_encoded',
+    'surface', 'surface_log', 'surface_squared',
+    'pieces_filled', 'pieces_unknown',
+    'etage_filled', 'etage_unknown', 'is_ground_floor', 'is_high_floor',
+    'type_bien_encoded',
+    'has_parking_int', 'has_lift_int',
+    'surface_ville', 'surface_distance',
+]
+
+# Centres-villes (noms du dataset: preprocess.normalize_city)
+CITY_CENTERS = {
+    'Genève': (46.2044, 6.1432),
+    'Zürich': (47.3769, 8.5417),
+    'Lausanne': (46.5197, 6.6323),
+    'Basel': (47.5596, 7.5886),
+}
+
+_CENTER_INDEX = {city: i for i, city in enumerate(CITY_CENTERS)}
+# Derniere ligne: ville hors CITY_CENTERS
+_CENTERS = np.array(list(CITY_CENTERS.values()) + [(np.nan, np.nan)], dtype=np.float64)
+
+# Variantes FR/DE/EN -> nom du dataset
+CITY_ALIASES = {
+    'geneve': 'Genève', 'genève': 'Genève', 'geneva': 'Genève', 'genf': 'Genève',
+    'lausanne': 'Lausanne',
+    'zurich': 'Zürich', 'zürich': 'Zürich',
+    'basel': 'Basel', 'bale': 'Basel', 'bâle': 'Basel', 'basle': 'Basel',
+}
+
+# Conversion approximative degres -> km (latitude, longitude en Suisse)
+KM_PER_DEGREE_LAT = 111
+KM_PER_DEGREE_LON = 85
+
+# Tailles de surface (MEME DECOUPAGE QUE categorie_taille dans preprocess.filter_and_validate)
+SIZE_BINS = [0, 30, 80, 150, 300, 600, 10000]
+
+HIGH_FLOOR = 5        # etage eleve a partir du 5e
+UNKNOWN_FLOOR = -1    # etage inconnu: ni RDC ni etage eleve
+
+# Etat des modeles entraines avant l'etat de features (encodage de l'ancien router)
+LEGACY_CITY_CODES = {'Basel': 0, 'Centre': 1, 'Genève': 2, 'Lausanne': 3, 'Zürich': 4}
+LEGACY_TYPE_CODES = {'Bureau': 0, 'Commercial': 1}
+LEGACY_SURFACE_PER_PIECE = 25
+
+
+def canonical_city(city: str) -> Optional[str]:
+    """Nom du dataset d'une ville supportee (Genève, Zürich, Lausanne, Basel), None sinon"""
+    return CITY_ALIASES.get(str(city).lower().strip())
+
+
+def _floats(values, n: int) -> np.ndarray:
+    """Colonne float64 (None / NaN -> NaN; None pour toute la colonne -> NaN)"""
+    if values is None:
+        return np.full(n, np.nan)
+    if hasattr(values, 'to_numpy'):
+        # Series pandas (types nullables: pd.NA)
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return values.astype(np.float64, copy=False).reshape(-1)
+
+
+def _flags(values, n: int) -> np.ndarray:
+    """Booleens manquants -> 0 (fillna(False))"""
+    if values is None:
+        return np.zeros(n)
+    if hasattr(values, 'to_numpy'):
+        return values.to_numpy(dtype=bool, na_value=False).astype(np.float64)
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = np.array([v is not None and v == v and bool(v) for v in values])
+    return values.astype(bool).astype(np.float64)
+
+
+def _codes(values, codes: Dict[str, Any], n: int, default: Any = np.nan) -> np.ndarray:
+    """Valeurs apprises par cle (default pour une cle inconnue ou manquante)"""
+    mapped = np.full(n, default, dtype=np.float64)
+    if values is None:
+        return mapped
+    values = np.asarray(values, dtype=object).reshape(-1)
+    # Une comparaison vectorisee par cle apprise (quelques villes / types);
+    # un bien seul passe par transform_one (acces dict)
+    for key, code in codes.items():
+        mapped[values == key] = code
+    return mapped
+
+
+def size_bins(surface: np.ndarray) -> np.ndarray:
+    """Taille de surface 1..6 (intervalles ]a, b] comme pd.cut), 0 hors bornes ou NaN"""
+    bins = np.searchsorted(SIZE_BINS, surface, side='left')
+    return np.where((bins >= 1) & (bins < len(SIZE_BINS)), bins, 0)
+
+
+def _float(value) -> float:
+    """Scalaire float (None -> NaN), comme _floats"""
+    return math.nan if value is None else float(value)
+
+
+def _flag(value) -> float:
+    """Booleen manquant (None / NaN) -> 0, comme _flags"""
+    return float(value is not None and value == value and bool(value))
+
+
+def _size_bin(surface: float) -> int:
+    """size_bins pour un scalaire (NaN -> 0)"""
+    size = bisect.bisect_left(SIZE_BINS, surface)
+    return size if 1 <= size < len(SIZE_BINS) else 0
+
+
+class RentFeatureTransformer:
+    """Etat appris + calcul vectorise des 18 features"""
+
+    def __init__(self, city_codes: Dict[str, int], type_codes: Dict[str, int],
+                 pieces_medians: Optional[Dict[str, Dict[int, float]]] = None,
+                 pieces_median: Optional[float] = None, fitted_rows: int = 0):
+        self.city_codes = dict(city_codes)
+        self.type_codes = dict(type_codes)
+        self.pieces_medians = {city: {int(k): float(v) for k, v in medians.items()}
+                               for city, medians in (pieces_medians or {}).items()}
+        self.pieces_median = pieces_median
+        self.fitted_rows = fitted_rows
+
+    @classmethod
+    def legacy(cls) -> "RentFeatureTransformer":
+        """Etat par defaut, sans fichier d'etat (pieces: max(1, surface / 25))"""
+        return cls(LEGACY_CITY_CODES, LEGACY_TYPE_CODES)
+
+    # ============================================
+    # APPRENTISSAGE
+    # ============================================
+
+    @classmethod
+    def fit(cls, city: Iterable[str], surface, pieces, bien_type: Iterable[str]) -> "RentFeatureTransformer":
+        """
+        Apprend l'etat sur le dataset d'entrainement
+
+        Codes: rang de la valeur triee (MEME ENCODAGE QUE LabelEncoder).
+        Medianes des pieces connues par (ville, taille de surface), groupes
+        sans aucune piece connue ignores (mediane globale a la place).
+        """
+        city = np.asarray(city, dtype=object)
+        n = len(city)
+        surface = _floats(surface, n)
+        pieces = _floats(pieces, n)
+
+        city_codes = {c: i for i, c in enumerate(sorted(set(city.tolist())))}
+        type_codes = {t: i for i, t in enumerate(sorted(set(np.asarray(bien_type, dtype=object).tolist())))}
+
+        # Groupe (ville, taille) en un entier: code ville * nb tailles + taille
+        sizes = size_bins(surface)
+        city_index = _codes(city, city_codes, n)
+        known = ~np.isnan(pieces) & (sizes > 0) & ~np.isnan(city_index)
+        medians: Dict[str, Dict[int, float]] = {}
+        if known.any():
+            keys = city_index[known].astype(np.int64) * len(SIZE_BINS) + sizes[known]
+            uniques, inverse = np.unique(keys, return_inverse=True)
+            order = np.argsort(inverse, kind='stable')
+            groups = np.split(pieces[known][order], np.cumsum(np.bincount(inverse))[:-1])
+            cities = list(city_codes)
+            for key, values in zip(uniques.tolist(), groups):
+                group_city, size = cities[key // len(SIZE_BINS)], key % len(SIZE_BINS)
+                medians.setdefault(group_city, {})[size] = float(np.median(values))
+
+        pieces_median = float(np.nanmedian(pieces)) if (~np.isnan(pieces)).any() else None
+        return cls(city_codes, type_codes, medians, pieces_median, fitted_rows=n)
+
+    # ============================================
+    # TRANSFORMATION
+    # ============================================
+
+    def _pieces_fallback(self, city: np.ndarray, surface: np.ndarray) -> np.ndarray:
+        """Pieces estimees: mediane (ville, taille), sinon mediane globale"""
+        if self.pieces_median is None:
+            return np.maximum(1, surface / LEGACY_SURFACE_PER_PIECE)
+        fallback = np.full(len(surface), self.pieces_median)
+        sizes = size_bins(surface)
+        for group_city, medians in self.pieces_medians.items():
+            in_city = city == group_city
+            if not in_city.any():
+                continue
+            for size, median in medians.items():
+                fallback[in_city & (sizes == size)] = median
+        return fallback
+
+    def transform(self, city, surface, latitude=None, longitude=None, pieces=None, etage=None,
+                  bien_type=None, has_parking=None, has_lift=None) -> np.ndarray:
+        """
+        Matrice (n, 18) float64 dans l'ordre de FEATURE_NAMES
+
+        Args:
+            city: noms du dataset (canonical_city pour une saisie utilisateur)
+            latitude / longitude: centre-ville si manquantes
+            pieces / etage: NaN ou None = inconnu
+            bien_type: 'Bureau' / 'Commercial'
+
+        Une ville hors CITY_CENTERS donne distance_centre NaN, une ville ou
+        un type inconnus de l'etat un code NaN: a l'appelant de les rejeter.
+        """
+        city = np.asarray(city, dtype=object).reshape(-1)
+        n = len(city)
+        surface = _floats(surface, n)
+
+        # Coordonnees (defaut = centre-ville) et distance du centre
+        center_lat, center_lon = _CENTERS[_codes(city, _CENTER_INDEX, n, default=len(CITY_CENTERS)).astype(np.intp)].T
+        lat = _floats(latitude, n)
+        lon = _floats(longitude, n)
+        lat = np.where(np.isnan(lat), center_lat, lat)
+        lon = np.where(np.isnan(lon), center_lon, lon)
+        distance_centre = np.sqrt(((lat - center_lat) * KM_PER_DEGREE_LAT) ** 2
+                                  + ((lon - center_lon) * KM_PER_DEGREE_LON) ** 2)
+
+        ville_encoded = _codes(city, self.city_codes, n)
+
+        # Pieces (mediane apprise si inconnu)
+        pieces = _floats(pieces, n)
+        pieces_unknown = np.isnan(pieces)
+        pieces_filled = np.where(pieces_unknown, self._pieces_fallback(city, surface), pieces)
+
+        # Etage
+        etage = _floats(etage, n)
+        etage_unknown = np.isnan(etage)
+        etage_filled = np.where(etage_unknown, UNKNOWN_FLOOR, etage)
+
+        columns = (
+            lat, lon, distance_centre, ville_encoded,
+            surface, np.log1p(surface), surface ** 2,
+            pieces_filled, pieces_unknown,
+            etage_filled, etage_unknown, etage_filled == 0, etage_filled >= HIGH_FLOOR,
+            _codes(bien_type, self.type_codes, n),
+            _flags(has_parking, n), _flags(has_lift, n),
+            # Interactions (SANS data leakage - pas de prix_m2)
+            surface * ville_encoded, surface * distance_centre,
+        )
+        # Matrice preallouee (column_stack couteux sur une seule ligne)
+        matrix = np.empty((n, len(FEATURE_NAMES)), dtype=np.float64)
+        for i, values in enumerate(columns):
+            matrix[:, i] = values
+        return matrix
+
+    def transform_one(self, city, surface, latitude=None, longitude=None, pieces=None, etage=None,
+                      bien_type=None, has_parking=None, has_lift=None) -> Dict[str, float]:
+        """
+        Features d'un bien (dict nom -> valeur), memes valeurs que transform
+
+        Version scalaire pour la prediction unitaire: acces dict et math, sans
+        construire de tableaux NumPy pour une seule ligne.
+        """
+        surface = _float(surface)
+
+        # Coordonnees (defaut = centre-ville) et distance du centre
+        center_lat, center_lon = CITY_CENTERS.get(city, (math.nan, math.nan))
+        lat, lon = _float(latitude), _float(longitude)
+        lat = center_lat if math.isnan(lat) else lat
+        lon = center_lon if math.isnan(lon) else lon
+        d_lat = (lat - center_lat) * KM_PER_DEGREE_LAT
+        d_lon = (lon - center_lon) * KM_PER_DEGREE_LON
+        distance_centre = math.sqrt(d_lat * d_lat + d_lon * d_lon)
+
+        ville_encoded = float(self.city_codes.get(city, math.nan))
+
+        # Pieces (mediane apprise si inconnu)
+        pieces = _float(pieces)
+        pieces_unknown = math.isnan(pieces)
+        if not pieces_unknown:
+            pieces_filled = pieces
+        elif self.pieces_median is None:
+            per_piece = surface / LEGACY_SURFACE_PER_PIECE
+            pieces_filled = per_piece if math.isnan(per_piece) else max(1.0, per_piece)
+        else:
+            pieces_filled = self.pieces_medians.get(city, {}).get(_size_bin(surface), self.pieces_median)
+
+        # Etage
+        etage = _float(etage)
+        etage_unknown = math.isnan(etage)
+        etage_filled = UNKNOWN_FLOOR if etage_unknown else etage
+
+        # np.log1p: math.log1p peut differer d'un ulp de la boucle NumPy de transform
+        values = (
+            lat, lon, distance_centre, ville_encoded,
+            surface, np.log1p(surface), surface * surface,
+            pieces_filled, pieces_unknown,
+            etage_filled, etage_unknown, etage_filled == 0, etage_filled >= HIGH_FLOOR,
+            self.type_codes.get(bien_type, math.nan),
+            _flag(has_parking), _flag(has_lift),
+            surface * ville_encoded, surface * distance_centre,
+        )
+        return {name: float(value) for name, value in zip(FEATURE_NAMES, values)}
+
+    # ============================================
+    # SERIALISATION
+    # ============================================
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": FEATURE_STATE_VERSION,
+            "feature_names": FEATURE_NAMES,
+            "size_bins": SIZE_BINS,
+            "city_codes": self.city_codes,
+            "type_codes": self.type_codes,
+            "pieces_medians": {city: {str(k): v for k, v in sorted(medians.items())}
+                               for city, medians in sorted(self.pieces_medians.items())},
+            "pieces_median": self.pieces_median,
+            "fitted_rows": self.fitted_rows,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RentFeatureTransformer":
+        if data.get("version") != FEATURE_STATE_VERSION:
+            raise ValueError(f"Version d'etat de features non supportee: {data.get('version')}")
+        if data["feature_names"] != FEATURE_NAMES or data["size_bins"] != SIZE_BINS:
+            raise ValueError("Etat de features incompatible (features ou tailles differentes)")
+        return cls(data["city_codes"], data["type_codes"], data["pieces_medians"],
+                   data["pieces_median"], data.get("fitted_rows", 0))
+
+    def save(self, path: Path) -> Path:
+        """Ecriture atomique (l'API recharge a chaud ml_models/)"""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "RentFeatureTransformer":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    @classmethod
+    def load_or_legacy(cls, path: Path) -> "RentFeatureTransformer":
+        """Etat du modele si present, sinon etat legacy (modele plus ancien)"""
+        path = Path(path)
+        return cls.load(path) if path.exists() else cls.legacy()
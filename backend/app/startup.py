@@ -0,0 +1,87 @@
+# ============================================
+# SwissRelocator - Phases de demarrage
+# backend/app/startup.py
+# ============================================
+"""
+Demarrage explicite et chronometre de l'API.
+
+Chaque phase (modele de loyers, index FAISS, modele d'embedding) est une
+fonction bloquante executee dans un thread; les phases tournent en
+parallele et leur duree est mesuree. L'API n'est "prete" que lorsque
+toutes les phases ont reussi.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+
+@dataclass
+class StartupPhase:
+    """Etat d'une phase de demarrage"""
+
+    name: str
+    status: str = "pending"  # pending | running | ok | failed
+    duration_s: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class StartupState:
+    """Etat global du demarrage (lu par les endpoints de sante)"""
+
+    phases: Dict[str, StartupPhase] = field(default_factory=dict)
+    finished: bool = False
+    ready: bool = False
+    total_duration_s: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "finished": self.finished,
+            "ready": self.ready,
+            "total_duration_s": self.total_duration_s,
+            "phases": {
+                name: {
+                    "status": phase.status,
+                    "duration_s": phase.duration_s,
+                    "error": phase.error,
+                }
+                for name, phase in self.phases.items()
+            },
+        }
+
+
+startup_state = StartupState()
+
+
+async def _run_phase(phase: StartupPhase, load: Callable[[], object]) -> None:
+    phase.status = "running"
+    start = time.perf_counter()
+    try:
+        result = await asyncio.to_thread(load)
+        # load_model() renvoie None si le modele n'a pas pu etre charge
+        if result is None:
+            raise RuntimeError(f"{phase.name} non charge")
+        phase.status = "ok"
+    except Exception as e:
+        phase.status = "failed"
+        phase.error = str(e)
+    finally:
+        phase.duration_s = round(time.perf_counter() - start, 3)
+
+
+async def run_startup(phases: Dict[str, Callable[[], object]], state: StartupState = startup_state) -> StartupState:
+    """Execute les phases en parallele et bascule `ready` si toutes reussissent"""
+    state.finished = False
+    state.ready = False
+    state.phases = {name: StartupPhase(name) for name in phases}
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _run_phase(state.phases[name], load) for name, load in phases.items()
+    ))
+    state.total_duration_s = round(time.perf_counter() - start, 3)
+    state.ready = all(phase.status == "ok" for phase in state.phases.values())
+    state.finished = True
+    return state
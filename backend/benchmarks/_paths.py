@@ -0,0 +1,23 @@
+"""
+Chemins du backend pour les benchmarks
+======================================
+Les benchmarks importent les modules de l'API (app/: services, config,
+predict_rent_router) et des scripts d'entrainement (ml_training/) par leur
+nom, comme ces programmes le font entre eux. setup_paths() ajoute ces
+dossiers a sys.path; chaque benchmark l'appelle explicitement avant ses
+imports du backend.
+"""
+
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+APP_DIR = BACKEND_DIR / "app"
+ML_TRAINING_DIR = BACKEND_DIR / "ml_training"
+
+
+def setup_paths() -> None:
+    """Rend app/ et ml_training/ importables (ml_training/ en premier)"""
+    for directory in (APP_DIR, ML_TRAINING_DIR):
+        if str(directory) not in sys.path:
+            sys.path.insert(0, str(directory))
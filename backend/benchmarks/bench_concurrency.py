@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrence - predict_rent sous 1, 8 et 64 clients
+============================================================
+Appelle le handler predict_rent en parallele (asyncio) pour chaque mode
+d'execution (inline, thread, process) et mesure:
+  - le debit (predictions/s)
+  - la latence p50/p99 vue par le client
+  - le retard max de la boucle asyncio (un /health serait servi avec ce retard)
+  - le nombre de 503 (backpressure)
+
+Usage:
+    python benchmarks/bench_concurrency.py [--requests 2000] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from fastapi import HTTPException
+
+from _paths import setup_paths
+
+setup_paths()
+
+from bench_inference import random_requests, synthetic_model  # noqa: E402
+
+import predict_rent_router as rent  # noqa: E402
+from services.model_registry import ModelBundle  # noqa: E402
+from services.prediction_executor import EXECUTOR_MODES, PredictionExecutor  # noqa: E402
+from services.real_estate_predictor import create_engine  # noqa: E402
+
+CONCURRENCY_LEVELS = [1, 8, 64]
+
+
+async def loop_lag_probe(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Mesure le retard max de la boucle (reveil attendu toutes les `interval` s)"""
+    max_lag = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - start - interval)
+    return max_lag
+
+
+async def run_clients(requests, concurrency: int):
+    """`concurrency` clients se partagent la liste de requetes"""
+    latencies = []
+    rejected = 0
+    queue = iter(requests)
+
+    async def client():
+        nonlocal rejected
+        for request in queue:
+            start = time.perf_counter()
+            try:
+                await rent.predict_rent(request)
+                latencies.append(time.perf_counter() - start)
+            except HTTPException as e:
+                if e.status_code != 503:
+                    raise
+                rejected += 1
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(loop_lag_probe(stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    max_lag = await probe
+
+    return elapsed, np.array(latencies), rejected, max_lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Requetes par scenario")
+    parser.add_argument("--workers", type=int, default=4, help="Workers du pool")
+    parser.add_argument("--max-queue", type=int, default=64, help="File d'attente max avant 503")
+    parser.add_argument("--modes", nargs="+", default=list(EXECUTOR_MODES), choices=EXECUTOR_MODES)
+    args = parser.parse_args()
+
+    requests = random_requests(args.requests)
+
+    # Le mode process recharge le modele depuis un fichier
+    bundle = rent.load_model()
+    if bundle is None:
+        print("[WARN] Modele absent, entrainement d'un modele synthetique")
+        model = synthetic_model(requests)
+        model_path = Path(tempfile.mkdtemp()) / "immo_ch_model.pkl"
+        joblib.dump(model, model_path)
+        bundle = ModelBundle(
+            version="synthetic",
+            model=model,
+            scaler=None,
+            features_list=rent.FEATURE_NAMES,
+            engine=create_engine(model, rent.FEATURE_NAMES),
+            model_path=model_path,
+            fingerprint=(),
+        )
+        rent.model_registry.active = bundle
+
+    engine, model_path, feature_names = bundle.engine, bundle.model_path, bundle.features_list
+    # Le cache masquerait le cout du modele
+    rent.prediction_cache.max_size = 0
+
+    print("=" * 78)
+    print(f"BENCHMARK CONCURRENCE - {args.requests} requetes, {args.workers} workers")
+    print("=" * 78)
+    print(f"{'Mode':<9} {'Clients':>7} {'Debit (req/s)':>14} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'Lag boucle (ms)':>16} {'503':>5}")
+    print("-" * 78)
+
+    for mode in args.modes:
+        executor = PredictionExecutor(mode=mode, workers=args.workers, max_queue=args.max_queue)
+        executor.configure(engine, model_path, feature_names, token=bundle.token, model_stat=bundle.model_stat)
+        rent.executor = executor
+
+        # Chauffe (demarrage des workers en mode process)
+        asyncio.run(run_clients(requests[:50], args.workers))
+
+        for concurrency in CONCURRENCY_LEVELS:
+            elapsed, latencies, rejected, max_lag = asyncio.run(run_clients(requests, concurrency))
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1e3 if len(latencies) else (0.0, 0.0)
+            print(f"{mode:<9} {concurrency:>7} {len(latencies) / elapsed:>14,.0f} {p50:>9.2f} {p99:>9.2f} "
+                  f"{max_lag * 1e3:>16.2f} {rejected:>5}")
+
+        executor.shutdown()
+
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
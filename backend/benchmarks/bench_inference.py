@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark inference loyers - chemin pandas vs booster natif
+===========================================================
+Compare la latence p50/p99 d'une prediction unitaire:
+  - chemin historique : prepare_features() -> DataFrame -> model.predict()
+  - moteur natif      : build_feature_vector() -> buffer float32 -> booster
+
+Verifie aussi que les deux chemins donnent les memes predictions
+(tolerance float32). Code retour 1 si la parite n'est pas respectee.
+
+Si ml_models/immo_ch_model.pkl est absent, un XGBRegressor est entraine
+sur des donnees synthetiques pour que le benchmark reste executable.
+
+Usage:
+    python benchmarks/bench_inference.py [--n 2000] [--rtol 1e-5]
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from _paths import setup_paths
+
+setup_paths()
+
+import predict_rent_router as rent  # noqa: E402
+from services.real_estate_predictor import PandasEngine, create_engine  # noqa: E402
+
+CITIES = list(rent.CITY_CENTERS.keys())
+
+
+# ============================================
+# DONNEES SYNTHETIQUES
+# ============================================
+
+def random_requests(n: int, seed: int = 42):
+    """Genere n requetes realistes (champs optionnels parfois absents)"""
+    rng = np.random.default_rng(seed)
+    requests = []
+    for _ in range(n):
+        city = CITIES[rng.integers(len(CITIES))]
+        center = rent.CITY_CENTERS[city]
+        requests.append(rent.PredictRentRequest(
+            city=city,
+            surface=float(rng.uniform(15, 1500)),
+            latitude=float(center['lat'] + rng.normal(0, 0.02)) if rng.random() < 0.8 else None,
+            longitude=float(center['lon'] + rng.normal(0, 0.02)) if rng.random() < 0.8 else None,
+            pieces=float(rng.integers(1, 30)) if rng.random() < 0.6 else None,
+            etage=int(rng.integers(-1, 12)) if rng.random() < 0.6 else None,
+            has_parking=bool(rng.random() < 0.4),
+            has_lift=bool(rng.random() < 0.5),
+            property_type='bureau' if rng.random() < 0.7 else 'commercial',
+        ))
+    return requests
+
+
+def synthetic_model(requests):
+    """Petit XGBRegressor entraine sur des features synthetiques"""
+    import pandas as pd
+    import xgboost as xgb
+
+    X = rent.prepare_features_batch(requests)
+    y = X[:, 4] * 30 + X[:, 3] * 500 - X[:, 2] * 200 + np.random.default_rng(0).normal(0, 300, len(X))
+    model = xgb.XGBRegressor(n_estimators=100, max_depth=5, learning_rate=0.05, random_state=42)
+    model.fit(pd.DataFrame(X, columns=rent.FEATURE_NAMES), y)
+    return model
+
+
+# ============================================
+# MESURES
+# ============================================
+
+def measure(fn, requests):
+    """Latences unitaires (secondes) et predictions"""
+    latencies = np.empty(len(requests))
+    predictions = np.empty(len(requests))
+    for i, request in enumerate(requests):
+        start = time.perf_counter()
+        predictions[i] = fn(request)
+        latencies[i] = time.perf_counter() - start
+    return latencies, predictions
+
+
+def report(label: str, latencies: np.ndarray) -> None:
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+    print(f"  {label:<22} p50 = {p50:8.1f} us | p99 = {p99:8.1f} us | mean = {latencies.mean() * 1e6:8.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=2000, help="Nombre de predictions mesurees")
+    parser.add_argument("--warmup", type=int, default=100, help="Predictions de chauffe (non mesurees)")
+    parser.add_argument("--rtol", type=float, default=1e-5, help="Tolerance relative de parite")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK INFERENCE LOYERS")
+    print("=" * 60)
+
+    requests = random_requests(args.n + args.warmup)
+
+    bundle = rent.load_model()
+    if bundle is not None:
+        model, feature_names = bundle.model, bundle.features_list
+    else:
+        print("[WARN] Modele absent, entrainement d'un modele synthetique")
+        model, feature_names = synthetic_model(requests), rent.FEATURE_NAMES
+
+    engine = create_engine(model, feature_names)
+    if isinstance(engine, PandasEngine):
+        print(f"[WARN] Modele non-XGBoost ({type(model).__name__}): pas de booster natif")
+
+    legacy = lambda r: float(model.predict(rent.prepare_features(r))[0])  # noqa: E731
+    native = lambda r: engine.predict_one(rent.build_feature_vector(r))  # noqa: E731
+
+    # Chauffe
+    measure(legacy, requests[:args.warmup])
+    measure(native, requests[:args.warmup])
+
+    measured = requests[args.warmup:]
+    legacy_lat, legacy_pred = measure(legacy, measured)
+    native_lat, native_pred = measure(native, measured)
+
+    print(f"\n[LATENCE] {len(measured)} predictions unitaires")
+    report("pandas + sklearn", legacy_lat)
+    report(engine.name, native_lat)
+    speedup = np.median(legacy_lat) / np.median(native_lat)
+    print(f"  Gain p50 : x{speedup:.1f}")
+
+    # Parite des predictions
+    max_abs = float(np.max(np.abs(legacy_pred - native_pred)))
+    ok = np.allclose(native_pred, legacy_pred, rtol=args.rtol, atol=1e-3)
+    print(f"\n[PARITE] ecart max = {max_abs:.6f} CHF -> {'OK' if ok else 'ECHEC'}")
+
+    # Le batch natif doit aussi coller au chemin unitaire
+    batch_pred = engine.predict_matrix(rent.prepare_features_batch(measured), columns=rent.FEATURE_NAMES)
+    batch_ok = np.allclose(batch_pred, legacy_pred, rtol=args.rtol, atol=1e-3)
+    print(f"[PARITE] batch vs unitaire -> {'OK' if batch_ok else 'ECHEC'}")
+
+    return 0 if ok and batch_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
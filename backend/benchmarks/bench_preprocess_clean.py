@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark nettoyage ImmoScout - clean_record() par lots
+=======================================================
+Mesure preprocess.clean_immoscout_data (clean_record() annonce par annonce,
+motifs precompiles) selon la taille des lots.
+
+Parite: le CSV exporte (meme encodage que process_immoscout_data) ne doit
+pas dependre de la taille des lots, sur les fixtures
+(fixtures/immoscout_listings.json: cles FR/DE, GPS et prix invalides, types
+inattendus...) et sur les annonces synthetiques. Code retour 1 sinon.
+
+Debit: annonces/s par taille de lot sur --listings annonces synthetiques.
+
+Usage:
+    python benchmarks/bench_preprocess_clean.py [--listings 100000] [--batch-size 5000]
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from _paths import setup_paths
+
+setup_paths()
+
+from bench_preprocess_ingest import synthetic_listing  # noqa: E402
+
+import preprocess  # noqa: E402
+
+FIXTURES_PATH = Path(__file__).parent / "fixtures" / "immoscout_listings.json"
+
+
+def synthetic_listings(n: int, seed: int = 0):
+    """Annonces synthetiques avec metadonnees de source (comme iter_json_records)"""
+    rng = random.Random(seed)
+    listings = []
+    for i in range(n):
+        transaction = rng.choice(preprocess.TYPES_TRANSACTION)
+        ville = rng.choice(preprocess.VILLES)
+        item = synthetic_listing(rng, i, transaction, ville)
+        if transaction == "Vente" and rng.random() < 0.5:
+            item["totalPrice"] = item.pop("priceNet")
+        item.update(source_ville=ville, source_transaction=transaction,
+                    source_bien_type=rng.choice(preprocess.TYPES_BIEN), source_file=f"listings_{i // 50:05d}.json")
+        listings.append(item)
+    return listings
+
+
+# Tailles de lot mesurees (en plus de --batch-size)
+BATCH_SIZES = (500, 5000, 50_000)
+
+
+def clean(listings, batch_size: int):
+    """(DataFrame, duree s); les logs du nettoyage sont masques"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        df = preprocess.clean_immoscout_data(listings, batch_size=batch_size)
+        return df, time.perf_counter() - start
+
+
+def to_csv_bytes(df) -> bytes:
+    # MEME EXPORT QUE preprocess.process_immoscout_data
+    return df.to_csv(index=False, encoding="utf-8-sig").encode("utf-8-sig")
+
+
+def check_parity(name: str, listings, batch_size: int) -> bool:
+    """Un lot unique vs des lots de batch_size"""
+    reference, _ = clean(copy.deepcopy(listings), len(listings))
+    batched, _ = clean(copy.deepcopy(listings), batch_size)
+    same = to_csv_bytes(reference) == to_csv_bytes(batched) and reference.dtypes.equals(batched.dtypes)
+    print(f"[PARITE] {name:<12} {len(listings):>7,} annonces -> {len(reference):>7,} lignes "
+          f"{'OK' if same else 'ECHEC'}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=100_000, help="Annonces synthetiques")
+    parser.add_argument("--batch-size", type=int, default=preprocess.CLEAN_BATCH_SIZE)
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions (meilleure duree retenue)")
+    args = parser.parse_args()
+
+    fixtures = json.loads(FIXTURES_PATH.read_text(encoding="utf-8"))
+    listings = synthetic_listings(args.listings)
+
+    print("=" * 72)
+    print(f"BENCHMARK NETTOYAGE IMMOSCOUT - {args.listings:,} annonces, lots de {args.batch_size:,}")
+    print("=" * 72)
+    ok = check_parity("fixtures", fixtures, batch_size=7)
+    ok &= check_parity("synthetique", listings[:20_000], args.batch_size)
+    print("-" * 72)
+    print(f"{'Lots':>12} {'Duree (s)':>10} {'Annonces/s':>12}")
+
+    for batch_size in sorted(set(BATCH_SIZES) | {args.batch_size}):
+        duration = min(clean(listings, batch_size)[1] for _ in range(args.repeat))
+        print(f"{batch_size:>12,} {duration:>10.2f} {args.listings / duration:>12,.0f}")
+
+    print("=" * 72)
+    print(f"[PARITE] CSV identiques -> {'OK' if ok else 'ECHEC'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Benchmark pretraitement incremental ImmoScout - passage complet vs manifeste
+============================================================================
+Genere une arborescence synthetique (meme format que le scraping), la traite
+une premiere fois en mode incremental, puis simule un nouveau scraping:
+--new-files fichiers ajoutes, un fichier modifie, un supprime, un touche
+(mtime seul), une annonce deja connue dans un nouveau fichier.
+
+Compare ensuite, sur l'arborescence modifiee:
+  - complet      : iter_json_records + clean_immoscout_data + filter_and_validate
+                   (percentiles exacts)
+  - incremental  : load_incremental_data (seuls les fichiers nouveaux ou
+                   modifies sont lus) + filter_and_validate (bornes des sketches)
+
+Verifications (code retour 1 sinon):
+  - store incremental == nettoyage complet dedoublonne (memes annonces, memes valeurs)
+  - passage sans changement: aucun fichier relu
+  - fichier touche (mtime seul): nouveau mtime au manifeste, pas de nouveau
+    hachage au passage suivant
+  - bornes des sketches a l'erreur relative pres du percentile exact de meme rang
+  - annonces filtrees differentes: uniquement des prix a la limite des bornes
+
+Usage:
+    python benchmarks/bench_preprocess_incremental.py [--listings 100000] [--per-file 50] [--new-files 20]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from _paths import setup_paths
+
+setup_paths()
+
+from bench_preprocess_ingest import synthetic_listing, write_synthetic_tree  # noqa: E402
+
+import preprocess  # noqa: E402
+from streaming_stats import DEFAULT_RELATIVE_ACCURACY  # noqa: E402
+
+
+def quiet(run, *args, **kwargs):
+    """(resultat, duree s); les logs du pipeline sont masques"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = run(*args, **kwargs)
+        return result, time.perf_counter() - start
+
+
+def full_run(base_dir: Path):
+    records = preprocess.iter_json_records(base_dir, preprocess.VILLES, preprocess.TYPES_TRANSACTION,
+                                           preprocess.TYPES_BIEN)
+    df = preprocess.clean_immoscout_data(records)
+    return df, preprocess.filter_and_validate(df)
+
+
+def incremental_run(base_dir: Path, store_dir: Path):
+    df, price_bounds, scan = preprocess.load_incremental_data(base_dir=base_dir, store_dir=store_dir)
+    return df, price_bounds, scan, preprocess.filter_and_validate(df, price_bounds)
+
+
+def simulate_scrape(base_dir: Path, n_new_files: int, per_file: int, seed: int = 1) -> None:
+    """Nouveaux fichiers, un fichier modifie, un supprime, un touche"""
+    rng = random.Random(seed)
+    folders = sorted({path.parent for path in base_dir.rglob("*.json")})
+    existing = sorted(base_dir.rglob("*.json"))
+    known = json.loads(existing[0].read_text(encoding="utf-8"))[0]
+
+    for n in range(n_new_files):
+        folder = folders[n % len(folders)]
+        transaction, ville = folder.parts[-3], folder.parts[-1]
+        listings = [synthetic_listing(rng, 10_000_000 + n * per_file + i, transaction, ville) for i in range(per_file)]
+        if n == 0:
+            listings.append(known)   # annonce deja vue: ignoree a la fusion
+        (folder / f"listings_new_{n:05d}.json").write_text(json.dumps(listings, ensure_ascii=False), encoding="utf-8")
+
+    modified = json.loads(existing[1].read_text(encoding="utf-8"))
+    existing[1].write_text(json.dumps(modified[: len(modified) // 2], ensure_ascii=False), encoding="utf-8")
+    existing[2].unlink()
+    os.utime(existing[3])
+
+
+def check_bounds(df_clean: pd.DataFrame, price_bounds, relative_accuracy: float) -> bool:
+    """Bornes des sketches vs percentile exact de meme rang (population de filter_and_validate)"""
+    df = df_clean.drop_duplicates(subset=["id"])
+    df = df[preprocess.price_population(df)]
+    ok = True
+    for transaction, bounds in sorted(price_bounds.items()):
+        prices = np.sort(df.loc[df["source_transaction"] == transaction, "price"].to_numpy())
+        for q, bound in zip(preprocess.PRICE_QUANTILES, bounds):
+            exact = prices[int(q * (len(prices) - 1))]
+            error = abs(bound - exact) / exact
+            ok &= error <= relative_accuracy
+            print(f"[BORNES] {transaction:<8} q={q:<6} sketch {bound:>14,.0f}  exact {exact:>14,.0f}  "
+                  f"erreur {error:.4%}")
+    return ok
+
+
+def check_filtered(full: pd.DataFrame, incremental: pd.DataFrame, price_bounds, relative_accuracy: float) -> bool:
+    """Annonces gardees par un seul des deux filtres: prix a la limite des bornes uniquement"""
+    ids_full, ids_incremental = set(full["id"]), set(incremental["id"])
+    differing = pd.concat([full[~full["id"].isin(ids_incremental)], incremental[~incremental["id"].isin(ids_full)]])
+    ok = True
+    for _, row in differing.iterrows():
+        bounds = price_bounds[row["source_transaction"]]
+        distance = min(abs(row["price"] - bound) / bound for bound in bounds)
+        ok &= distance <= 2 * relative_accuracy
+    print(f"[FILTRE] complet {len(full):,} / incremental {len(incremental):,} lignes, "
+          f"{len(differing)} annonce(s) a la limite des bornes -> {'OK' if ok else 'ECHEC'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=100_000, help="Annonces synthetiques")
+    parser.add_argument("--per-file", type=int, default=50, help="Annonces par fichier JSON")
+    parser.add_argument("--new-files", type=int, default=20, help="Fichiers ajoutes par le nouveau scraping")
+    args = parser.parse_args()
+
+    base_dir = Path(tempfile.mkdtemp())
+    store_dir = Path(tempfile.mkdtemp()) / "incremental"
+    n_files = write_synthetic_tree(base_dir, args.listings, args.per_file)
+
+    print("=" * 72)
+    print(f"BENCHMARK PRETRAITEMENT INCREMENTAL - {args.listings:,} annonces, {n_files:,} fichiers, "
+          f"+{args.new_files} fichiers")
+    print("=" * 72)
+
+    (_, _, scan, _), initial_s = quiet(incremental_run, base_dir, store_dir)
+    print(f"[INIT] premier passage incremental: {len(scan.pending):,} fichiers en {initial_s:.2f}s")
+
+    (_, _, scan, _), noop_s = quiet(incremental_run, base_dir, store_dir)
+    ok = not scan.changed
+    print(f"[NOOP] passage sans changement: {len(scan.pending)} fichier relu en {noop_s:.2f}s "
+          f"-> {'OK' if ok else 'ECHEC'}")
+
+    simulate_scrape(base_dir, args.new_files, args.per_file)
+    (df_clean, df_full), full_s = quiet(full_run, base_dir)
+    (df_store, price_bounds, scan, df_incremental), incremental_s = quiet(incremental_run, base_dir, store_dir)
+
+    print("-" * 72)
+    print(f"{'Chemin':<12} {'Fichiers lus':>13} {'Duree (s)':>10} {'Acceleration':>13}")
+    print(f"{'complet':<12} {n_files + args.new_files - 1:>13,} {full_s:>10.2f} {1:>12.1f}x")
+    print(f"{'incremental':<12} {len(scan.pending):>13,} {incremental_s:>10.2f} {full_s / incremental_s:>12.1f}x")
+    print("-" * 72)
+
+    # Store == nettoyage complet dedoublonne (types du store: ceux du dataset Parquet)
+    expected = df_clean.drop_duplicates(subset=["id"]).sort_values("id").reset_index(drop=True)
+    stored = df_store.sort_values("id").reset_index(drop=True)
+    try:
+        pd.testing.assert_frame_equal(expected, stored, check_dtype=False)
+        same = True
+    except AssertionError as e:
+        print(f"[STORE] {e}")
+        same = False
+    print(f"[STORE] {len(stored):,} annonces nettoyees, identiques au nettoyage complet -> "
+          f"{'OK' if same else 'ECHEC'}")
+    ok &= same
+
+    (_, _, rescan, _), _ = quiet(incremental_run, base_dir, store_dir)
+    touched_ok = scan.touched == 1 and not rescan.changed and rescan.touched == 0
+    print(f"[TOUCHE] {scan.touched} fichier touche enregistre, passage suivant: {rescan.touched} rehache "
+          f"-> {'OK' if touched_ok else 'ECHEC'}")
+    ok &= touched_ok
+
+    ok &= check_bounds(df_clean, price_bounds, DEFAULT_RELATIVE_ACCURACY)
+    ok &= check_filtered(df_full, df_incremental, price_bounds, DEFAULT_RELATIVE_ACCURACY)
+
+    print("=" * 72)
+    print(f"[RESULTAT] {'OK' if ok else 'ECHEC'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark ingestion ImmoScout - chargement serie vs flux parallele
+==================================================================
+Genere une arborescence synthetique Transaction/Bien/Ville de fichiers
+JSON (meme format que le scraping) puis compare:
+  - chemin historique : json.load serie de tous les fichiers dans une
+    liste, puis clean_immoscout_data(liste)
+  - flux parallele    : clean_immoscout_data(iter_json_records(...)),
+    lecture en threads (orjson si installe), nettoyage par lots
+
+Mesures: duree, debit (annonces/s) et pic memoire Python (tracemalloc,
+passe separee pour ne pas fausser les durees). Les deux chemins doivent
+produire le meme DataFrame: code retour 1 sinon.
+
+Usage:
+    python benchmarks/bench_preprocess_ingest.py [--listings 100000] [--per-file 50] [--workers 8]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+from _paths import setup_paths
+
+setup_paths()
+
+import preprocess  # noqa: E402
+
+CITY_POSTAL_CODES = {"Genève": "1204", "Lausanne": "1003", "Zurich": "8001", "Bale": "4051"}
+
+
+# ============================================
+# ARBORESCENCE SYNTHETIQUE
+# ============================================
+
+def synthetic_listing(rng: random.Random, i: int, transaction: str, ville: str) -> dict:
+    """Annonce au format du scraper (prix et surfaces en texte, features FR/DE, images)"""
+    surface = rng.randint(8, 2500)
+    price = surface * (rng.randint(15, 60) if transaction == "Location" else rng.randint(4000, 16000))
+    features = {
+        rng.choice(["Surface utile", "Nutzfläche", "Surface habitable"]): f"{surface} m²",
+        rng.choice(["Etage", "Stockwerk"]): str(rng.randint(0, 12)),
+        rng.choice(["Disponibilité", "Verfügbar ab"]): rng.choice(["Immédiatement", "Nach Vereinbarung"]),
+    }
+    if rng.random() < 0.6:
+        features[rng.choice(["Nombre de pièce(s)", "Zimmer"])] = f"{rng.randint(1, 12)}.5"
+    return {
+        "id": f"{transaction[0]}{i:08d}",
+        "url": f"https://www.immoscout24.ch/fr/d/{i}",
+        "title": f'"Bureau lumineux {i}"',
+        "address": f"Rue du Marche {rng.randint(1, 99)}, {CITY_POSTAL_CODES[ville]} {ville}",
+        "gps": f"{46 + rng.random():.6f}, {6 + rng.random() * 3:.6f}",
+        "priceNet": f"CHF {price:,}.–".replace(",", "'"),
+        "features": features,
+        "featuresSecondary": rng.sample(["Lift", "Parkplatz", "Balkon", "Keller", "Ascenseur", "Vue"], 3),
+        "description": " ".join(rng.choices(["bureau", "lumineux", "centre", "open-space", "parking"], k=150)),
+        "images": [f"https://media.immoscout24.ch/{i}/{k}.jpg" for k in range(rng.randint(3, 15))],
+        "scraped_at": "2025-01-15T10:00:00",
+    }
+
+
+def write_synthetic_tree(base_dir: Path, n_listings: int, per_file: int, seed: int = 0) -> int:
+    """Repartit n_listings annonces dans les dossiers de preprocess (VILLES x TYPES_*), per_file par fichier"""
+    rng = random.Random(seed)
+    folders = [(t, b, v) for t in preprocess.TYPES_TRANSACTION for b in preprocess.TYPES_BIEN
+               for v in preprocess.VILLES]
+    n_files = 0
+    for start in range(0, n_listings, per_file):
+        transaction, bien, ville = folders[n_files % len(folders)]
+        folder = base_dir / transaction / bien / ville
+        folder.mkdir(parents=True, exist_ok=True)
+        listings = [synthetic_listing(rng, i, transaction, ville)
+                    for i in range(start, min(start + per_file, n_listings))]
+        (folder / f"listings_{n_files:05d}.json").write_text(json.dumps(listings, ensure_ascii=False),
+                                                             encoding="utf-8")
+        n_files += 1
+    return n_files
+
+
+# ============================================
+# CHEMINS COMPARES
+# ============================================
+
+def legacy_load(base_dir: Path) -> list:
+    """Chargement historique: json.load serie, toutes les annonces dans une liste"""
+    all_data = []
+    for json_file, ville, transaction, bien in preprocess.iter_json_files(
+            base_dir, preprocess.VILLES, preprocess.TYPES_TRANSACTION, preprocess.TYPES_BIEN):
+        with open(json_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data:
+            item["source_ville"] = ville
+            item["source_transaction"] = transaction
+            item["source_bien_type"] = bien
+            item["source_file"] = json_file.name
+            all_data.append(item)
+    return all_data
+
+
+def run_legacy(base_dir: Path, workers: int):
+    return preprocess.clean_immoscout_data(legacy_load(base_dir))
+
+
+def run_streaming(base_dir: Path, workers: int):
+    records = preprocess.iter_json_records(base_dir, preprocess.VILLES, preprocess.TYPES_TRANSACTION,
+                                           preprocess.TYPES_BIEN, workers=workers)
+    return preprocess.clean_immoscout_data(records)
+
+
+def measure(run, base_dir: Path, workers: int):
+    """(DataFrame, duree s, pic memoire MB); les logs du pipeline sont masques"""
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            start = time.perf_counter()
+            df = run(base_dir, workers)
+            elapsed = time.perf_counter() - start
+
+            tracemalloc.start()
+            run(base_dir, workers)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            sys.stdout = stdout
+    return df, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=100_000, help="Annonces synthetiques")
+    parser.add_argument("--per-file", type=int, default=50, help="Annonces par fichier JSON")
+    parser.add_argument("--workers", type=int, default=preprocess.LOAD_WORKERS, help="Threads de lecture")
+    args = parser.parse_args()
+
+    base_dir = Path(tempfile.mkdtemp())
+    start = time.perf_counter()
+    n_files = write_synthetic_tree(base_dir, args.listings, args.per_file)
+    print(f"[DATA] {args.listings:,} annonces dans {n_files:,} fichiers ({time.perf_counter() - start:.1f}s)")
+
+    print("=" * 72)
+    print(f"BENCHMARK INGESTION IMMOSCOUT - {args.listings:,} annonces, parser "
+          f"{'orjson' if preprocess.orjson is not None else 'json'}, {args.workers} threads")
+    print("=" * 72)
+    print(f"{'Chemin':<12} {'Duree (s)':>10} {'Annonces/s':>12} {'Pic memoire (MB)':>17}")
+    print("-" * 72)
+
+    frames = {}
+    for name, run in (("serie", run_legacy), ("flux", run_streaming)):
+        df, elapsed, peak_mb = measure(run, base_dir, args.workers)
+        frames[name] = df
+        print(f"{name:<12} {elapsed:>10.2f} {args.listings / elapsed:>12,.0f} {peak_mb:>17.1f}")
+
+    try:
+        pd.testing.assert_frame_equal(frames["serie"], frames["flux"])
+        ok = True
+    except AssertionError as e:
+        print(f"[PARITE] {e}")
+        ok = False
+    print("=" * 72)
+    print(f"[PARITE] DataFrames nettoyes identiques -> {'OK' if ok else 'ECHEC'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
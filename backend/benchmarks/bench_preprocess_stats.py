@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark statistiques du filtrage ImmoScout - passes pandas vs profil en une passe
+==================================================================================
+Mesure, sur un dataset final synthetique (annonces nettoyees puis filtrees
+par preprocess.filter_and_validate), le profil du rapport qualite JSON face
+aux statistiques affichees par l'ancien filter_and_validate:
+  - passes pandas : value_counts, sous-DataFrames par transaction,
+                    mean/median/min/max, groupby().median()
+  - profil        : streaming_stats.DatasetProfile(**preprocess.FINAL_PROFILE),
+                    une passe (plus de quantiles et de colonnes)
+
+Verifications (code retour 1 sinon):
+  - comptages, count / min / max exacts, moyennes a l'arrondi pres;
+  - quantiles et medianes par groupe a relative_accuracy pres de la valeur
+    exacte de meme rang (q * (n - 1));
+  - profil mis a jour par lots (update) identique au profil en un lot.
+
+Usage:
+    python benchmarks/bench_preprocess_stats.py [--listings 200000] [--repeat 3]
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+import numpy as np
+
+from _paths import setup_paths
+
+setup_paths()
+
+from bench_preprocess_clean import synthetic_listings  # noqa: E402
+
+import preprocess  # noqa: E402
+from streaming_stats import DEFAULT_RELATIVE_ACCURACY, SUMMARY_QUANTILES, DatasetProfile  # noqa: E402
+
+# Lots du profil incremental (verification update)
+UPDATE_BATCH = 7000
+
+
+def pandas_stats(df):
+    """Statistiques de l'ancien filter_and_validate (passes et copies separees)"""
+    stats = {
+        "city": df["city"].value_counts(),
+        "source_transaction": df["source_transaction"].value_counts(),
+        "source_bien_type": df["source_bien_type"].value_counts(),
+        "categorie_taille": df["categorie_taille"].value_counts().sort_index(),
+    }
+    for transaction in df["source_transaction"].unique():
+        df_trans = df[df["source_transaction"] == transaction]
+        stats[transaction] = (df_trans["price"].mean(), df_trans["price"].median(),
+                              df_trans["price"].min(), df_trans["price"].max())
+    stats["surface"] = (df["surface"].mean(), df["surface"].median(), df["surface"].min(), df["surface"].max())
+    stats["prix_m2"] = df.groupby(["city", "source_transaction"])["prix_m2"].median()
+    return stats
+
+
+def profile_stats(df):
+    return DatasetProfile(**preprocess.FINAL_PROFILE).compute(df).to_dict()
+
+
+def best_time(run, df, repeat: int):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run(df)
+        durations.append(time.perf_counter() - start)
+    return result, min(durations)
+
+
+def check_summary(name: str, values: np.ndarray, summary) -> bool:
+    values = np.sort(values[~np.isnan(values.astype(float))].astype(float))
+    ok = summary["count"] == len(values)
+    ok &= summary["min"] == values[0] and summary["max"] == values[-1]
+    ok &= bool(np.isclose(summary["mean"], values.mean()))
+    for key, q in SUMMARY_QUANTILES.items():
+        # Valeur exacte de rang q * (n - 1) (sans interpolation, comme le sketch)
+        exact = values[int(q * (len(values) - 1))]
+        ok &= abs(summary[key] - exact) <= DEFAULT_RELATIVE_ACCURACY * abs(exact) * (1 + 1e-9)
+    if not ok:
+        print(f"[ECART] {name}: {summary}")
+    return ok
+
+
+def check(df, profile) -> bool:
+    ok = True
+    for column in preprocess.FINAL_PROFILE["counts"]:
+        expected = {str(k): int(v) for k, v in df[column].value_counts().items()}
+        counted = {k: v for k, v in profile["counts"][column]["values"].items() if v}
+        ok &= expected == counted
+    for column in preprocess.FINAL_PROFILE["numeric"]:
+        ok &= check_summary(column, df[column].to_numpy(dtype=float, na_value=np.nan), profile["numeric"][column])
+    for columns, value in preprocess.FINAL_PROFILE["grouped"]:
+        groups = profile["grouped"][f"{value} par {' / '.join(columns)}"]
+        for key, frame in df.groupby(columns):
+            key = key if isinstance(key, tuple) else (key,)
+            ok &= check_summary(f"{value} {key}", frame[value].to_numpy(dtype=float),
+                                groups[" / ".join(map(str, key))])
+        ok &= len(groups) == df.groupby(columns).ngroups
+    return ok
+
+
+def without_means(value):
+    if isinstance(value, dict):
+        return {k: without_means(v) for k, v in value.items() if k != "mean"}
+    return value
+
+
+def check_batches(df, profile) -> bool:
+    """Profil mis a jour lot par lot == profil en un lot (moyennes a l'arrondi pres)"""
+    batched = DatasetProfile(**preprocess.FINAL_PROFILE)
+    for start in range(0, len(df), UPDATE_BATCH):
+        batched.update(df.iloc[start:start + UPDATE_BATCH])
+    batched = batched.to_dict()
+    ok = without_means(batched) == without_means(profile)
+    ok &= all(np.isclose(batched["numeric"][column]["mean"], summary["mean"])
+              for column, summary in profile["numeric"].items() if summary["count"])
+    print(f"[LOTS] update() par lots de {UPDATE_BATCH:,} == compute() -> {'OK' if ok else 'ECHEC'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=200_000, help="Annonces synthetiques")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions (meilleure duree retenue)")
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = preprocess.filter_and_validate(preprocess.clean_immoscout_data(synthetic_listings(args.listings)))
+
+    print("=" * 72)
+    print(f"BENCHMARK STATISTIQUES FILTRAGE - dataset final de {len(df):,} lignes")
+    print("=" * 72)
+    print(f"{'Chemin':<16} {'Duree (ms)':>11} {'Acceleration':>13}")
+
+    _, pandas_s = best_time(pandas_stats, df, args.repeat)
+    profile, profile_s = best_time(profile_stats, df, args.repeat)
+    print(f"{'passes pandas':<16} {pandas_s * 1e3:>11.1f} {1:>12.1f}x")
+    print(f"{'profil':<16} {profile_s * 1e3:>11.1f} {pandas_s / profile_s:>12.1f}x")
+    print("-" * 72)
+
+    ok = check_batches(df, profile)
+    exact = check(df, profile)
+    print("=" * 72)
+    print(f"[EXACTITUDE] comptages exacts, quantiles a {DEFAULT_RELATIVE_ACCURACY:.1%} pres "
+          f"-> {'OK' if exact else 'ECHEC'}")
+    return 0 if ok and exact else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
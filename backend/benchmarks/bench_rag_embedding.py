@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark embedding RAG - PyTorch vs ONNX vs ONNX int8
+======================================================
+Compare les backends de services/embedding_backend.py sur des requetes
+fiscales realistes (et, avec --corpus, sur les chunks de l'index existant):
+  - parite: similarite cosinus de chaque embedding avec celui de PyTorch
+    (moyenne et minimum) et recouvrement des k plus proches chunks
+  - latence p50/p99 d'une requete unitaire (cas de l'API) et debit en batch
+
+Code retour 1 si un backend ONNX passe sous les seuils de parite
+(MIN_COSINE). Prerequis: python ml_training/export_onnx_embedder.py
+
+Usage:
+    python benchmarks/bench_rag_embedding.py [--repeat 200] [--threads 1] [--corpus]
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from _paths import setup_paths
+
+setup_paths()
+
+from services import rag_fiscal  # noqa: E402
+from services.embedding_backend import EMBEDDING_BACKENDS, load_embedder  # noqa: E402
+
+QUERIES = [
+    "Quel est le taux d'imposition sur le revenu a Geneve ?",
+    "Impot a la source pour un frontalier residant en France",
+    "Deduction des frais de garde d'enfants dans le canton de Vaud",
+    "Imposition de la fortune a Zurich pour un couple marie",
+    "TVA applicable aux prestations de services intra-communautaires",
+    "Comment sont imposes les dividendes d'une societe suisse ?",
+    "Bareme de l'impot federal direct pour un celibataire",
+    "Convention fiscale France-Suisse et double imposition",
+    "Taux de l'impot sur les societes en France pour une PME",
+    "Deduction du pilier 3a dans la declaration d'impots",
+    "Wie hoch ist die Vermogenssteuer in Basel-Stadt?",
+    "Income tax for expats moving to Zurich",
+]
+
+# Seuils de parite par backend (cosinus avec PyTorch)
+MIN_COSINE = {"onnx": 0.999, "onnx-int8": 0.98}
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def top_k_overlap(reference: np.ndarray, candidate: np.ndarray, corpus_ref: np.ndarray,
+                  corpus_cand: np.ndarray, k: int) -> float:
+    """Part des k chunks les plus proches (L2, comme l'index) retrouves par le backend"""
+    def top_k(queries, corpus):
+        distances = (queries ** 2).sum(1)[:, None] - 2 * queries @ corpus.T + (corpus ** 2).sum(1)[None, :]
+        return np.argsort(distances, axis=1)[:, :k]
+
+    ref, cand = top_k(reference, corpus_ref), top_k(candidate, corpus_cand)
+    return float(np.mean([len(set(r) & set(c)) / k for r, c in zip(ref, cand)]))
+
+
+def latency(embedder, texts, repeat: int):
+    """Latences unitaires (s) d'une requete et debit en batch (textes/s)"""
+    for text in texts[:5]:
+        embedder.encode([text])  # chauffe
+    latencies = np.empty(repeat)
+    for i in range(repeat):
+        text = texts[i % len(texts)]
+        start = time.perf_counter()
+        embedder.encode([text])
+        latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    embedder.encode(texts, batch_size=64)
+    throughput = len(texts) / (time.perf_counter() - start)
+    return latencies, throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--repeat", type=int, default=200, help="Requetes unitaires mesurees par backend")
+    parser.add_argument("--threads", type=int, default=1, help="Threads par backend (1 = petite instance)")
+    parser.add_argument("--corpus", action="store_true", help="Ajouter les chunks de l'index existant")
+    parser.add_argument("--max-chunks", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = list(QUERIES)
+    if args.corpus:
+        from services.chunk_store import ChunkStore
+
+        store = ChunkStore(rag_fiscal.FAISS_INDEX_DIR)
+        texts += [store.text(row) for row in range(min(len(store), args.max_chunks))]
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    embedders, vectors = {}, {}
+    for backend in backends:
+        try:
+            start = time.perf_counter()
+            embedders[backend] = load_embedder(backend, rag_fiscal.EMBEDDING_MODEL,
+                                               rag_fiscal.EMBEDDING_ONNX_DIR, threads=args.threads)
+            print(f"[LOAD] {backend}: {time.perf_counter() - start:.2f}s")
+        except (FileNotFoundError, ImportError) as e:
+            print(f"[SKIP] {backend}: {e}")
+            continue
+        vectors[backend] = embedders[backend].encode(texts, batch_size=64)
+
+    if "torch" not in vectors:
+        print("[ECHEC] backend de reference torch indisponible: parite non verifiable")
+        return 1
+
+    n_queries = len(QUERIES)
+    reference = vectors["torch"]
+
+    print("=" * 90)
+    print(f"BENCHMARK EMBEDDING RAG - {len(texts)} textes, {args.repeat} requetes unitaires, "
+          f"{args.threads} thread(s)")
+    print("=" * 90)
+    print(f"{'Backend':<11} {'Cos moy':>8} {'Cos min':>8} {'Top-k':>7} "
+          f"{'p50 (ms)':>9} {'p99 (ms)':>9} {'Textes/s':>9} {'Gain p50':>9}")
+    print("-" * 90)
+
+    parity_ok = True
+    torch_p50 = None
+    for backend, embedder in embedders.items():
+        cos = cosine_rows(reference, vectors[backend])
+        overlap = (top_k_overlap(reference[:n_queries], vectors[backend][:n_queries],
+                                 reference[n_queries:], vectors[backend][n_queries:], args.k)
+                   if len(texts) > n_queries + args.k else float("nan"))
+        latencies, throughput = latency(embedder, QUERIES, args.repeat)
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+        torch_p50 = torch_p50 or p50
+        print(f"{backend:<11} {cos.mean():>8.4f} {cos.min():>8.4f} {overlap:>7.2f} "
+              f"{p50:>9.2f} {p99:>9.2f} {throughput:>9.0f} {torch_p50 / p50:>8.1f}x")
+
+        if cos.min() < MIN_COSINE.get(backend, 0.0):
+            parity_ok = False
+            print(f"[PARITE] ECHEC {backend}: cosinus min {cos.min():.4f} < {MIN_COSINE[backend]}")
+
+    print("=" * 90)
+    print(f"[PARITE] cosinus vs PyTorch -> {'OK' if parity_ok else 'ECHEC'}")
+    return 0 if parity_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
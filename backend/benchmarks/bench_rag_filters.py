@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark RAG filtre - pre-filtrage (IDSelector) vs post-filtrage
+=================================================================
+Corpus synthetique reparti comme le corpus fiscal complet: BOFIP (FR)
+majoritaire, comparatifs CH, feuilles cantonales GE/VD/ZH/BS minoritaires.
+Pour chaque filtre et chaque type d'index, compare les deux strategies de
+services/rag_fiscal.search_vector():
+  - latence p50/p99 d'une requete
+  - rappel@k par rapport aux k voisins exacts parmi les chunks autorises
+  - nombre moyen de resultats (le post-filtrage peut en manquer)
+
+Verifie aussi que, sur un index plat, les deux strategies renvoient les
+memes chunks (code retour 1 sinon).
+
+Usage:
+    python benchmarks/bench_rag_filters.py [--n 50000] [--queries 300] [--k 8]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from _paths import setup_paths
+
+setup_paths()
+
+from bench_rag_index import synthetic_corpus  # noqa: E402
+
+import index_factory  # noqa: E402
+from services import rag_fiscal  # noqa: E402
+from services.chunk_store import ChunkStore, ChunkStoreWriter  # noqa: E402
+
+# Part du corpus par document source (canton, doc_type)
+CORPUS_MIX = [
+    ("bofip_is.txt", "FR", "bofip", 0.40),
+    ("bofip_tva.txt", "FR", "bofip", 0.30),
+    ("comparatifs_ch.txt", "CH", "comparatif", 0.10),
+    ("feuille_cantonale_fr_lyon.txt", "FR", "feuille_nationale", 0.04),
+    ("feuille_cantonale_ge.txt", "GE", "feuille_cantonale", 0.04),
+    ("feuille_cantonale_vd.txt", "VD", "feuille_cantonale", 0.04),
+    ("feuille_cantonale_zh.txt", "ZH", "feuille_cantonale", 0.04),
+    ("feuille_cantonale_bs.txt", "BS", "feuille_cantonale", 0.04),
+]
+
+FILTERS = [
+    {"canton": "GE"},
+    {"canton": ["GE", "VD"]},
+    {"doc_type": "comparatif"},
+    {"doc_type": "bofip"},
+]
+
+
+def write_store(directory: Path, n: int, seed: int = 0) -> None:
+    """Store de chunks synthetique (textes factices, metadonnees realistes)"""
+    rng = np.random.default_rng(seed)
+    weights = np.array([w for *_, w in CORPUS_MIX])
+    sources = rng.choice(len(CORPUS_MIX), size=n, p=weights / weights.sum())
+    with ChunkStoreWriter(directory) as writer:
+        for i, source in enumerate(sources):
+            filename, canton, doc_type, _ = CORPUS_MIX[source]
+            # Label du chunk i = i (meme ordre que les vecteurs)
+            writer.add(f"{i:012x}", f"chunk {i}", {
+                "source": filename, "chunk_index": i, "canton": canton, "doc_type": doc_type, "language": "fr"
+            })
+
+
+def exact_filtered(vectors: np.ndarray, allowed: np.ndarray, query: np.ndarray, k: int) -> set:
+    rows = np.flatnonzero(allowed)
+    distances = ((vectors[rows] - query) ** 2).sum(axis=1)
+    return set(rows[np.argsort(distances)[:k]].tolist())
+
+
+def run(queries: np.ndarray, k: int, filters, strategy: str):
+    latencies = np.empty(len(queries))
+    results = []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        hits = rag_fiscal.search_vector(query, k, filters, strategy=strategy)
+        latencies[i] = time.perf_counter() - start
+        results.append([row for row, _ in hits])
+    return latencies, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=50_000, help="Nombre de chunks synthetiques")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--types", nargs="+", default=["flat", "hnsw"],
+                        choices=[t for t in index_factory.INDEX_TYPES if t != "auto"])
+    args = parser.parse_args()
+
+    vectors, queries = synthetic_corpus(args.n, args.dim, args.queries)
+    store_dir = Path(tempfile.mkdtemp())
+    write_store(store_dir, args.n)
+    store = ChunkStore(store_dir)
+
+    print("=" * 92)
+    print(f"BENCHMARK RAG FILTRE - {args.n:,} chunks, {args.queries} requetes, k={args.k}")
+    print("=" * 92)
+    print(f"{'Index':<7} {'Filtre':<28} {'Part':>6} {'Strategie':<11} {'p50 (us)':>9} {'p99 (us)':>9} "
+          f"{'Rappel@k':>9} {'Resultats':>9}")
+    print("-" * 92)
+
+    parity_ok = True
+    for index_type in args.types:
+        try:
+            spec = index_factory.choose_index_spec(args.n, args.dim, index_type)
+        except ValueError as e:
+            print(f"{index_type:<7} ignore: {e}")
+            continue
+        # Meme format que index_faiss.py: IndexIDMap2 dont les ids sont les labels du store
+        index = index_factory.build_index(vectors, spec, ids=np.arange(args.n, dtype=np.int64))
+        # Meme chemin que l'API, sans relire l'index depuis le disque
+        rag_fiscal._index, rag_fiscal._chunk_store = index, store
+
+        for filters in FILTERS:
+            allowed = store.row_mask(filters)
+            truth = [exact_filtered(vectors, allowed, q, args.k) for q in queries]
+            by_strategy = {}
+
+            for strategy in rag_fiscal.FILTER_STRATEGIES:
+                run(queries[:20], args.k, filters, strategy)  # chauffe (selecteur en cache)
+                latencies, results = run(queries, args.k, filters, strategy)
+                by_strategy[strategy] = results
+                p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+                recall = np.mean([len(set(r) & t) / len(t) for r, t in zip(results, truth)])
+                found = np.mean([len(r) for r in results])
+                label = ", ".join(f"{key}={value}" for key, value in filters.items())
+                print(f"{spec.kind:<7} {label:<28} {allowed.mean():>6.1%} {strategy:<11} {p50:>9.0f} "
+                      f"{p99:>9.0f} {recall:>9.3f} {found:>9.1f}")
+
+            if spec.kind == "flat" and by_strategy["prefilter"] != by_strategy["postfilter"]:
+                parity_ok = False
+                print(f"[PARITE] ECHEC: resultats differents pour {filters}")
+
+    print("=" * 92)
+    print(f"[PARITE] pre-filtrage vs post-filtrage (index plat) -> {'OK' if parity_ok else 'ECHEC'}")
+    return 0 if parity_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Benchmark RAG hybride - vecteur seul vs BM25 vs fusion RRF
+==========================================================
+Mesure le surcout de la recherche hybride (services/rag_fiscal.search_rows)
+par rapport a la recherche vectorielle seule, embedding de la requete
+exclu (identique dans les deux cas):
+  - latence p50/p99 d'une requete par mode
+  - taux de succes: le chunk cible (dont la requete reprend des termes
+    rares) est-il dans les k premiers resultats
+  - cache de requetes (services/query_cache.py, via rag_fiscal.search):
+    chaque requete puis une reformulation (mots melanges + un mot frequent,
+    embedding a cosinus ~0.98); taux de correspondance exacte / semantique
+    et part des reponses en cache identiques a une recherche sans cache
+
+Corpus synthetique par defaut (textes a vocabulaire zipfien, vecteurs
+groupes en clusters); --corpus utilise l'index et le store existants.
+
+Code retour 1 si le p50 hybride depasse le p50 vectoriel de plus de
+--budget-ms millisecondes.
+
+Usage:
+    python benchmarks/bench_rag_hybrid.py [--n 50000] [--queries 300] [--k 8] [--budget-ms 5]
+    python benchmarks/bench_rag_hybrid.py --corpus
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from _paths import setup_paths
+
+setup_paths()
+
+from bench_rag_index import synthetic_corpus  # noqa: E402
+
+import config  # noqa: E402
+import index_factory  # noqa: E402
+from services import rag_fiscal  # noqa: E402
+from services.bm25_index import BM25Index, BM25Writer  # noqa: E402
+from services.chunk_store import ChunkStore, ChunkStoreWriter  # noqa: E402
+from services.query_cache import QueryCache  # noqa: E402
+
+VOCABULARY_SIZE = 30_000
+WORDS_PER_CHUNK = 150
+WORDS_PER_QUERY = 6
+
+
+# ============================================
+# CORPUS
+# ============================================
+
+def synthetic_texts(n: int, seed: int = 0):
+    """Textes de mots factices tires selon une loi de Zipf (quelques mots frequents, beaucoup de rares)"""
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i:05d}" for i in range(VOCABULARY_SIZE)])
+    ranks = np.arange(1, VOCABULARY_SIZE + 1)
+    probabilities = (1 / ranks) / (1 / ranks).sum()
+    draws = rng.choice(VOCABULARY_SIZE, size=(n, WORDS_PER_CHUNK), p=probabilities)
+    return [" ".join(words[row]) for row in draws], words, draws
+
+
+def synthetic_queries(draws: np.ndarray, words: np.ndarray, n_queries: int, seed: int = 1):
+    """Requetes: chunk cible + ses mots les plus rares (termes exacts)"""
+    rng = np.random.default_rng(seed)
+    targets = rng.integers(len(draws), size=n_queries)
+    texts = [" ".join(words[np.sort(np.unique(draws[t]))[-WORDS_PER_QUERY:]]) for t in targets]
+    return texts, targets
+
+
+def write_synthetic_index(directory: Path, texts, vectors: np.ndarray):
+    with ChunkStoreWriter(directory) as store, BM25Writer(directory) as bm25:
+        for i, text in enumerate(texts):
+            # Label du chunk i = i (meme ordre que les vecteurs)
+            store.add(f"{i:012x}", text, {
+                "source": "synthetique.txt", "chunk_index": i, "canton": "GE", "doc_type": "bofip", "language": "fr"
+            })
+            bm25.add(text)
+    spec = index_factory.choose_index_spec(len(vectors), vectors.shape[1])
+    index = index_factory.build_index(vectors, spec, ids=np.arange(len(vectors), dtype=np.int64))
+    return index, ChunkStore(directory), BM25Index(directory)
+
+
+def real_queries(n_queries: int, seed: int = 42):
+    """Index existant; requetes = 8 premiers mots de chunks tires au hasard"""
+    rag_fiscal.load_index()
+    store = rag_fiscal.get_chunk_store()
+    rng = np.random.default_rng(seed)
+    targets = rng.integers(len(store), size=n_queries)
+    texts = [" ".join(store.text(int(t)).split()[:8]) for t in targets]
+    vectors = np.concatenate([rag_fiscal.encode_query(t) for t in texts])
+    return texts, vectors, targets
+
+
+# ============================================
+# MESURES
+# ============================================
+
+def run(texts, vectors: np.ndarray, k: int, mode: str):
+    latencies = np.empty(len(texts))
+    results = []
+    for i, (text, vector) in enumerate(zip(texts, vectors)):
+        start = time.perf_counter()
+        _, hits = rag_fiscal.search_rows(text, vector, k, mode=mode)
+        latencies[i] = time.perf_counter() - start
+        results.append([row for row, _ in hits])
+    return latencies, results
+
+
+def paraphrases(texts, vectors: np.ndarray, filler: str, seed: int = 3):
+    """Reformulations: memes mots dans un autre ordre + un mot frequent, embedding voisin"""
+    rng = np.random.default_rng(seed)
+    rephrased = []
+    for text in texts:
+        words = text.split()
+        rng.shuffle(words)
+        rephrased.append(" ".join(words + [filler]))
+    noisy = vectors + 0.01 * rng.normal(size=vectors.shape).astype(np.float32)
+    return rephrased, noisy / np.linalg.norm(noisy, axis=1, keepdims=True)
+
+
+def cache_hit_rates(texts, vectors: np.ndarray, k: int, mode: str, filler: str):
+    """
+    (stats du cache, part des reformulations servies par le cache avec les
+    memes chunks qu'une recherche sans cache)
+    """
+    rephrased, rephrased_vectors = paraphrases(texts, vectors, filler)
+    by_text = dict(zip(texts, vectors))
+    by_text.update(zip(rephrased, rephrased_vectors))
+    # L'embedding n'est pas mesure: vecteurs precalcules
+    rag_fiscal.encode_query = lambda text: by_text[text][None, :]
+
+    rag_fiscal._query_cache = QueryCache(0)
+    fresh = [[r["id"] for r in rag_fiscal.search(text, k, mode=mode)] for text in rephrased]
+
+    cache = rag_fiscal._query_cache = QueryCache(len(texts) * 2, config.RAG_QUERY_CACHE_SIMILARITY)
+    for text in texts:
+        rag_fiscal.search(text, k, mode=mode)
+    served = []
+    for text, expected in zip(rephrased, fresh):
+        hits_before = cache.hits["semantic"]
+        results = [r["id"] for r in rag_fiscal.search(text, k, mode=mode)]
+        if cache.hits["semantic"] > hits_before:
+            served.append(results == expected)
+    return cache.stats(), float(np.mean(served)) if served else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=50_000, help="Nombre de chunks synthetiques")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--budget-ms", type=float, default=5.0, help="Surcout p50 admis pour le mode hybride")
+    parser.add_argument("--corpus", action="store_true", help="Utiliser l'index et le store existants")
+    args = parser.parse_args()
+
+    if args.corpus:
+        texts, query_vectors, targets = real_queries(args.queries)
+        n = len(rag_fiscal.get_chunk_store())
+    else:
+        chunk_texts, words, draws = synthetic_texts(args.n)
+        vectors, _ = synthetic_corpus(args.n, args.dim, 0)
+        texts, targets = synthetic_queries(draws, words, args.queries)
+        # Requete vectorielle proche du chunk cible (l'embedding n'est pas mesure)
+        noise = np.random.default_rng(2).normal(size=(args.queries, args.dim)).astype(np.float32)
+        query_vectors = vectors[targets] + 0.15 * noise
+        query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+
+        start = time.perf_counter()
+        index, store, bm25 = write_synthetic_index(Path(tempfile.mkdtemp()), chunk_texts, vectors)
+        print(f"[BUILD] Store + BM25 + index: {time.perf_counter() - start:.1f}s")
+        # Meme chemin que l'API, sans relire l'index depuis le disque
+        rag_fiscal._index, rag_fiscal._chunk_store, rag_fiscal._bm25 = index, store, bm25
+        n = args.n
+
+    print("=" * 72)
+    print(f"BENCHMARK RAG HYBRIDE - {n:,} chunks, {len(texts)} requetes, k={args.k}")
+    print("=" * 72)
+    print(f"{'Mode':<8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'Surcout p50':>12} {'Cible @k':>9}")
+    print("-" * 72)
+
+    p50_by_mode = {}
+    for mode in ("vector", "bm25", "hybrid"):
+        run(texts[:20], query_vectors[:20], args.k, mode)  # chauffe
+        latencies, results = run(texts, query_vectors, args.k, mode)
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+        p50_by_mode[mode] = p50
+        hit_rate = np.mean([int(t) in r for r, t in zip(results, targets)])
+        overhead = p50 - p50_by_mode["vector"]
+        print(f"{mode:<8} {p50:>9.2f} {p99:>9.2f} {overhead:>+11.2f}ms {hit_rate:>9.1%}")
+
+    print("-" * 72)
+    print(f"{'Cache':<8} {'Exact':>9} {'Semantique':>11} {'Taux':>8} {'Identiques':>11}")
+    filler = "de" if args.corpus else "w00000"
+    for mode in ("vector", "hybrid"):
+        stats, same = cache_hit_rates(texts, query_vectors, args.k, mode, filler)
+        print(f"{mode:<8} {stats['exact_hits']:>9} {stats['semantic_hits']:>11} {stats['hit_rate']:>8.1%} "
+              f"{same:>11.1%}")
+
+    overhead = p50_by_mode["hybrid"] - p50_by_mode["vector"]
+    ok = overhead <= args.budget_ms
+    print("=" * 72)
+    print(f"[BUDGET] surcout hybride p50 {overhead:+.2f}ms (max {args.budget_ms}ms) -> {'OK' if ok else 'ECHEC'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark index RAG - rappel@k vs latence (flat / HNSW / IVF-PQ)
+================================================================
+Construit chaque type d'index de ml_training/index_factory.py sur le meme
+corpus et le compare a la recherche exacte (IndexFlatL2):
+  - temps de construction (entrainement inclus) et taille serialisee
+  - rappel@k par rapport aux k voisins exacts
+  - latence p50/p99 d'une requete unitaire et debit en batch
+pour plusieurs valeurs de efSearch (HNSW) et nprobe (IVF-PQ).
+
+Par defaut le corpus est synthetique (vecteurs groupes en clusters, proches
+d'embeddings de phrases); --corpus encode les chunks de l'index existant.
+
+Usage:
+    python benchmarks/bench_rag_index.py [--n 50000] [--queries 500] [--k 10]
+    python benchmarks/bench_rag_index.py --corpus
+"""
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from _paths import setup_paths
+
+setup_paths()
+
+import index_factory  # noqa: E402
+
+EF_SEARCH_VALUES = [16, 32, 64, 128, 256]
+NPROBE_VALUES = [1, 4, 16, 64, 256]
+
+
+# ============================================
+# CORPUS
+# ============================================
+
+def synthetic_corpus(n: int, dim: int, n_queries: int, seed: int = 42):
+    """Vecteurs normalises groupes en clusters + requetes proches du corpus"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, n // 200), dim)).astype(np.float32)
+    vectors = centers[rng.integers(len(centers), size=n)] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    queries = vectors[rng.integers(n, size=n_queries)] + 0.1 * rng.normal(size=(n_queries, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.ascontiguousarray(vectors), np.ascontiguousarray(queries.astype(np.float32))
+
+
+def real_corpus(n_queries: int, seed: int = 42):
+    """Encode les chunks du store existant; requetes = debuts de chunks"""
+    from services import rag_fiscal
+    from services.chunk_store import ChunkStore
+
+    store = ChunkStore(rag_fiscal.FAISS_INDEX_DIR)
+    texts = [store.text(i) for i in range(len(store))]
+    model = rag_fiscal.load_embedding_model()
+    vectors = np.asarray(model.encode(texts, batch_size=64), dtype=np.float32)
+
+    rng = np.random.default_rng(seed)
+    picked = rng.integers(len(texts), size=n_queries)
+    queries = np.asarray(model.encode([texts[i][:120] for i in picked]), dtype=np.float32)
+    return vectors, queries
+
+
+# ============================================
+# MESURES
+# ============================================
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def measure(index, queries: np.ndarray, k: int):
+    """Latences unitaires (s), debit batch (req/s) et resultats"""
+    latencies = np.empty(len(queries))
+    for i in range(len(queries)):
+        start = time.perf_counter()
+        index.search(queries[i:i + 1], k)
+        latencies[i] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, ids = index.search(queries, k)
+    qps = len(queries) / (time.perf_counter() - start)
+    return latencies, qps, ids
+
+
+def index_size_mb(index) -> float:
+    return faiss.serialize_index(index).nbytes / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=50_000, help="Taille du corpus synthetique")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension (MiniLM-L12 = 384)")
+    parser.add_argument("--queries", type=int, default=500, help="Nombre de requetes mesurees")
+    parser.add_argument("--k", type=int, default=10, help="Voisins demandes (rappel@k)")
+    parser.add_argument("--types", nargs="+", default=["flat", "hnsw", "ivfpq"],
+                        choices=[t for t in index_factory.INDEX_TYPES if t != "auto"])
+    parser.add_argument("--corpus", action="store_true", help="Encoder les chunks de l'index existant")
+    parser.add_argument("--threads", type=int, default=1, help="Threads OpenMP faiss (1 = latence d'un worker)")
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+
+    if args.corpus:
+        vectors, queries = real_corpus(args.queries)
+    else:
+        vectors, queries = synthetic_corpus(args.n, args.dim, args.queries)
+    n, dim = vectors.shape
+
+    auto = index_factory.choose_index_spec(n, dim)
+    print("=" * 86)
+    print(f"BENCHMARK INDEX RAG - {n:,} vecteurs {dim}d, {len(queries)} requetes, k={args.k}")
+    print(f"Choix auto pour ce corpus: {auto.describe()}")
+    print("=" * 86)
+
+    # Verite terrain: recherche exacte
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{'Index':<34} {'Build (s)':>9} {'Taille (MB)':>11} {'Rappel@k':>9} "
+          f"{'p50 (us)':>9} {'p99 (us)':>9} {'Req/s':>9}")
+    print("-" * 86)
+
+    for index_type in args.types:
+        try:
+            spec = index_factory.choose_index_spec(n, dim, index_type)
+        except ValueError as e:
+            print(f"{index_type:<34} ignore: {e}")
+            continue
+
+        start = time.perf_counter()
+        index = index_factory.build_index(vectors, spec)
+        build_s = time.perf_counter() - start
+        size_mb = index_size_mb(index)
+
+        # Balayage du parametre de recherche (rappel vs latence)
+        if spec.kind == "hnsw":
+            variants = [index_factory.IndexSpec(**{**spec.__dict__, "ef_search": ef}) for ef in EF_SEARCH_VALUES]
+        elif spec.kind == "ivfpq":
+            nlist = faiss.extract_index_ivf(index).nlist
+            variants = [index_factory.IndexSpec(**{**spec.__dict__, "nprobe": p})
+                        for p in NPROBE_VALUES if p <= nlist]
+        else:
+            variants = [spec]
+
+        for variant in variants:
+            index_factory.set_search_params(index, variant)
+            latencies, qps, ids = measure(index, queries, args.k)
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+            label = variant.kind
+            if variant.ef_search is not None:
+                label += f" efSearch={variant.ef_search}"
+            if variant.nprobe is not None:
+                label += f" nprobe={variant.nprobe}"
+            print(f"{label:<34} {build_s:>9.2f} {size_mb:>11.1f} {recall_at_k(ids, truth):>9.3f} "
+                  f"{p50:>9.0f} {p99:>9.0f} {qps:>9,.0f}")
+
+    print("=" * 86)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Benchmark qualite RAG - rappel@k, MRR, construction, taille, latence
+=====================================================================
+Evalue le RAG fiscal sur un jeu de requetes etiquetees (rag_queries.json:
+requete -> fichiers sources attendus) pour chaque configuration:
+  - decoupage CHUNK_SIZE:CHUNK_OVERLAP (1000:200 dans index_faiss.py,
+    500:100 dans le cahier des charges)
+  - modele et backend d'embedding
+  - type d'index (flat / hnsw / ivfpq) et mode de recherche (vector / bm25 / hybrid)
+
+Mesures par configuration:
+  - rappel@k (part des sources attendues retrouvees dans les k premiers chunks) et MRR
+  - temps de construction (decoupage, embeddings, index) et taille (index, store + BM25)
+  - latence p50/p99 de la recherche (embedding de la requete mesure a part)
+
+Les documents sont ceux de ml_training/index_faiss.py (backend/data/rag/fiscal);
+les requetes dont aucune source attendue n'est presente sont ignorees.
+Les resultats sont ecrits en JSON (--output) pour etre compares entre commits.
+
+Usage:
+    python benchmarks/bench_rag_quality.py
+    python benchmarks/bench_rag_quality.py --chunking 1000:200 500:100 300:50 --types flat hnsw --modes vector hybrid
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from _paths import BACKEND_DIR, setup_paths
+
+setup_paths()
+
+
+import index_factory  # noqa: E402
+import index_faiss  # noqa: E402
+from embedding_pipeline import EmbeddingPipeline  # noqa: E402
+from services import rag_fiscal  # noqa: E402
+from services.bm25_index import BM25Index, BM25Writer  # noqa: E402
+from services.chunk_store import ChunkStore, ChunkStoreWriter  # noqa: E402
+from services.embedding_backend import (  # noqa: E402
+    EMBEDDING_BACKENDS, cache_model_name, l2_normalize, load_embedder,
+)
+from services.embedding_cache import EmbeddingCache  # noqa: E402
+
+QUERIES_PATH = Path(__file__).parent / "rag_queries.json"
+RESULTS_PATH = Path(__file__).parent / "results" / "rag_quality.json"
+
+DEFAULT_CHUNKING = ["1000:200", "500:100"]
+
+
+# ============================================
+# CORPUS ET REQUETES
+# ============================================
+
+def load_documents():
+    """(fichier, texte, metadonnees) des documents presents dans RAG_DATA_DIR"""
+    return [
+        (filename, (index_faiss.RAG_DATA_DIR / filename).read_text(encoding="utf-8"), meta)
+        for filename, meta in index_faiss.DOCUMENTS_META.items()
+        if (index_faiss.RAG_DATA_DIR / filename).exists()
+    ]
+
+
+def load_queries(available_sources):
+    queries = json.loads(QUERIES_PATH.read_text(encoding="utf-8"))
+    kept = [q for q in queries if set(q["sources"]) & available_sources]
+    return kept, len(queries) - len(kept)
+
+
+def chunk_corpus(documents, chunk_size: int, chunk_overlap: int):
+    chunks = []
+    for filename, text, meta in documents:
+        chunks.extend(index_faiss.create_chunks_from_text(filename, text, meta, chunk_size, chunk_overlap))
+    return chunks
+
+
+def write_store(directory: Path, chunks) -> None:
+    with ChunkStoreWriter(directory) as store, BM25Writer(directory) as bm25:
+        for c in chunks:
+            store.add(c.id, c.text, c.metadata)
+            bm25.add(c.text)
+
+
+def directory_size_mb(directory: Path) -> float:
+    return sum(f.stat().st_size for f in directory.iterdir() if f.is_file()) / 1e6
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================
+# MESURES
+# ============================================
+
+def evaluate(queries, query_vectors: np.ndarray, ks, mode: str, repeat: int, min_similarity: float):
+    """Rappel@k, MRR, nombre moyen de resultats et latences (s) de rag_fiscal.search_rows sur l'index charge"""
+    max_k = max(ks)
+    recalls = {k: [] for k in ks}
+    reciprocal_ranks = []
+    n_results = []
+    latencies = []
+
+    for query, vector in zip(queries, query_vectors):
+        expected = set(query["sources"])
+        store, hits = rag_fiscal.search_rows(query["query"], vector, max_k, mode=mode, min_similarity=min_similarity)
+        sources = [store.metadata(row)["source"] for row, _ in hits]
+        n_results.append(len(hits))
+
+        for k in ks:
+            recalls[k].append(len(expected & set(sources[:k])) / len(expected))
+        rank = next((i for i, source in enumerate(sources, start=1) if source in expected), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rag_fiscal.search_rows(query["query"], vector, max_k, mode=mode, min_similarity=min_similarity)
+            latencies.append(time.perf_counter() - start)
+
+    quality = {f"recall@{k}": round(float(np.mean(recalls[k])), 4) for k in ks}
+    quality["mrr"] = round(float(np.mean(reciprocal_ranks)), 4)
+    quality["mean_results"] = round(float(np.mean(n_results)), 2)
+    return quality, np.asarray(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunking", nargs="+", default=DEFAULT_CHUNKING, help="CHUNK_SIZE:CHUNK_OVERLAP")
+    parser.add_argument("--models", nargs="+", default=[index_faiss.EMBEDDING_MODEL])
+    parser.add_argument("--backend", default="torch", choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--types", nargs="+", default=["flat", "hnsw"],
+                        choices=[t for t in index_factory.INDEX_TYPES if t != "auto"])
+    parser.add_argument("--modes", nargs="+", default=list(rag_fiscal.SEARCH_MODES), choices=rag_fiscal.SEARCH_MODES)
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 4, 10], help="Valeurs de k du rappel")
+    parser.add_argument("--min-similarity", type=float, default=-1.0,
+                        help="Seuil de similarite cosinus (-1 = aucune coupure, pour comparer le rappel)")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions de chaque requete pour la latence")
+    parser.add_argument("--workers", type=int, default=1, help="Processus d'encodage du corpus")
+    parser.add_argument("--no-cache", action="store_true", help="Ne pas reutiliser le cache d'embeddings")
+    parser.add_argument("--output", type=Path, default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    documents = load_documents()
+    if not documents:
+        print(f"[ERROR] Aucun document dans {index_faiss.RAG_DATA_DIR}")
+        return 1
+    queries, skipped = load_queries({filename for filename, _, _ in documents})
+    texts = [q["query"] for q in queries]
+
+    print("=" * 110)
+    print(f"BENCHMARK QUALITE RAG - {len(documents)} documents, {len(queries)} requetes "
+          f"({skipped} ignorees: sources absentes)")
+    print("=" * 110)
+    header = " ".join(f"{'R@' + str(k):>6}" for k in args.k)
+    print(f"{'Decoupage':<10} {'Index':<7} {'Mode':<7} {'Chunks':>7} {'Build (s)':>9} {'Taille (MB)':>11} "
+          f"{header} {'MRR':>6} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    print("-" * 110)
+
+    results = []
+    for model_name in args.models:
+        embedder = load_embedder(args.backend, model_name, index_faiss.EMBEDDING_ONNX_DIR)
+        query_vectors = embedder.encode(texts)
+        embed_latencies = []
+        for text in texts:
+            start = time.perf_counter()
+            embedder.encode([text])
+            embed_latencies.append(time.perf_counter() - start)
+        query_embedding_ms = {
+            "p50": round(float(np.percentile(embed_latencies, 50) * 1e3), 3),
+            "p99": round(float(np.percentile(embed_latencies, 99) * 1e3), 3),
+        }
+
+        cache = EmbeddingCache(index_faiss.EMBEDDING_CACHE_DIR, cache_model_name(model_name, args.backend),
+                               max_rows=0 if args.no_cache else 500_000)
+
+        for chunking in args.chunking:
+            chunk_size, chunk_overlap = (int(v) for v in chunking.split(":"))
+
+            start = time.perf_counter()
+            chunks = chunk_corpus(documents, chunk_size, chunk_overlap)
+            chunk_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with EmbeddingPipeline(model_name, cache, workers=args.workers, backend=args.backend,
+                                   onnx_root=index_faiss.EMBEDDING_ONNX_DIR) as pipeline:
+                vectors = pipeline.encode([c.text for c in chunks])
+            embed_s = time.perf_counter() - start
+
+            store_dir = Path(tempfile.mkdtemp())
+            write_store(store_dir, chunks)
+            store, bm25 = ChunkStore(store_dir), BM25Index(store_dir)
+            labels = index_faiss.chunk_labels([c.id for c in chunks])
+
+            for index_type in args.types:
+                try:
+                    spec = index_factory.choose_index_spec(len(chunks), vectors.shape[1], index_type)
+                except ValueError as e:
+                    print(f"{chunking:<10} {index_type:<7} ignore: {e}")
+                    continue
+
+                start = time.perf_counter()
+                # Meme index que ml_training/index_faiss.py: embeddings normalises, produit scalaire
+                index = index_factory.build_index(l2_normalize(vectors), spec, index_faiss.FAISS_METRIC, ids=labels)
+                index_s = time.perf_counter() - start
+                index_mb = faiss.serialize_index(index).nbytes / 1e6
+                store_mb = directory_size_mb(store_dir)
+
+                # Meme chemin que l'API, sans ecrire l'index sur disque
+                rag_fiscal._index, rag_fiscal._chunk_store, rag_fiscal._bm25 = index, store, bm25
+
+                for mode in args.modes:
+                    quality, latencies = evaluate(queries, query_vectors, args.k, mode, args.repeat,
+                                                   args.min_similarity)
+                    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+                    build_s = chunk_s + embed_s + index_s
+                    print(f"{chunking:<10} {spec.kind:<7} {mode:<7} {len(chunks):>7} {build_s:>9.1f} "
+                          f"{index_mb + store_mb:>11.2f} "
+                          + " ".join(f"{quality[f'recall@{k}']:>6.3f}" for k in args.k)
+                          + f" {quality['mrr']:>6.3f} {p50:>9.2f} {p99:>9.2f}")
+
+                    results.append({
+                        "model": model_name,
+                        "backend": args.backend,
+                        "chunk_size": chunk_size,
+                        "chunk_overlap": chunk_overlap,
+                        "index_type": spec.kind,
+                        "index_spec": spec.describe(),
+                        "mode": mode,
+                        "chunks": len(chunks),
+                        "build_s": {"chunking": round(chunk_s, 3), "embedding": round(embed_s, 3),
+                                    "index": round(index_s, 3), "total": round(build_s, 3)},
+                        "embedded_chunks": pipeline.encoded,
+                        "size_mb": {"index": round(index_mb, 3), "store_bm25": round(store_mb, 3)},
+                        "quality": quality,
+                        "search_ms": {"p50": round(float(p50), 3), "p99": round(float(p99), 3)},
+                        "query_embedding_ms": query_embedding_ms,
+                    })
+            store.close()
+
+    print("=" * 110)
+    report = {
+        "benchmark": "rag_quality",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "queries": len(queries),
+        "queries_skipped": skipped,
+        "documents": len(documents),
+        "k": args.k,
+        "min_similarity": args.min_similarity,
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=1), encoding="utf-8")
+    print(f"[OK] Resultats: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Benchmark features du modele de loyers - pandas ligne a ligne vs transformer
+============================================================================
+Compare, sur un dataset nettoye synthetique (colonnes lues par train_immo_ch.py):
+  - entrainement historique : df.apply(calculate_distance_from_center, axis=1),
+                              LabelEncoder, groupby().transform(lambda) pour
+                              les pieces
+  - transformer             : rent_features.RentFeatureTransformer.fit()
+                              puis transform() (NumPy colonnaire)
+
+et, cote production, l'ancien build_feature_vector du router (dict, Python
+scalaire) a transform_one() (un bien, chemin de build_feature_vector),
+transform() sur une ligne et transform() sur le lot.
+
+Verifications (code retour 1 sinon):
+  - matrice d'entrainement identique a l'ancien feature engineering
+    (memes lignes gardees, valeurs a RTOL pres: x ** 2 sur un scalaire
+    Python et sur un tableau NumPy peuvent differer d'un ulp)
+  - etat sauvegarde / recharge: memes features
+  - etat legacy identique a l'ancien router (a RTOL pres)
+  - transform_one() == transform() bit a bit, etat legacy et etat appris
+
+Usage:
+    python benchmarks/bench_rent_features.py [--rows 200000] [--requests 5000]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from _paths import setup_paths
+
+setup_paths()
+
+from services.rent_features import (  # noqa: E402
+    CITY_CENTERS, FEATURE_NAMES, SIZE_BINS, RentFeatureTransformer,
+)
+
+RTOL = 1e-12
+
+# 'Centre': ville hors CITY_CENTERS (distance inconnue, lignes ecartees)
+CITIES = list(CITY_CENTERS) + ['Centre']
+
+
+# ============================================
+# DONNEES SYNTHETIQUES
+# ============================================
+
+def synthetic_dataset(n: int, seed: int = 42) -> pd.DataFrame:
+    """Colonnes de CLEAN_FINAL_DATASET lues par train_immo_ch.py (NaN realistes)"""
+    rng = np.random.default_rng(seed)
+    city = rng.choice(CITIES, n, p=[0.3, 0.3, 0.2, 0.19, 0.01])
+    center = np.array([CITY_CENTERS.get(c, (46.8, 8.2)) for c in city])
+    surface = np.round(rng.lognormal(4.8, 0.9, n).clip(5, 5000), 1)
+    df = pd.DataFrame({
+        'latitude': np.where(rng.random(n) < 0.95, center[:, 0] + rng.normal(0, 0.02, n), np.nan),
+        'longitude': np.where(rng.random(n) < 0.95, center[:, 1] + rng.normal(0, 0.02, n), np.nan),
+        'city_normalized': city,
+        'surface': surface,
+        'pieces': np.where(rng.random(n) < 0.6, np.round(np.maximum(1, surface / rng.uniform(15, 40, n)) * 2) / 2,
+                           np.nan),
+        'etage': np.where(rng.random(n) < 0.6, rng.integers(-1, 12, n), np.nan),
+        'source_bien_type': rng.choice(['Bureau', 'Commercial'], n, p=[0.7, 0.3]),
+        'has_parking': pd.array(np.where(rng.random(n) < 0.8, rng.random(n) < 0.4, None), dtype='boolean'),
+        'has_lift': pd.array(np.where(rng.random(n) < 0.8, rng.random(n) < 0.5, None), dtype='boolean'),
+        'price': rng.lognormal(8, 0.8, n),
+    })
+    # MEME DECOUPAGE QUE preprocess.filter_and_validate
+    df['categorie_taille'] = pd.cut(df['surface'], bins=SIZE_BINS, labels=list('ABCDEF'))
+    return df
+
+
+# ============================================
+# ANCIEN CALCUL (reference)
+# ============================================
+
+def label_encode(values: pd.Series) -> np.ndarray:
+    """LabelEncoder().fit_transform (rang de la valeur triee)"""
+    return np.unique(values.to_numpy(), return_inverse=True)[1]
+
+
+def legacy_training_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Feature engineering de train_immo_ch.py avant le transformer"""
+    df_ml = df.copy()
+
+    def calculate_distance_from_center(row):
+        if row['city_normalized'] in CITY_CENTERS:
+            center_lat, center_lon = CITY_CENTERS[row['city_normalized']]
+            return np.sqrt(((row['latitude'] - center_lat) * 111)**2 + ((row['longitude'] - center_lon) * 85)**2)
+        return None
+
+    df_ml['distance_centre'] = df_ml.apply(calculate_distance_from_center, axis=1)
+    df_ml['surface_log'] = np.log1p(df_ml['surface'])
+    df_ml['surface_squared'] = df_ml['surface'] ** 2
+    df_ml['ville_encoded'] = label_encode(df_ml['city_normalized'])
+    df_ml['type_bien_encoded'] = label_encode(df_ml['source_bien_type'])
+    df_ml['has_parking_int'] = df_ml['has_parking'].fillna(False).astype(int)
+    df_ml['has_lift_int'] = df_ml['has_lift'].fillna(False).astype(int)
+    df_ml['etage_filled'] = df_ml['etage'].fillna(-1)
+    df_ml['is_ground_floor'] = (df_ml['etage_filled'] == 0).astype(int)
+    df_ml['is_high_floor'] = (df_ml['etage_filled'] >= 5).astype(int)
+    df_ml['etage_unknown'] = (df_ml['etage'].isna()).astype(int)
+    df_ml['pieces_filled'] = df_ml.groupby(['city_normalized', 'categorie_taille'], observed=True)['pieces'].transform(
+        lambda x: x.fillna(x.median())
+    )
+    df_ml['pieces_filled'] = df_ml['pieces_filled'].fillna(df_ml['pieces'].median())
+    df_ml['pieces_unknown'] = (df_ml['pieces'].isna()).astype(int)
+    df_ml['surface_ville'] = df_ml['surface'] * df_ml['ville_encoded']
+    df_ml['surface_distance'] = df_ml['surface'] * df_ml['distance_centre']
+
+    df_ml = df_ml.dropna(subset=['latitude', 'longitude', 'surface', 'price', 'distance_centre'])
+    return df_ml[FEATURE_NAMES].fillna(0)
+
+
+def legacy_router_features(city, surface, lat, lon, pieces, etage, property_type, has_parking, has_lift):
+    """build_feature_vector du router avant le transformer (codes et pieces figes)"""
+    encoded = {'Basel': 0, 'Genève': 2, 'Lausanne': 3, 'Zürich': 4}[city]
+    center_lat, center_lon = CITY_CENTERS[city]
+    lat = lat or center_lat
+    lon = lon or center_lon
+    distance_centre = np.sqrt(((lat - center_lat) * 111)**2 + ((lon - center_lon) * 85)**2)
+    etage_filled = etage if etage is not None else -1
+    return [
+        lat, lon, distance_centre, encoded,
+        surface, np.log1p(surface), surface ** 2,
+        pieces if pieces is not None else max(1, surface / 25), 0 if pieces is not None else 1,
+        etage_filled, 0 if etage is not None else 1, 1 if etage == 0 else 0,
+        1 if etage is not None and etage >= 5 else 0,
+        0 if property_type == 'Bureau' else 1,
+        1 if has_parking else 0, 1 if has_lift else 0,
+        surface * encoded, surface * distance_centre,
+    ]
+
+
+# ============================================
+# TRANSFORMER
+# ============================================
+
+def training_features(df: pd.DataFrame):
+    """Chemin de train_immo_ch.py: fit + transform + lignes critiques"""
+    transformer = RentFeatureTransformer.fit(
+        df['city_normalized'], df['surface'], df['pieces'], df['source_bien_type']
+    )
+    X = pd.DataFrame(
+        transformer.transform(
+            df['city_normalized'], df['surface'],
+            latitude=df['latitude'], longitude=df['longitude'],
+            pieces=df['pieces'], etage=df['etage'], bien_type=df['source_bien_type'],
+            has_parking=df['has_parking'], has_lift=df['has_lift'],
+        ),
+        columns=FEATURE_NAMES, index=df.index,
+    )
+    critical = df[['latitude', 'longitude', 'surface', 'price']].notna().all(axis=1) & X['distance_centre'].notna()
+    return transformer, X[critical].fillna(0)
+
+
+def timed(run, *args):
+    start = time.perf_counter()
+    result = run(*args)
+    return result, time.perf_counter() - start
+
+
+def check_training(df: pd.DataFrame) -> bool:
+    expected, legacy_s = timed(legacy_training_features, df)
+    (transformer, X), transformer_s = timed(training_features, df)
+
+    print(f"{'Entrainement':<14} {'Duree (s)':>10} {'Acceleration':>13}")
+    print(f"{'pandas':<14} {legacy_s:>10.2f} {1:>12.1f}x")
+    print(f"{'transformer':<14} {transformer_s:>10.2f} {legacy_s / transformer_s:>12.1f}x")
+
+    same_rows = X.index.equals(expected.index)
+    same_values = same_rows and np.allclose(X.to_numpy(), expected.to_numpy(dtype=np.float64), rtol=RTOL, atol=0)
+    if same_rows and not same_values:
+        diff = ~np.isclose(X.to_numpy(), expected.to_numpy(dtype=np.float64), rtol=RTOL, atol=0).all(axis=0)
+        print(f"[ECART] colonnes differentes: {[n for n, d in zip(FEATURE_NAMES, diff) if d]}")
+    print(f"[PARITE] entrainement: {len(X):,} lignes x {X.shape[1]} features identiques -> "
+          f"{'OK' if same_values else 'ECHEC'}")
+
+    # Etat sauvegarde a cote du modele puis recharge (API, predict_price.py)
+    path = transformer.save(Path(tempfile.mkdtemp()) / "immo_ch_feature_state.json")
+    reloaded = RentFeatureTransformer.load(path)
+    sample = df.head(1000)
+    args = (sample['city_normalized'], sample['surface'])
+    kwargs = dict(latitude=sample['latitude'], longitude=sample['longitude'], pieces=sample['pieces'],
+                  etage=sample['etage'], bien_type=sample['source_bien_type'])
+    same_state = np.array_equal(transformer.transform(*args, **kwargs), reloaded.transform(*args, **kwargs),
+                                equal_nan=True)
+    print(f"[ETAT] sauvegarde / rechargement ({path.stat().st_size:,} octets) -> {'OK' if same_state else 'ECHEC'}")
+    return same_values and same_state, transformer
+
+
+def check_serving(n: int, fitted: RentFeatureTransformer, seed: int = 7) -> bool:
+    rng = np.random.default_rng(seed)
+    cities = list(CITY_CENTERS)
+    rows = []
+    for _ in range(n):
+        city = cities[rng.integers(len(cities))]
+        center_lat, center_lon = CITY_CENTERS[city]
+        rows.append((
+            city, float(rng.uniform(15, 1500)),
+            float(center_lat + rng.normal(0, 0.02)) if rng.random() < 0.8 else None,
+            float(center_lon + rng.normal(0, 0.02)) if rng.random() < 0.8 else None,
+            float(rng.integers(1, 30)) if rng.random() < 0.6 else None,
+            int(rng.integers(-1, 12)) if rng.random() < 0.6 else None,
+            'Bureau' if rng.random() < 0.7 else 'Commercial',
+            bool(rng.random() < 0.4), bool(rng.random() < 0.5),
+        ))
+
+    fields = ('city', 'surface', 'latitude', 'longitude', 'pieces', 'etage', 'bien_type', 'has_parking', 'has_lift')
+    requests = [dict(zip(fields, row)) for row in rows]
+    columns = {name: np.array([np.nan if v is None else v for v in values], dtype=object)
+               for name, values in zip(fields, zip(*rows))}
+
+    def serve(transformer):
+        single, single_s = timed(lambda: np.array([list(transformer.transform_one(**r).values()) for r in requests]))
+        # Ancien chemin de build_feature_vector: transform() sur une ligne
+        one_row, one_row_s = timed(lambda: np.vstack([
+            transformer.transform(**{k: None if v is None else [v] for k, v in r.items()}) for r in requests
+        ]))
+        batch, batch_s = timed(lambda: transformer.transform(**columns))
+        same = (np.array_equal(single, batch, equal_nan=True)
+                and np.array_equal(single, one_row, equal_nan=True))
+        return single, same, (single_s, one_row_s, batch_s)
+
+    expected, legacy_s = timed(lambda: np.array([legacy_router_features(*row) for row in rows], dtype=np.float64))
+    single, same_legacy, (single_s, one_row_s, batch_s) = serve(RentFeatureTransformer.legacy())
+    _, same_fitted, _ = serve(fitted)
+
+    print(f"{'Production':<18} {'us / bien':>10}")
+    print(f"{'router (dict)':<18} {legacy_s / n * 1e6:>10.1f}")
+    print(f"{'transform_one':<18} {single_s / n * 1e6:>10.1f}")
+    print(f"{'transform 1 ligne':<18} {one_row_s / n * 1e6:>10.1f}")
+    print(f"{'transform lot':<18} {batch_s / n * 1e6:>10.1f}")
+
+    legacy_ok = np.allclose(single, expected, rtol=RTOL, atol=0)
+    print(f"[PARITE] etat legacy == ancien router ({n:,} biens) -> {'OK' if legacy_ok else 'ECHEC'}")
+    print(f"[PARITE] transform_one == transform, etat legacy -> {'OK' if same_legacy else 'ECHEC'}")
+    print(f"[PARITE] transform_one == transform, etat appris -> {'OK' if same_fitted else 'ECHEC'}")
+    return legacy_ok and same_legacy and same_fitted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="Lignes du dataset synthetique")
+    parser.add_argument("--requests", type=int, default=5000, help="Biens cote production")
+    args = parser.parse_args()
+
+    df = synthetic_dataset(args.rows)
+
+    print("=" * 72)
+    print(f"BENCHMARK FEATURES LOYERS - {args.rows:,} lignes, {args.requests:,} biens")
+    print("=" * 72)
+    ok, transformer = check_training(df)
+    print("-" * 72)
+    ok &= check_serving(args.requests, transformer)
+    print("=" * 72)
+    print(f"[RESULTAT] {'OK' if ok else 'ECHEC'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+SwissRelocator - Modules de l'API partages
+==========================================
+Les scripts d'entrainement reutilisent quelques modules de l'API
+(app/services/rent_features.py: features du modele de loyers, calculees par
+le meme code a l'entrainement et en production).
+
+app/ n'est pas un paquet installe: ses modules s'importent par leur nom
+qualifie depuis app/ (services.rent_features). Plutot que d'ajouter app/ en
+tete de sys.path, ce qui rendrait importables sous leur nom nu tous ses
+modules (config, models, core...) et masquerait ceux de meme nom,
+load_app_module() charge le seul fichier voulu sous ce nom qualifie. Seuls
+des modules autonomes (sans import d'autres modules de app/) s'y pretent.
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+
+def load_app_module(qualified_name: str) -> ModuleType:
+    """Module app/<paquet>/<module>.py sous son nom qualifie (ex. services.rent_features)"""
+    # Deja importe (API, benchmarks): meme module, memes classes
+    if qualified_name in sys.modules:
+        return sys.modules[qualified_name]
+    path = APP_DIR.joinpath(*qualified_name.split(".")).with_suffix(".py")
+    spec = importlib.util.spec_from_file_location(qualified_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[qualified_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[qualified_name]
+        raise
+    return module
@@ -1,11 +1,6 @@
 import streamlit as st
-import os
-import pickle
-import faiss
+import sys
 from pathlib import Path
-from sentence_transformers import SentenceTransformer
-from dataclasses import dataclass
-from typing import Dict, List
 
 # ============================================
 # CONFIGURATION DES CHEMINS
@@ -13,14 +8,10 @@ from typing import Dict, List
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent  # SwissRelocator/
 BACKEND_DIR = PROJECT_ROOT / "backend"
-FAISS_INDEX_DIR = BACKEND_DIR / "app" / "data" / "faiss_index"
 
-# --- 1. DÉFINITION DE LA CLASSE (Doit matcher index_faiss.py) ---
-@dataclass
-class Chunk:
-    id: str
-    text: str        # <--- C'est ici que c'était 'content' avant !
-    metadata: Dict
+# --- 1. SERVICE DE RECHERCHE (partage avec l'API FastAPI) ---
+sys.path.insert(0, str(BACKEND_DIR / "app"))
+from services import rag_fiscal  # noqa: E402
 
 # --- 2. CONFIGURATION ---
 st.set_page_config(page_title="Swiss Tax RAG", page_icon="🇨🇭", layout="wide")
@@ -29,67 +20,19 @@ st.set_page_config(page_title="Swiss Tax RAG", page_icon="🇨🇭", layout="wid
 @st.cache_resource
 def load_resources():
     print("--- DÉBUT CHARGEMENT ---")
-    model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+    if not rag_fiscal.INDEX_PATH.exists():
+        return None
 
-    index_path = FAISS_INDEX_DIR / "index.faiss"
-    meta_path = FAISS_INDEX_DIR / "data.pkl"
-
-    if not index_path.exists():
-        return None, None, None
-
-    index = faiss.read_index(str(index_path))
-    
-    with open(str(meta_path), "rb") as f:
-        data_global = pickle.load(f)
-        
-        # Extraction de la liste depuis le dictionnaire
-        if isinstance(data_global, dict) and 'chunks' in data_global:
-            chunk_list = data_global['chunks']
-            print(f"✅ Liste extraite du dictionnaire. {len(chunk_list)} chunks.")
-        else:
-            chunk_list = data_global
-            print(f"⚠️ Format direct (liste). {len(chunk_list)} chunks.")
-
-    return model, index, chunk_list
+    # Index memory-mappé + store de chunks + modèle d'embedding partagé
+    rag_fiscal.load_embedding_model()
+    rag_fiscal.load_index()
+    print(f"✅ {len(rag_fiscal.get_chunk_store())} chunks.")
+    return rag_fiscal
 
 # --- 4. RECHERCHE ---
-def search(query, model, index, chunk_list, k=4):
+def search(query, k=4):
     print(f"🔍 Recherche pour: {query}")
-    query_vector = model.encode([query])
-    distances, indices = index.search(query_vector, k)
-    
-    results = []
-    
-    for i in range(k):
-        idx = indices[0][i]
-        score = distances[0][i]
-        
-        if idx < len(chunk_list):
-            chunk_obj = chunk_list[idx]
-            
-            try:
-                # --- CORRECTION ICI : Utilisation de .text ---
-                txt = chunk_obj.text 
-                meta = chunk_obj.metadata
-                
-                src = meta.get('source', 'Inconnu')
-                loc = meta.get('canton', 'N/A')
-                doc_type = meta.get('doc_type', 'Autre')
-
-                relevance = max(0, (20 - score) / 20 * 100)
-                
-                results.append({
-                    "content": txt,
-                    "source": src,
-                    "canton": loc,
-                    "type": doc_type,
-                    "score": score,
-                    "relevance": relevance
-                })
-            except Exception as e:
-                print(f"⚠️ Erreur lecture chunk {idx}: {e}")
-                
-    return results
+    return rag_fiscal.search(query, k=k)
 
 # --- 5. INTERFACE ---
 col1, col2 = st.columns([1, 6])
@@ -98,9 +41,9 @@ with col2: st.title("Comparateur Fiscal France-Suisse")
 
 # Chargement
 with st.spinner('Chargement du cerveau juridique...'):
-    model, index, chunk_list = load_resources()
+    service = load_resources()
 
-if model is None:
+if service is None:
     st.error("⚠️ Erreur : Index introuvable.")
     st.stop()
 
@@ -108,7 +51,7 @@ if model is None:
 query = st.text_input("Votre question :", placeholder="Ex: impôt frontalier Genève vs Vaud")
 
 if query:
-    results = search(query, model, index, chunk_list)
+    results = search(query)
     
     if not results:
         st.warning("Aucun résultat pertinent trouvé.")
@@ -125,4 +68,6 @@ if query:
         with st.expander(title, expanded=(i==0)):
             st.markdown(f"**Source:** `{res['source']}`")
             st.info(res['content'])
-            st.caption(f"Score FAISS : {res['score']:.4f}")
\ No newline at end of file
+            scores = [f"{name} : {res[key]:.4f}" for name, key in
+                      (("Score FAISS", "score"), ("BM25", "bm25"), ("Fusion RRF", "fusion")) if res[key] is not None]
+            st.caption(" | ".join(scores))
\ No newline at end of file
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+SwissRelocator - Dataset Store
+==============================
+Stockage colonne (Parquet) des donnees ImmoScout traitees, echangees entre
+preprocess.py, post_clean_immoscout.py et train_immo_ch.py.
+
+- un dataset par etape (data/processed/datasets/<nom>/), partitionne en
+  Hive par source_transaction / source_bien_type / city_normalized:
+  un filtre sur ces colonnes ne lit que les dossiers concernes
+- schema type (COLUMN_TYPES): nombres en float64, code postal en texte,
+  booleens, categories ordonnees (categorie_taille...) restaurees a
+  l'identique a la lecture (categories et ordre dans _schema.json)
+- projection: read_dataset(columns=[...]) ne decode que ces colonnes
+- ordre des lignes conserve (colonne interne _row), ecriture dans un
+  dossier temporaire puis remplacement du dataset precedent
+
+Remplace les CSV utf-8-sig intermediaires (re-parses a chaque etape,
+types perdus).
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent  # SwissRelocator/
+BACKEND_DIR = PROJECT_ROOT / "backend"
+DATASETS_DIR = BACKEND_DIR / "data" / "processed" / "datasets"
+
+# Datasets de la chaine d'entrainement
+FINAL_DATASET = "immoscout_suisse_final"              # preprocess.py (location + vente)
+CLEAN_FINAL_DATASET = "immoscout_suisse_clean_final"  # post_clean_immoscout.py (location)
+
+PARTITION_COLUMNS = ["source_transaction", "source_bien_type", "city_normalized"]
+
+SCHEMA_FILE = "_schema.json"   # prefixe "_": ignore par pyarrow.dataset
+ROW_COLUMN = "_row"
+MAX_ROWS_PER_FILE = 1_000_000
+
+# Types des colonnes connues (les autres: types deduits par pyarrow)
+COLUMN_TYPES = {
+    "id": pa.string(),
+    "url": pa.string(),
+    "city": pa.string(),
+    "city_normalized": pa.string(),
+    "postal_code": pa.string(),
+    "address": pa.string(),
+    "latitude": pa.float64(),
+    "longitude": pa.float64(),
+    "price": pa.float64(),
+    "surface": pa.float64(),
+    "prix_m2": pa.float64(),
+    "pieces": pa.float64(),
+    "etage": pa.float64(),
+    "property_type": pa.string(),
+    "disponibilite": pa.string(),
+    "has_parking": pa.bool_(),
+    "has_lift": pa.bool_(),
+    "title": pa.string(),
+    "scraped_at": pa.string(),
+    "nb_images": pa.int32(),
+    "source_ville": pa.string(),
+    "source_transaction": pa.string(),
+    "source_bien_type": pa.string(),
+    "source_file": pa.string(),
+    "categorie_prix": pa.string(),
+}
+
+
+# ============================================
+# SCHEMA
+# ============================================
+
+def dataset_path(name: str, directory: Path = DATASETS_DIR) -> Path:
+    return Path(directory) / name
+
+
+def dataset_exists(name: str, directory: Path = DATASETS_DIR) -> bool:
+    return (dataset_path(name, directory) / SCHEMA_FILE).exists()
+
+
+def _partitioning(columns: List[str]) -> ds.Partitioning:
+    return ds.partitioning(pa.schema([(c, pa.string()) for c in columns]), flavor="hive")
+
+
+def _categories(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Categories et ordre des colonnes categorielles (perdus par Parquet si absents des donnees)"""
+    return {
+        column: {"categories": df[column].cat.categories.tolist(), "ordered": bool(df[column].cat.ordered)}
+        for column in df.columns
+        if isinstance(df[column].dtype, pd.CategoricalDtype)
+    }
+
+
+def _coerce(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Colonnes objet heterogenes ramenees a leur type (MEME RESULTAT QU'UN
+    ALLER-RETOUR CSV): valeurs non numeriques -> NaN, valeurs non texte -> str
+    """
+    df = df.copy(deep=False)
+    for column in df.columns:
+        arrow_type = COLUMN_TYPES.get(column)
+        if arrow_type is None or df[column].dtype != object:
+            continue
+        if pa.types.is_floating(arrow_type):
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+        elif pa.types.is_string(arrow_type):
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    return df
+
+
+def to_table(df: pd.DataFrame) -> pa.Table:
+    """Table Arrow au schema type: COLUMN_TYPES, categories -> dictionnaires ordonnes"""
+    table = pa.Table.from_pandas(_coerce(df), preserve_index=False)
+    fields = []
+    for field in table.schema:
+        if pa.types.is_dictionary(field.type):
+            field = field.with_type(pa.dictionary(pa.int16(), pa.string(), ordered=field.type.ordered))
+        elif field.name in COLUMN_TYPES:
+            field = field.with_type(COLUMN_TYPES[field.name])
+        elif pa.types.is_null(field.type):
+            field = field.with_type(pa.string())   # colonne entierement vide
+        fields.append(field)
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def read_schema(name: str, directory: Path = DATASETS_DIR) -> Dict[str, Any]:
+    path = dataset_path(name, directory) / SCHEMA_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"Dataset introuvable: {path.parent} (lancer preprocess.py)")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+# ============================================
+# ECRITURE / LECTURE
+# ============================================
+
+def write_dataset(df: pd.DataFrame, name: str, directory: Path = DATASETS_DIR,
+                  partition_columns: Optional[List[str]] = None) -> Path:
+    """
+    Ecrit df en dataset Parquet partitionne (remplace la version precedente)
+
+    Returns:
+        Dossier du dataset
+    """
+    partition_columns = list(PARTITION_COLUMNS if partition_columns is None else partition_columns)
+    missing = [c for c in partition_columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes de partition absentes du DataFrame: {', '.join(missing)}")
+
+    root = dataset_path(name, directory)
+    tmp_root = root.with_name(root.name + ".tmp")
+    shutil.rmtree(tmp_root, ignore_errors=True)
+
+    table = to_table(df.assign(**{ROW_COLUMN: np.arange(len(df), dtype=np.int64)}))
+    ds.write_dataset(
+        table, tmp_root, format="parquet",
+        partitioning=_partitioning(partition_columns),
+        basename_template="part-{i}.parquet",
+        max_rows_per_file=MAX_ROWS_PER_FILE,
+        max_rows_per_group=min(MAX_ROWS_PER_FILE, 128 * 1024),
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    (tmp_root / SCHEMA_FILE).write_text(json.dumps({
+        "columns": list(df.columns),
+        "types": {f.name: str(f.type) for f in table.schema if f.name != ROW_COLUMN},
+        "partitioning": partition_columns,
+        "categories": _categories(df),
+        "rows": len(df),
+        "written_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    # Remplacement du dataset precedent (les partitions disparues ne doivent pas rester)
+    old_root = root.with_name(root.name + ".old")
+    shutil.rmtree(old_root, ignore_errors=True)
+    if root.exists():
+        os.replace(root, old_root)
+    os.replace(tmp_root, root)
+    shutil.rmtree(old_root, ignore_errors=True)
+    return root
+
+
+def _filter_expression(filters: Optional[Dict[str, Any]]):
+    """{colonne: valeur ou liste de valeurs} -> expression pyarrow (ET logique)"""
+    expression = None
+    for column, value in (filters or {}).items():
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        condition = ds.field(column).isin(values)
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_dataset(name: str, columns: Optional[Iterable[str]] = None, filters: Optional[Dict[str, Any]] = None,
+                 directory: Path = DATASETS_DIR) -> pd.DataFrame:
+    """
+    Lit un dataset ecrit par write_dataset
+
+    Args:
+        columns: colonnes a lire (projection), toutes par defaut
+        filters: {colonne: valeur(s)}; sur les colonnes de partition, seuls
+                 les fichiers concernes sont lus
+
+    Returns:
+        DataFrame dans l'ordre d'ecriture, categories restaurees
+    """
+    schema = read_schema(name, directory)
+    columns = schema["columns"] if columns is None else list(dict.fromkeys(columns))
+    unknown = [c for c in columns if c not in schema["columns"]]
+    if unknown:
+        raise KeyError(f"Colonnes absentes du dataset {name}: {', '.join(unknown)}")
+
+    dataset = ds.dataset(dataset_path(name, directory), format="parquet",
+                         partitioning=_partitioning(schema["partitioning"]))
+    table = dataset.to_table(columns=columns + [ROW_COLUMN], filter=_filter_expression(filters))
+
+    df = table.to_pandas()
+    df = df.sort_values(ROW_COLUMN, kind="stable").drop(columns=ROW_COLUMN).reset_index(drop=True)
+    for column, spec in schema["categories"].items():
+        if column in df.columns:
+            df[column] = pd.Categorical(df[column], categories=spec["categories"], ordered=spec["ordered"])
+    return df[columns]
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Swiss Tax RAG - Embedding Pipeline
+==================================
+Encodage en flux de lots de chunks:
+  - le cache disque (app/services/embedding_cache.py) est consulte lot par lot
+  - seuls les textes absents du cache sont envoyes aux workers
+  - plusieurs processus encodent en parallele (modele charge une fois par worker)
+  - les lots sont rendus dans l'ordre de soumission des qu'ils sont prets,
+    avec un nombre borne de lots en vol (memoire bornee)
+
+Le modele et les processus ne sont demarres qu'au premier texte absent du
+cache: une re-indexation sans changement ne charge pas le modele. Le backend
+d'encodage (torch, onnx, onnx-int8) vient de app/services/embedding_backend.py.
+
+Utilise par index_faiss.py.
+"""
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from services.embedding_backend import load_embedder
+
+# ============================================
+# WORKERS
+# ============================================
+
+_worker_model = None
+
+
+def _init_worker(backend: str, model_name: str, onnx_root: Path, threads: int) -> None:
+    """Initializer des processus: charge le modele une seule fois par worker"""
+    global _worker_model
+    # Evite la sur-souscription: chaque worker a sa part des coeurs
+    _worker_model = load_embedder(backend, model_name, onnx_root, threads)
+
+
+def _worker_encode(texts: List[str]) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=64)
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+# ============================================
+# PIPELINE
+# ============================================
+
+class EmbeddingPipeline:
+    """Encodage de lots en parallele, dans l'ordre, avec cache disque"""
+
+    def __init__(self, model_name: str, cache, workers: int = 0, max_pending: Optional[int] = None,
+                 backend: str = "torch", onnx_root: Optional[Path] = None):
+        self.model_name = model_name
+        self.backend = backend
+        self.onnx_root = onnx_root
+        self.cache = cache
+        self.workers = workers or default_workers()
+        self.max_pending = max_pending or 2 * self.workers
+
+        self._pool = None
+        self._model = None
+        self.chunks = 0
+        self.encoded = 0
+        self.elapsed = 0.0
+
+    # --------------------------------------------
+    # Encodage des textes absents du cache
+    # --------------------------------------------
+
+    def _encode_inline(self, texts: List[str]) -> np.ndarray:
+        if self._model is None:
+            print(f"\n[MODEL] Chargement du modele: {self.model_name} ({self.backend})")
+            self._model = load_embedder(self.backend, self.model_name, self.onnx_root)
+        return self._model.encode(texts, batch_size=64)
+
+    def _submit(self, texts: List[str]):
+        """Future (mode process) ou resultat immediat (1 worker)"""
+        if self.workers == 1:
+            return self._encode_inline(texts)
+
+        if self._pool is None:
+            threads = max(1, (os.cpu_count() or self.workers) // self.workers)
+            print(f"\n[MODEL] Demarrage de {self.workers} workers d'encodage ({self.model_name}, {self.backend})")
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.backend, self.model_name, self.onnx_root, threads),
+            )
+        return self._pool.submit(_worker_encode, texts)
+
+    def _finish(self, payload, lookup, pending) -> Tuple[Any, np.ndarray]:
+        computed = None
+        if pending is not None:
+            computed = pending if isinstance(pending, np.ndarray) else pending.result()
+            self.encoded += len(computed)
+        vectors = self.cache.complete(lookup, computed)
+        self.chunks += len(vectors)
+        return payload, vectors
+
+    # --------------------------------------------
+    # API
+    # --------------------------------------------
+
+    def map(self, batches: Iterable[Tuple[Any, List[str]]]) -> Iterator[Tuple[Any, np.ndarray]]:
+        """
+        Pour chaque (payload, textes), rend (payload, embeddings (n, d)) dans
+        l'ordre de soumission. Les lots suivants sont encodes pendant que
+        l'appelant traite les lots termines.
+        """
+        start = time.perf_counter()
+        in_flight = deque()
+        try:
+            for payload, texts in batches:
+                lookup = self.cache.lookup(texts)
+                pending = self._submit(lookup.missing_texts) if lookup.missing else None
+                in_flight.append((payload, lookup, pending))
+
+                while len(in_flight) > self.max_pending or (in_flight and self._ready(in_flight[0][2])):
+                    yield self._finish(*in_flight.popleft())
+                    self.elapsed = time.perf_counter() - start
+
+            while in_flight:
+                yield self._finish(*in_flight.popleft())
+                self.elapsed = time.perf_counter() - start
+        finally:
+            for _, _, pending in in_flight:
+                if pending is not None and not isinstance(pending, np.ndarray):
+                    pending.cancel()
+
+    @staticmethod
+    def _ready(pending) -> bool:
+        return pending is None or isinstance(pending, np.ndarray) or pending.done()
+
+    def encode(self, texts: List[str], batch_size: int = 256) -> np.ndarray:
+        """Encode une liste de textes (meme pipeline, resultat concatene)"""
+        batches = ((None, texts[i:i + batch_size]) for i in range(0, len(texts), batch_size))
+        vectors = [v for _, v in self.map(batches)]
+        return np.concatenate(vectors) if vectors else np.empty((0, self.cache.dimension or 0), np.float32)
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Swiss Tax RAG - Export ONNX du modele d'embedding
+=================================================
+Exporte paraphrase-multilingual-MiniLM-L12-v2 en ONNX (+ version int8 par
+quantification dynamique) pour les backends onnx / onnx-int8 de
+app/services/embedding_backend.py.
+
+Apres l'export:
+  - verifier la parite (cosinus vs PyTorch) et la latence:
+        python ../benchmarks/bench_rag_embedding.py
+  - servir les requetes:      RAG_EMBEDDING_BACKEND=onnx-int8
+  - (re)indexer si besoin:    python index_faiss.py --backend onnx-int8
+
+Usage:
+    python export_onnx_embedder.py [--no-quantize] [--opset 14]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# ============================================
+# CONFIGURATION DES CHEMINS
+# ============================================
+
+BACKEND_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BACKEND_DIR / "app"))
+from services.embedding_backend import export_onnx  # noqa: E402
+
+# Modele et dossier ONNX (MEMES QUE app/services/rag_fiscal.py)
+EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+EMBEDDING_ONNX_DIR = BACKEND_DIR / "app" / "data" / "embedding_onnx"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporte le modele d'embedding du RAG en ONNX")
+    parser.add_argument("--no-quantize", action="store_true", help="Ne pas produire model_int8.onnx")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SWISS TAX RAG - Export ONNX")
+    print("=" * 60)
+
+    directory = export_onnx(EMBEDDING_MODEL, EMBEDDING_ONNX_DIR, quantize=not args.no_quantize, opset=args.opset)
+
+    print(f"\n[DONE] Modele ONNX pret: {directory}")
+    print("   Parite et latence: python ../benchmarks/bench_rag_embedding.py")
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+SwissRelocator - Incremental Store
+==================================
+Annonces nettoyees (avant filtrage) des fichiers JSON deja traites, pour le
+pretraitement incremental (preprocess.py --incremental): seuls les fichiers
+nouveaux ou modifies sont relus et nettoyes.
+
+- manifeste (_manifest.json): pour chaque fichier brut (cle
+  Transaction/Bien/Ville/fichier.json, meme arborescence que
+  preprocess.iter_json_files): empreinte SHA-256, taille, mtime, fragment
+  Parquet de ses annonces, sketches des prix par transaction
+- scan(): taille et mtime inchanges -> fichier inchange sans le relire;
+  sinon empreinte comparee a celle du manifeste
+- un fragment Parquet par execution (part-000001.parquet...): les annonces
+  d'un fichier modifie ou supprime en sont retirees (fragment reecrit)
+- dedoublonnage sur id a la fusion: une annonce deja presente (premier
+  fichier traite) n'est pas ajoutee une seconde fois
+- price_sketches(): sketches fusionnes des fichiers du manifeste, pour les
+  bornes d'outliers de prix sans relire les annonces
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from dataset_store import to_table
+from streaming_stats import DEFAULT_RELATIVE_ACCURACY, QuantileSketch, merge_sketches
+
+# ============================================
+# CONFIGURATION
+# ============================================
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent  # SwissRelocator/
+BACKEND_DIR = PROJECT_ROOT / "backend"
+INCREMENTAL_DIR = BACKEND_DIR / "data" / "processed" / "incremental"
+
+MANIFEST_FILE = "_manifest.json"
+MANIFEST_VERSION = 1
+
+# Colonnes de source des annonces nettoyees -> cle du fichier brut
+SOURCE_COLUMNS = ["source_transaction", "source_bien_type", "source_ville", "source_file"]
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class FileState:
+    sha256: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class ScanResult:
+    pending: List[Tuple[Path, str, str, str]] = field(default_factory=list)  # (fichier, ville, transaction, bien)
+    states: Dict[str, FileState] = field(default_factory=dict)                # etat des fichiers pending
+    removed: List[str] = field(default_factory=list)                          # modifies ou supprimes
+    unchanged: int = 0
+    touched: int = 0     # inchanges, mtime seul mis a jour dans le manifeste
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.pending or self.removed)
+
+
+# ============================================
+# CLES ET EMPREINTES
+# ============================================
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_key(transaction: str, bien: str, ville: str, filename: str) -> str:
+    return f"{transaction}/{bien}/{ville}/{filename}"
+
+
+def source_keys(df: pd.DataFrame) -> pd.Series:
+    """Cle source_key de chaque annonce"""
+    first, *others = SOURCE_COLUMNS
+    return df[first].astype(str).str.cat([df[c].astype(str) for c in others], sep="/")
+
+
+# ============================================
+# STORE
+# ============================================
+
+class IncrementalStore:
+    def __init__(self, directory: Path = INCREMENTAL_DIR, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.directory = Path(directory)
+        self.relative_accuracy = relative_accuracy
+        self.manifest = self._load()
+        self._ids: Optional[Set[Any]] = None
+
+    @property
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        return self.manifest["files"]
+
+    def _empty_manifest(self) -> Dict[str, Any]:
+        return {
+            "version": MANIFEST_VERSION,
+            "relative_accuracy": self.relative_accuracy,
+            "next_fragment": 1,
+            "files": {},
+            "updated_at": None,
+        }
+
+    def _load(self) -> Dict[str, Any]:
+        path = self.directory / MANIFEST_FILE
+        if not path.exists():
+            return self._empty_manifest()
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("relative_accuracy") != self.relative_accuracy:
+            raise ValueError(f"Manifeste incompatible: {path} (relancer avec --rebuild)")
+        return manifest
+
+    def reset(self) -> None:
+        """Supprime manifeste et fragments: le prochain passage retraite tous les fichiers"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.manifest = self._empty_manifest()
+        self._ids = None
+
+    def _fragment_paths(self) -> List[Path]:
+        fragments = {entry["fragment"] for entry in self.files.values() if entry["fragment"]}
+        return [self.directory / name for name in sorted(fragments)]   # ordre de traitement
+
+    def _known_ids(self) -> Set[Any]:
+        if self._ids is None:
+            self._ids = set()
+            for path in self._fragment_paths():
+                self._ids.update(pq.read_table(path, columns=["id"]).column("id").to_pylist())
+        return self._ids
+
+    def _write_fragment(self, table: pa.Table, path: Path) -> None:
+        tmp_path = path.with_name(path.name + ".tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+    # ============================================
+    # DETECTION DES CHANGEMENTS
+    # ============================================
+
+    def scan(self, files: Iterable[Tuple[Path, str, str, str]]) -> ScanResult:
+        """
+        Compare les fichiers (fichier, ville, transaction, bien) au manifeste
+
+        Returns:
+            ScanResult: fichiers a (re)traiter, cles a retirer du store
+        """
+        result = ScanResult()
+        seen = set()
+        for file_info in files:
+            json_file, ville, transaction, bien = file_info
+            key = source_key(transaction, bien, ville, json_file.name)
+            seen.add(key)
+            stat = json_file.stat()
+            entry = self.files.get(key)
+
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                result.unchanged += 1
+                continue
+            digest = file_digest(json_file)
+            if entry and entry["sha256"] == digest:
+                entry["mtime_ns"] = stat.st_mtime_ns   # fichier touche, contenu identique
+                result.unchanged += 1
+                result.touched += 1
+                continue
+
+            if entry:
+                result.removed.append(key)
+            result.pending.append(file_info)
+            result.states[key] = FileState(digest, stat.st_size, stat.st_mtime_ns)
+
+        result.removed.extend(key for key in self.files if key not in seen)
+        return result
+
+    # ============================================
+    # MISE A JOUR
+    # ============================================
+
+    def remove(self, keys: Iterable[str]) -> int:
+        """
+        Retire les fichiers et leurs annonces du store
+
+        Returns:
+            Nombre d'annonces retirees
+        """
+        keys = set(keys)
+        removed = 0
+        for name in sorted({self.files[k]["fragment"] for k in keys if self.files[k]["fragment"]}):
+            path = self.directory / name
+            table = pq.read_table(path)
+            keep = ~source_keys(table.select(SOURCE_COLUMNS).to_pandas()).isin(keys).to_numpy()
+            removed += int((~keep).sum())
+            if keep.all():
+                continue
+            if keep.any():
+                self._write_fragment(table.filter(pa.array(keep)), path)
+            else:
+                path.unlink()
+        for key in keys:
+            del self.files[key]
+        self._ids = None
+        return removed
+
+    def add(self, df: pd.DataFrame, states: Dict[str, FileState], population: pd.Series) -> int:
+        """
+        Fusionne les annonces nettoyees des fichiers states (une annonce dont
+        l'id est deja dans le store, ou plus haut dans df, est ignoree)
+
+        Args:
+            population: lignes de df comptees dans les sketches de prix
+
+        Returns:
+            Nombre d'annonces ajoutees
+        """
+        known = self._known_ids()
+        keep = ~df["id"].duplicated() & ~df["id"].isin(known)
+        df, population = df[keep], population[keep]
+        keys = source_keys(df)
+
+        fragment = None
+        if len(df):
+            fragment = f"part-{self.manifest['next_fragment']:06d}.parquet"
+            self.manifest["next_fragment"] += 1
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._write_fragment(to_table(df), self.directory / fragment)
+            known.update(df["id"].tolist())
+
+        sketches = defaultdict(dict)
+        prices = df.loc[population, "price"]
+        for (key, transaction), values in prices.groupby([keys[population], df.loc[population, "source_transaction"]]):
+            sketches[key][transaction] = QuantileSketch(self.relative_accuracy).add(values.to_numpy()).to_dict()
+
+        rows = keys.value_counts()
+        processed_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        for key, state in states.items():
+            n_rows = int(rows.get(key, 0))
+            self.files[key] = {
+                **asdict(state),
+                "fragment": fragment if n_rows else None,
+                "rows": n_rows,
+                "price_sketches": sketches.get(key, {}),
+                "processed_at": processed_at,
+            }
+        return len(df)
+
+    def save(self) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        path = self.directory / MANIFEST_FILE
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+
+    # ============================================
+    # LECTURE
+    # ============================================
+
+    def read(self) -> Optional[pd.DataFrame]:
+        """Toutes les annonces nettoyees, dans l'ordre de traitement (None si store vide)"""
+        paths = self._fragment_paths()
+        if not paths:
+            return None
+        tables = [pq.read_table(path) for path in paths]
+        return pa.concat_tables(tables, promote_options="default").to_pandas()
+
+    def price_sketches(self) -> Dict[str, QuantileSketch]:
+        """Sketch des prix par transaction, fusion des sketches de tous les fichiers"""
+        by_transaction = defaultdict(list)
+        for entry in self.files.values():
+            for transaction, data in entry["price_sketches"].items():
+                by_transaction[transaction].append(QuantileSketch.from_dict(data))
+        return {transaction: merge_sketches(sketches, self.relative_accuracy)
+                for transaction, sketches in by_transaction.items()}
+
+    def __len__(self) -> int:
+        return sum(entry["rows"] for entry in self.files.values())
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Swiss Tax RAG - Index Factory
+=============================
+Choix et construction de l'index FAISS selon la taille du corpus.
+
+- flat  : recherche exacte (brute force), ideale jusqu'a ~10k chunks
+- hnsw  : graphe HNSW, sans entrainement, tres bon rappel jusqu'a ~200k chunks
+- ivfpq : IVF + Product Quantization, entraine sur un echantillon
+          uniforme du corpus, index compact (48 octets/vecteur en 384d)
+          pour les gros corpus (au moins IVFPQ_MIN_VECTORS vecteurs)
+
+Les parametres de recherche (nprobe, efSearch) sont enregistres dans
+index.faiss: l'API n'a rien a configurer au chargement.
+
+Utilise par index_faiss.py et benchmarks/bench_rag_index.py.
+"""
+
+import math
+import tempfile
+from dataclasses import dataclass
+from typing import List, Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("auto", "flat", "hnsw", "ivfpq")
+
+# Seuils du mode auto (nombre de vecteurs)
+FLAT_MAX_VECTORS = 10_000
+HNSW_MAX_VECTORS = 200_000
+
+# HNSW
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# IVF-PQ: faiss recommande >= 39 points d'entrainement par centroide
+IVF_MIN_POINTS_PER_CENTROID = 39
+PQ_NBITS = 8
+PQ_SUBQUANTIZERS = (48, 32, 64, 24, 16, 8, 4)
+MAX_TRAIN_SAMPLE = 100_000
+
+# Chaque sous-quantifieur PQ a 2^PQ_NBITS centroides: en dessous, entrainement sous-dimensionne
+IVFPQ_MIN_VECTORS = IVF_MIN_POINTS_PER_CENTROID * 2 ** PQ_NBITS
+
+# Vecteurs relus par bloc depuis le fichier temporaire du StreamingIndexBuilder
+SPILL_READ_VECTORS = 65_536
+
+
+@dataclass
+class IndexSpec:
+    """Configuration d'index retenue pour un corpus"""
+
+    kind: str                          # flat | hnsw | ivfpq
+    factory_string: str                # chaine faiss.index_factory
+    nprobe: Optional[int] = None       # ivfpq: listes visitees par requete
+    ef_search: Optional[int] = None    # hnsw: taille de la file de recherche
+    train_size: int = 0                # vecteurs d'entrainement (0 = pas d'entrainement)
+
+    def describe(self) -> str:
+        params = []
+        if self.nprobe is not None:
+            params.append(f"nprobe={self.nprobe}")
+        if self.ef_search is not None:
+            params.append(f"efSearch={self.ef_search}")
+        if self.train_size:
+            params.append(f"train={self.train_size}")
+        return f"{self.kind} ({self.factory_string}{', ' + ', '.join(params) if params else ''})"
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    """Plus grand decoupage usuel compatible avec la dimension"""
+    for m in PQ_SUBQUANTIZERS:
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def choose_index_spec(n_vectors: int, dimension: int, index_type: str = "auto",
+                      nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> IndexSpec:
+    """Choisit le type d'index (auto = selon la taille du corpus) et ses parametres"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Type d'index inconnu: {index_type}. Types valides: {', '.join(INDEX_TYPES)}")
+
+    if index_type == "auto":
+        if n_vectors <= FLAT_MAX_VECTORS:
+            index_type = "flat"
+        elif n_vectors <= HNSW_MAX_VECTORS:
+            index_type = "hnsw"
+        else:
+            index_type = "ivfpq"
+
+    if index_type == "flat":
+        return IndexSpec(kind="flat", factory_string="Flat")
+
+    if index_type == "hnsw":
+        return IndexSpec(
+            kind="hnsw",
+            factory_string=f"HNSW{HNSW_M},Flat",
+            ef_search=ef_search or HNSW_EF_SEARCH,
+        )
+
+    if n_vectors < IVFPQ_MIN_VECTORS:
+        raise ValueError(f"IVF-PQ necessite au moins {IVFPQ_MIN_VECTORS} vecteurs "
+                         f"({IVF_MIN_POINTS_PER_CENTROID} par centroide PQ, {n_vectors} disponibles)")
+
+    # ivfpq: ~4*sqrt(n) listes (puissance de 2), bornees par la taille d'echantillon
+    nlist = 2 ** max(0, round(math.log2(max(1.0, 4 * math.sqrt(n_vectors)))))
+    nlist = max(1, min(nlist, n_vectors // IVF_MIN_POINTS_PER_CENTROID))
+    train_size = min(n_vectors, MAX_TRAIN_SAMPLE, max(IVF_MIN_POINTS_PER_CENTROID * nlist, IVFPQ_MIN_VECTORS))
+    return IndexSpec(
+        kind="ivfpq",
+        factory_string=f"IVF{nlist},PQ{_pq_subquantizers(dimension)}x{PQ_NBITS}",
+        nprobe=nprobe or max(1, nlist // 16),
+        train_size=train_size,
+    )
+
+
+def create_index(spec: IndexSpec, dimension: int, metric: int = faiss.METRIC_L2):
+    """Instancie l'index vide (non entraine) correspondant a la spec"""
+    index = faiss.index_factory(dimension, spec.factory_string, metric)
+    if spec.kind == "hnsw":
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    set_search_params(index, spec)
+    return index
+
+
+def train_index(index, spec: IndexSpec, embeddings: np.ndarray, seed: int = 42) -> None:
+    """Entraine l'index sur un echantillon aleatoire du corpus (si necessaire)"""
+    if index.is_trained:
+        return
+    n = len(embeddings)
+    size = min(n, spec.train_size or n)
+    sample = embeddings if size == n else embeddings[np.random.default_rng(seed).choice(n, size, replace=False)]
+    index.train(np.ascontiguousarray(sample, dtype=np.float32))
+
+
+def build_index(embeddings: np.ndarray, spec: IndexSpec, metric: int = faiss.METRIC_L2,
+                ids: Optional[np.ndarray] = None):
+    """
+    Cree, entraine et remplit un index a partir d'embeddings (n, d).
+
+    Avec `ids` (int64), l'index est enveloppe dans un IndexIDMap2: les
+    recherches renvoient ces ids et les vecteurs peuvent etre supprimes
+    par id (indexation incrementale).
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    index = create_index(spec, embeddings.shape[1], metric)
+    train_index(index, spec, embeddings)
+    if ids is None:
+        index.add(embeddings)
+        return index
+
+    id_map = faiss.IndexIDMap2(index)
+    id_map.add_with_ids(embeddings, np.ascontiguousarray(ids, dtype=np.int64))
+    return id_map
+
+
+class StreamingIndexBuilder:
+    """
+    Remplit un IndexIDMap2 au fil des lots d'embeddings.
+
+    Les index sans entrainement (flat, HNSW) recoivent chaque lot
+    immediatement. Pour IVF-PQ, l'echantillon d'entrainement est tire
+    uniformement sur tout le flux (reservoir de spec.train_size vecteurs):
+    un prefixe du corpus, trie par document, biaiserait les centroides vers
+    les premieres sources. Les vecteurs attendent l'entrainement dans un
+    fichier temporaire et sont ajoutes par blocs dans finish().
+    """
+
+    def __init__(self, spec: IndexSpec, dimension: int, metric: int = faiss.METRIC_L2, seed: int = 42):
+        self.spec = spec
+        self.dimension = dimension
+        self.index = faiss.IndexIDMap2(create_index(spec, dimension, metric))
+        self._rng = np.random.default_rng(seed)
+        self._reservoir = np.empty((0, dimension), dtype=np.float32)
+        self._seen = 0
+        self._spill = None
+        self._spilled_ids: List[np.ndarray] = []
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        ids = np.ascontiguousarray(ids, dtype=np.int64)
+        if self.index.is_trained:
+            self.index.add_with_ids(vectors, ids)
+            return
+
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile()
+        self._spill.write(vectors.tobytes())
+        self._spilled_ids.append(ids)
+        self._sample(vectors)
+
+    def _sample(self, vectors: np.ndarray) -> None:
+        """Reservoir (algorithme R) mis a jour par lot"""
+        size = self.spec.train_size
+        free = max(0, min(size - len(self._reservoir), len(vectors)))
+        if free:
+            self._reservoir = np.concatenate([self._reservoir, vectors[:free]])
+        positions = self._seen + np.arange(free, len(vectors))
+        self._seen += len(vectors)
+        if len(positions):
+            # Le vecteur de rang t remplace un element au hasard avec probabilite size / (t + 1)
+            slots = self._rng.integers(0, positions + 1)
+            kept = slots < size
+            self._reservoir[slots[kept]] = vectors[free:][kept]
+
+    def finish(self):
+        """Entraine sur le reservoir puis ajoute les vecteurs du fichier temporaire"""
+        if self._spill is None:
+            return self.index
+
+        train_index(self.index, self.spec, self._reservoir)
+        self._reservoir = None
+        self._spill.seek(0)
+        ids = np.concatenate(self._spilled_ids)
+        row_bytes = self.dimension * np.dtype(np.float32).itemsize
+        for start in range(0, len(ids), SPILL_READ_VECTORS):
+            block = ids[start:start + SPILL_READ_VECTORS]
+            vectors = np.frombuffer(self._spill.read(len(block) * row_bytes), dtype=np.float32)
+            self.index.add_with_ids(vectors.reshape(len(block), self.dimension), block)
+        self._spill.close()
+        self._spill, self._spilled_ids = None, []
+        return self.index
+
+
+def unwrap(index):
+    """Index sous-jacent d'un IndexIDMap / IndexIDMap2"""
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def set_search_params(index, spec: IndexSpec) -> None:
+    """Applique nprobe / efSearch (aussi utilise pour le balayage du benchmark)"""
+    index = unwrap(index)
+    if spec.kind == "hnsw":
+        index.hnsw.efSearch = spec.ef_search
+    elif spec.kind == "ivfpq":
+        faiss.extract_index_ivf(index).nprobe = spec.nprobe
+
+
+def remove_ids(index, spec: IndexSpec, ids: np.ndarray):
+    """
+    Supprime des vecteurs par id d'un IndexIDMap2 et renvoie l'index a jour.
+
+    HNSW ne supporte pas la suppression: le graphe est alors reconstruit
+    a partir des vecteurs conserves (sans re-encoder les textes).
+    """
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    if len(ids) == 0:
+        return index
+
+    if spec.kind != "hnsw":
+        index.remove_ids(faiss.IDSelectorBatch(len(ids), faiss.swig_ptr(ids)))
+        return index
+
+    current_ids = faiss.vector_to_array(index.id_map)
+    keep = ~np.isin(current_ids, ids)
+    vectors = unwrap(index).reconstruct_n(0, index.ntotal)[keep]
+
+    rebuilt = faiss.IndexIDMap2(create_index(spec, index.d, index.metric_type))
+    rebuilt.add_with_ids(vectors, current_ids[keep])
+    return rebuilt
@@ -4,21 +4,34 @@ Swiss Tax RAG - Build FAISS Index
 =================================
 Construit l'index FAISS a partir des documents fiscaux.
 
+Par defaut l'indexation est incrementale: un manifeste (empreintes des
+fichiers + ids des chunks) permet de ne re-encoder que les documents
+modifies et de supprimer les vecteurs perimes de l'index (IndexIDMap2).
+
+Un index inverse BM25 (app/services/bm25_index.py) est reecrit a cote du
+store de chunks, sur les memes chunks, pour la recherche hybride de l'API.
+
 Usage:
-    python index_faiss.py
+    python index_faiss.py [--index-type auto|flat|hnsw|ivfpq] [--full] [--backend torch|onnx|onnx-int8]
 """
 
+import argparse
 import hashlib
-import pickle
+import json
+import os
+import sys
+import time
+import uuid
 from pathlib import Path
-from typing import List, Dict
-from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+from dataclasses import asdict, dataclass
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+import index_factory
+
 # ============================================
 # CONFIGURATION DES CHEMINS
 # ============================================
@@ -29,14 +42,45 @@ BACKEND_DIR = PROJECT_ROOT / "backend"
 # Donnees sources (TXT fiscaux)
 RAG_DATA_DIR = BACKEND_DIR / "data" / "rag" / "fiscal"
 
-# Index de sortie (MEME CHEMIN QUE build_faiss_index.py)
+# Index de sortie (MEME CHEMIN QUE app/services/rag_fiscal.py)
 FAISS_INDEX_DIR = BACKEND_DIR / "app" / "data" / "faiss_index"
 
-# Modele d'embedding (MEME QUE build_faiss_index.py)
+# Store de chunks partage avec l'API (app/services/chunk_store.py)
+sys.path.insert(0, str(BACKEND_DIR / "app"))
+from services.bm25_index import BM25_META_FILE, BM25Writer  # noqa: E402
+from services.chunk_store import CHUNK_META_FILE, ChunkStore, ChunkStoreWriter, chunk_label  # noqa: E402
+from services.embedding_backend import EMBEDDING_BACKENDS, cache_model_name, l2_normalize  # noqa: E402
+from services.embedding_cache import EmbeddingCache  # noqa: E402
+
+from embedding_pipeline import EmbeddingPipeline  # noqa: E402
+
+INDEX_PATH = FAISS_INDEX_DIR / "index.faiss"
+
+# Manifeste de l'indexation incrementale (empreintes des fichiers, ids des chunks)
+MANIFEST_PATH = FAISS_INDEX_DIR / "index_manifest.json"
+MANIFEST_VERSION = 1
+
+# Modele d'embedding (MEME QUE app/services/rag_fiscal.py)
 EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+# Decoupage (le cahier des charges prevoit 500/100: comparer avec benchmarks/bench_rag_quality.py)
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 
+# Cache disque des embeddings (MEME CHEMIN QUE app/services/rag_fiscal.py)
+EMBEDDING_CACHE_DIR = BACKEND_DIR / "app" / "data" / "embedding_cache"
+
+# Backend d'encodage (torch, onnx, onnx-int8), remplace par --backend
+# Modeles ONNX (MEME CHEMIN QUE app/services/rag_fiscal.py)
+EMBEDDING_BACKEND = "torch"
+EMBEDDING_ONNX_DIR = BACKEND_DIR / "app" / "data" / "embedding_onnx"
+
+# Chunks par lot envoye aux workers d'encodage
+EMBED_BATCH_SIZE = 256
+
+# Embeddings normalises + produit scalaire = similarite cosinus (MEME QUE app/services/rag_fiscal.py)
+INDEX_METRIC = "ip"
+FAISS_METRIC = faiss.METRIC_INNER_PRODUCT
+
 # ============================================
 # CLASSE CHUNK (IDENTIQUE A build_faiss_index.py)
 # ============================================
@@ -119,12 +163,13 @@ except ImportError:
 # FONCTIONS
 # ============================================
 
-def create_chunks_from_text(filename: str, text: str, meta: Dict) -> List[Chunk]:
-    """Decoupe un texte en chunks."""
+def create_chunks_from_text(filename: str, text: str, meta: Dict, chunk_size: int = CHUNK_SIZE,
+                            chunk_overlap: int = CHUNK_OVERLAP) -> List[Chunk]:
+    """Decoupe un texte en chunks (parametres modifiables pour benchmarks/bench_rag_quality.py)."""
 
     splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
         separators=["\n\n", "\n", ". ", " ", ""],
         length_function=len
     )
@@ -150,98 +195,388 @@ def create_chunks_from_text(filename: str, text: str, meta: Dict) -> List[Chunk]
     return chunks
 
 
-def load_and_chunk_all() -> List[Chunk]:
-    """Charge tous les fichiers texte et les decoupe."""
-    all_chunks = []
+def file_fingerprint(meta: Dict, data: bytes) -> str:
+    """Hash du contenu et des metadonnees (une metadonnee modifiee change les chunks)"""
+    digest = hashlib.sha256(data)
+    digest.update(json.dumps(meta, sort_keys=True, ensure_ascii=False).encode())
+    return digest.hexdigest()
 
-    print(f"\n[DIR] Dossier source : {RAG_DATA_DIR}")
 
+def document_fingerprints() -> Dict[str, str]:
+    """Empreinte de chaque document present dans RAG_DATA_DIR"""
+    return {
+        filename: file_fingerprint(meta, (RAG_DATA_DIR / filename).read_bytes())
+        for filename, meta in DOCUMENTS_META.items()
+        if (RAG_DATA_DIR / filename).exists()
+    }
+
+
+def iter_chunks() -> Iterator[Chunk]:
+    """Decoupe les documents a la demande (un seul fichier en memoire a la fois)."""
     for filename, meta in DOCUMENTS_META.items():
         filepath = RAG_DATA_DIR / filename
         if filepath.exists():
-            print(f"[FILE] {filename}...", end=" ")
             text = filepath.read_text(encoding='utf-8')
             chunks = create_chunks_from_text(filename, text, meta)
-            all_chunks.extend(chunks)
-            print(f"OK {len(chunks)} chunks")
+            print(f"[FILE] {filename}: {len(chunks)} chunks")
+            yield from chunks
         else:
             print(f"[WARN] Non trouve: {filename}")
 
-    return all_chunks
 
+def load_and_chunk_all() -> List[Chunk]:
+    """Charge tous les fichiers texte et les decoupe."""
+    print(f"\n[DIR] Dossier source : {RAG_DATA_DIR}")
+    return list(iter_chunks())
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def estimate_chunk_count() -> int:
+    """Nombre de chunks estime (taille des fichiers / pas du decoupage), pour choisir l'index avant l'encodage"""
+    total = sum(
+        (RAG_DATA_DIR / filename).stat().st_size
+        for filename in DOCUMENTS_META
+        if (RAG_DATA_DIR / filename).exists()
+    )
+    return max(1, total // (CHUNK_SIZE - CHUNK_OVERLAP))
 
-def build_index(chunks: List[Chunk]) -> None:
-    """Construit et sauvegarde l'index FAISS."""
 
-    print(f"\n{'='*60}")
-    print(f"[BUILD] Construction de l'index FAISS")
-    print(f"{'='*60}")
+_embedding_cache = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(EMBEDDING_CACHE_DIR, cache_model_name(EMBEDDING_MODEL, EMBEDDING_BACKEND))
+    return _embedding_cache
+
+
+def create_pipeline(workers: int = 0) -> EmbeddingPipeline:
+    """Encodage multi-processus des chunks absents du cache disque (0 = nombre de workers auto)"""
+    return EmbeddingPipeline(EMBEDDING_MODEL, get_embedding_cache(), workers=workers,
+                             backend=EMBEDDING_BACKEND, onnx_root=EMBEDDING_ONNX_DIR)
+
+
+def chunk_labels(chunk_ids: List[str]) -> np.ndarray:
+    return np.array([chunk_label(chunk_id) for chunk_id in chunk_ids], dtype=np.int64)
+
+
+# ============================================
+# SAUVEGARDE ET MANIFESTE
+# ============================================
+
+def new_index_version() -> str:
+    """Version unique par construction / mise a jour: invalide le cache de requetes de l'API"""
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def load_manifest() -> Optional[Dict]:
+    if not MANIFEST_PATH.exists():
+        return None
+    return json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+
 
-    # Creer le dossier de sortie
+def stage_index_file(index) -> Path:
+    """Ecrit l'index sous un nom temporaire (remplace par commit_index_file)"""
     FAISS_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = INDEX_PATH.with_name(INDEX_PATH.name + ".tmp")
+    faiss.write_index(index, str(tmp_path))
+    return tmp_path
+
+
+def commit_index_file(tmp_path: Path) -> None:
+    """Remplace l'index apres le store de chunks, avant le manifeste (meme ordre que la lecture)"""
+    os.replace(tmp_path, INDEX_PATH)
+    print(f"[OK] Index sauvegarde: {INDEX_PATH}")
+
+
+def write_manifest(spec: index_factory.IndexSpec, dimension: int, fingerprints: Dict[str, str],
+                   chunk_ids_by_file: Dict[str, List[str]], index_version: str) -> None:
+    """Ecrit le manifeste en dernier: il fait foi pour la prochaine mise a jour"""
+    files = {
+        filename: {"fingerprint": fingerprint, "chunk_ids": chunk_ids_by_file.get(filename, [])}
+        for filename, fingerprint in fingerprints.items()
+    }
+    tmp_manifest = MANIFEST_PATH.with_name(MANIFEST_PATH.name + ".tmp")
+    tmp_manifest.write_text(json.dumps({
+        "manifest_version": MANIFEST_VERSION,
+        "index_version": index_version,
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_backend": EMBEDDING_BACKEND,
+        "metric": INDEX_METRIC,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "dimension": dimension,
+        "index_spec": asdict(spec),
+        "files": files,
+    }, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp_manifest, MANIFEST_PATH)
+
+
+def save_index(index, chunks: List[Chunk], spec: index_factory.IndexSpec, fingerprints: Dict[str, str]) -> None:
+    """Ecrit le store de chunks (+ index BM25 aligne), l'index puis le manifeste"""
+    index_tmp = stage_index_file(index)
+
+    # Ids FAISS = labels des chunks: l'ordre des lignes du store est libre
+    chunk_ids_by_file: Dict[str, List[str]] = {}
+    index_version = new_index_version()
+    with ChunkStoreWriter(FAISS_INDEX_DIR, index_version=index_version) as store, \
+            BM25Writer(FAISS_INDEX_DIR) as bm25:
+        for c in chunks:
+            store.add(c.id, c.text, c.metadata)
+            bm25.add(c.text)
+            chunk_ids_by_file.setdefault(c.metadata["source"], []).append(c.id)
+    print(f"[OK] Store de chunks et index BM25 sauvegardes: {FAISS_INDEX_DIR}")
+
+    commit_index_file(index_tmp)
+    write_manifest(spec, index.d, fingerprints, chunk_ids_by_file, index_version)
+
+
+def count_by_canton(chunks: Iterable[Chunk]) -> Dict[str, int]:
+    canton_counts = {}
+    for c in chunks:
+        canton = c.metadata['canton']
+        canton_counts[canton] = canton_counts.get(canton, 0) + 1
+    return canton_counts
+
 
-    # Charger le modele
-    print(f"\n[MODEL] Chargement du modele: {EMBEDDING_MODEL}")
-    model = SentenceTransformer(EMBEDDING_MODEL)
-
-    # Generer les embeddings
-    print(f"[EMB] Generation des embeddings pour {len(chunks)} chunks...")
-    texts = [c.text for c in chunks]
-    embeddings = model.encode(texts, show_progress_bar=True)
-
-    # Creer l'index FAISS
-    print(f"[FAISS] Creation de l'index FAISS...")
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(np.array(embeddings).astype('float32'))
-
-    # Sauvegarder l'index
-    index_path = FAISS_INDEX_DIR / "index.faiss"
-    faiss.write_index(index, str(index_path))
-    print(f"[OK] Index sauvegarde: {index_path}")
-
-    # Sauvegarder les metadonnees (format compatible avec build_faiss_index.py)
-    meta_path = FAISS_INDEX_DIR / "data.pkl"
-    with open(meta_path, "wb") as f:
-        pickle.dump({"chunks": chunks}, f)
-    print(f"[OK] Metadonnees sauvegardees: {meta_path}")
-
-    # Statistiques
+def print_stats(total: int, canton_counts: Dict[str, int], spec: index_factory.IndexSpec, dimension: int,
+                embedded: int, removed: int, elapsed: float, pipeline: EmbeddingPipeline) -> None:
     print(f"\n{'='*60}")
     print(f"[STATS] STATISTIQUES")
     print(f"{'='*60}")
-    print(f"Total chunks: {len(chunks)}")
+    print(f"Total chunks: {total}")
+    print(f"Chunks encodes: {embedded} | reutilises: {total - embedded} | supprimes: {removed}")
     print(f"Dimension embeddings: {dimension}")
+    print(f"Type d'index: {spec.describe()}")
+    print(f"Duree: {elapsed:.1f}s")
+    if pipeline.chunks:
+        print(f"Debit embeddings: {pipeline.chunks_per_second:.0f} chunks/s "
+              f"({pipeline.chunks} chunks, {pipeline.encoded} encodes, {pipeline.workers} workers)")
 
-    canton_counts = {}
-    for c in chunks:
-        canton = c.metadata['canton']
-        canton_counts[canton] = canton_counts.get(canton, 0) + 1
+    cache = get_embedding_cache().stats()
+    if cache["hits"] + cache["misses"]:
+        print(f"Cache embeddings: {cache['hits']} hits / {cache['misses']} misses "
+              f"({cache['hit_rate']:.1%}), {cache['size']} vecteurs en cache")
 
     print(f"\nPar canton:")
     for canton, count in sorted(canton_counts.items()):
         print(f"  {canton}: {count} chunks")
 
 
+# ============================================
+# CONSTRUCTION
+# ============================================
+
+def build_index(index_type: str = "auto", workers: int = 0, batch_size: int = EMBED_BATCH_SIZE) -> bool:
+    """
+    Construction complete en flux: les fichiers sont decoupes a la demande,
+    les lots de chunks encodes en parallele et ajoutes a l'index (et au
+    store) des qu'ils sont prets. Seuls les lots en vol restent en memoire.
+
+    Returns:
+        False si aucun document n'a ete trouve
+    """
+    start = time.perf_counter()
+
+    print(f"\n{'='*60}")
+    print(f"[BUILD] Construction de l'index FAISS")
+    print(f"{'='*60}")
+
+    fingerprints = document_fingerprints()
+    if not fingerprints:
+        return False
+
+    # Type d'index choisi avant l'encodage, sur une estimation du nombre de chunks
+    estimated = estimate_chunk_count()
+    builder = None
+    chunk_ids_by_file: Dict[str, List[str]] = {}
+    canton_counts: Dict[str, int] = {}
+    index_version = new_index_version()
+
+    print(f"\n[DIR] Dossier source : {RAG_DATA_DIR}")
+    with create_pipeline(workers) as pipeline, \
+            ChunkStoreWriter(FAISS_INDEX_DIR, index_version=index_version) as store, \
+            BM25Writer(FAISS_INDEX_DIR) as bm25:
+        batches = ((batch, [c.text for c in batch]) for batch in batched(iter_chunks(), batch_size))
+
+        for batch, vectors in pipeline.map(batches):
+            if builder is None:
+                spec = index_factory.choose_index_spec(estimated, vectors.shape[1], index_type)
+                print(f"[FAISS] Creation de l'index FAISS: {spec.describe()} (~{estimated} chunks estimes)")
+                builder = index_factory.StreamingIndexBuilder(spec, vectors.shape[1], FAISS_METRIC)
+
+            builder.add(l2_normalize(vectors), chunk_labels([c.id for c in batch]))
+            for c in batch:
+                store.add(c.id, c.text, c.metadata)
+                bm25.add(c.text)
+                chunk_ids_by_file.setdefault(c.metadata["source"], []).append(c.id)
+            for canton, count in count_by_canton(batch).items():
+                canton_counts[canton] = canton_counts.get(canton, 0) + count
+            print(f"[EMB] {pipeline.chunks} chunks | {pipeline.chunks_per_second:.0f} chunks/s")
+
+        if builder is None:
+            raise RuntimeError("Aucun chunk produit: les documents sont vides")
+
+        index = builder.finish()
+        # Index remplace seulement une fois le store committe (sortie du with)
+        index_tmp = stage_index_file(index)
+    print(f"[OK] Store de chunks et index BM25 sauvegardes: {FAISS_INDEX_DIR}")
+
+    commit_index_file(index_tmp)
+    write_manifest(spec, index.d, fingerprints, chunk_ids_by_file, index_version)
+    print_stats(pipeline.chunks, canton_counts, spec, index.d, embedded=pipeline.encoded, removed=0,
+                elapsed=time.perf_counter() - start, pipeline=pipeline)
+    return True
+
+
+def full_rebuild_reason(manifest: Optional[Dict], index_type: str) -> Optional[str]:
+    """Raison d'une reconstruction complete, None si la mise a jour incrementale est possible"""
+    if manifest is None or manifest.get("manifest_version") != MANIFEST_VERSION:
+        return "pas de manifeste"
+    if not INDEX_PATH.exists() or not (FAISS_INDEX_DIR / CHUNK_META_FILE).exists():
+        return "index ou store de chunks absent"
+    if not (FAISS_INDEX_DIR / BM25_META_FILE).exists():
+        return "index BM25 absent"
+    if manifest["embedding_model"] != EMBEDDING_MODEL:
+        return "modele d'embedding modifie"
+    if manifest.get("metric", "l2") != INDEX_METRIC:
+        return "index non normalise (distance L2)"
+    if manifest.get("embedding_backend", "torch") != EMBEDDING_BACKEND:
+        return f"backend d'embedding modifie: {EMBEDDING_BACKEND}"
+    if (manifest["chunk_size"], manifest["chunk_overlap"]) != (CHUNK_SIZE, CHUNK_OVERLAP):
+        return "parametres de decoupage modifies"
+    if index_type != "auto" and manifest["index_spec"]["kind"] != index_type:
+        return f"type d'index demande: {index_type}"
+    return None
+
+
+def update_index(index_type: str = "auto", workers: int = 0, batch_size: int = EMBED_BATCH_SIZE) -> bool:
+    """
+    Mise a jour incrementale: seuls les documents dont l'empreinte a change
+    sont redecoupes, seuls leurs chunks nouveaux ou modifies sont encodes,
+    et les vecteurs des chunks disparus sont supprimes de l'IndexIDMap2.
+
+    Returns:
+        False si aucun document n'a ete trouve
+    """
+    start = time.perf_counter()
+    manifest = load_manifest()
+    reason = full_rebuild_reason(manifest, index_type)
+    if reason:
+        print(f"\n[INFO] Reconstruction complete ({reason})")
+        return build_index(index_type, workers, batch_size)
+
+    print(f"\n[DIR] Dossier source : {RAG_DATA_DIR}")
+    spec = index_factory.IndexSpec(**manifest["index_spec"])
+    index = faiss.read_index(str(INDEX_PATH))
+    store = ChunkStore(FAISS_INDEX_DIR)
+    old_rows = {chunk_id: row for row, chunk_id in enumerate(store.chunk_ids)}
+
+    chunks: List[Chunk] = []
+    to_embed: List[Chunk] = []
+    fingerprints: Dict[str, str] = {}
+    changed_files = 0
+
+    for filename, meta in DOCUMENTS_META.items():
+        filepath = RAG_DATA_DIR / filename
+        if not filepath.exists():
+            continue
+
+        data = filepath.read_bytes()
+        fingerprint = fingerprints[filename] = file_fingerprint(meta, data)
+        previous = manifest["files"].get(filename)
+
+        if previous is not None and previous["fingerprint"] == fingerprint:
+            # Document inchange: chunks repris du store, vecteurs conserves
+            chunks.extend(
+                Chunk(id=chunk_id, text=store.text(old_rows[chunk_id]), metadata=store.metadata(old_rows[chunk_id]))
+                for chunk_id in previous["chunk_ids"]
+            )
+            continue
+
+        changed_files += 1
+        file_chunks = create_chunks_from_text(filename, data.decode('utf-8'), meta)
+        # L'id md5 ne couvre que les 50 premiers caracteres: on compare aussi le texte
+        new_chunks = [c for c in file_chunks if c.id not in old_rows or store.text(old_rows[c.id]) != c.text]
+        chunks.extend(file_chunks)
+        to_embed.extend(new_chunks)
+        status = "nouveau" if previous is None else "modifie"
+        print(f"[FILE] {filename} ({status}): {len(file_chunks)} chunks, {len(new_chunks)} a encoder")
+
+    removed_files = set(manifest["files"]) - set(fingerprints)
+    for filename in sorted(removed_files):
+        print(f"[FILE] {filename} supprime")
+
+    if changed_files == 0 and not removed_files:
+        store.close()
+        print("[OK] Index a jour, aucun document modifie")
+        return True
+
+    if not chunks:
+        store.close()
+        return False
+
+    # Vecteurs perimes: chunks disparus + chunks dont le texte a change
+    current_ids = {c.id for c in chunks}
+    reembedded_ids = {c.id for c in to_embed}
+    stale_ids = [cid for cid in store.chunk_ids if cid not in current_ids or cid in reembedded_ids]
+    store.close()
+
+    print(f"\n[FAISS] Suppression de {len(stale_ids)} vecteurs perimes, ajout de {len(to_embed)}")
+    index = index_factory.remove_ids(index, spec, chunk_labels(stale_ids))
+    with create_pipeline(workers) as pipeline:
+        if to_embed:
+            index.add_with_ids(l2_normalize(pipeline.encode([c.text for c in to_embed], batch_size)),
+                               chunk_labels([c.id for c in to_embed]))
+
+    save_index(index, chunks, spec, fingerprints)
+    print_stats(len(chunks), count_by_canton(chunks), spec, index.d, embedded=len(to_embed),
+                removed=len(stale_ids), elapsed=time.perf_counter() - start, pipeline=pipeline)
+    return True
+
+
 # ============================================
 # MAIN
 # ============================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Construit l'index FAISS du RAG fiscal")
+    parser.add_argument("--index-type", default="auto", choices=index_factory.INDEX_TYPES,
+                        help="auto = flat / hnsw / ivfpq selon le nombre de chunks")
+    parser.add_argument("--full", action="store_true",
+                        help="Reconstruire tout l'index (par defaut: seuls les documents modifies sont re-encodes)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Processus d'encodage (0 = moitie des coeurs, 1 = dans le processus courant)")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="Chunks par lot d'encodage")
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, choices=EMBEDDING_BACKENDS,
+                        help="Backend d'encodage (onnx*: lancer export_onnx_embedder.py avant)")
+    args = parser.parse_args()
+    EMBEDDING_BACKEND = args.backend
+
     print("="*60)
     print("SWISS TAX RAG - Build FAISS Index")
     print("="*60)
 
-    # Charger et decouper les documents
-    chunks = load_and_chunk_all()
+    if args.full:
+        ok = build_index(args.index_type, args.workers, args.batch_size)
+    else:
+        ok = update_index(args.index_type, args.workers, args.batch_size)
 
-    if not chunks:
+    if not ok:
         print("\n[ERROR] Aucun document trouve!")
         print(f"   Placez vos fichiers .txt dans: {RAG_DATA_DIR}")
         exit(1)
 
-    # Construire l'index
-    build_index(chunks)
-
-    print("\n[DONE] INDEX FAISS CREE AVEC SUCCES!")
-    print(f"   L'app Streamlit (build_faiss_index.py) peut maintenant l'utiliser.")
+    print("\n[DONE] INDEX FAISS A JOUR!")
+    print(f"   L'API (services/rag_fiscal.py) et l'app Streamlit peuvent maintenant l'utiliser.")
@@ -1,8 +1,9 @@
 import joblib
-import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from app_modules import load_app_module
+
 # ============================================
 # CONFIGURATION DES CHEMINS
 # ============================================
@@ -11,6 +12,15 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent  # SwissRelocator/
 BACKEND_DIR = PROJECT_ROOT / "backend"
 ML_MODELS_DIR = BACKEND_DIR / "ml_models"
 
+# Features calculées par le même code que l'entraînement et l'API :
+# app/services/rent_features.py, chargé sous son nom qualifié services.rent_features
+# (app/ n'est pas sur sys.path)
+rent_features = load_app_module("services.rent_features")
+FEATURE_NAMES = rent_features.FEATURE_NAMES
+FEATURE_STATE_FILENAME = rent_features.FEATURE_STATE_FILENAME
+RentFeatureTransformer = rent_features.RentFeatureTransformer
+canonical_city = rent_features.canonical_city
+
 # ============================================
 # FONCTION DE PRÉDICTION COMPLÈTE
 # ============================================
@@ -33,7 +43,7 @@ def predire_prix_bureau(ville, surface, latitude, longitude,
     longitude : float
         Longitude GPS
     pieces : int, optional
-        Nombre de pièces (si None, valeur par défaut = 4)
+        Nombre de pièces (si None, médiane apprise par ville et taille de surface)
     etage : int, optional
         Numéro d'étage (0 = RDC, si None = inconnu)
     has_parking : bool
@@ -48,83 +58,25 @@ def predire_prix_bureau(ville, surface, latitude, longitude,
     float : Prix estimé en CHF/mois
     """
 
-    # Charger le modèle
+    # Charger le modèle et l'état des features sauvegardé à côté
     model = joblib.load(ML_MODELS_DIR / "immo_ch_model.pkl")
-    
-    # Calculer distance du centre
-    city_centers = {
-        'Genève': (46.2044, 6.1432),
-        'Zürich': (47.3769, 8.5417),
-        'Lausanne': (46.5197, 6.6323),
-        'Basel': (47.5596, 7.5886)
-    }
-    center_lat, center_lon = city_centers[ville]
-    lat_diff = latitude - center_lat
-    lon_diff = longitude - center_lon
-    distance_centre = np.sqrt((lat_diff * 111)**2 + (lon_diff * 85)**2)
-    
-    # Surface transformée
-    surface_log = np.log1p(surface)
-    surface_squared = surface ** 2
-    
+    transformer = RentFeatureTransformer.load_or_legacy(ML_MODELS_DIR / FEATURE_STATE_FILENAME)
+
     # Normaliser le nom de ville (FR/DE)
-    ville_normalized = ville.lower().strip()
-    ville_norm_map = {
-        'bale': 'Basel', 'bâle': 'Basel', 'basel': 'Basel', 'basle': 'Basel',
-        'genève': 'Genève', 'geneve': 'Genève', 'geneva': 'Genève', 'genf': 'Genève',
-        'zürich': 'Zürich', 'zurich': 'Zürich',
-        'lausanne': 'Lausanne'
-    }
-    ville = ville_norm_map.get(ville_normalized, ville)
-
-    # Encodages
-    ville_mapping = {'Basel': 0, 'Centre': 1, 'Genève': 2, 'Lausanne': 3, 'Zürich': 4}
-    ville_encoded = ville_mapping.get(ville, 1)  # Default to Centre if unknown
-    type_bien_encoded = 0 if type_bien == 'Bureau' else 1
-    
-    # Features pièces
-    pieces_filled = pieces if pieces is not None else 4.0
-    pieces_unknown = 0 if pieces is not None else 1
-    
-    # Features étage
-    etage_filled = etage if etage is not None else -1
-    is_ground_floor = 1 if etage == 0 else 0
-    is_high_floor = 1 if etage >= 5 else 0
-    etage_unknown = 0 if etage is not None else 1
-    
-    # Équipements
-    has_parking_int = 1 if has_parking else 0
-    has_lift_int = 1 if has_lift else 0
-    
-    # Interactions (sans data leakage - pas de prix_m2)
-    surface_ville = surface * ville_encoded
-    surface_distance = surface * distance_centre
-
-    # Créer le vecteur de features (ORDRE IMPORTANT !)
-    features = {
-        'latitude': latitude,
-        'longitude': longitude,
-        'distance_centre': distance_centre,
-        'ville_encoded': ville_encoded,
-        'surface': surface,
-        'surface_log': surface_log,
-        'surface_squared': surface_squared,
-        'pieces_filled': pieces_filled,
-        'pieces_unknown': pieces_unknown,
-        'etage_filled': etage_filled,
-        'etage_unknown': etage_unknown,
-        'is_ground_floor': is_ground_floor,
-        'is_high_floor': is_high_floor,
-        'type_bien_encoded': type_bien_encoded,
-        'has_parking_int': has_parking_int,
-        'has_lift_int': has_lift_int,
-        'surface_ville': surface_ville,
-        'surface_distance': surface_distance
-    }
-    
-    df_pred = pd.DataFrame([features])
+    ville_normalized = canonical_city(ville)
+    if ville_normalized is None:
+        raise ValueError(f"Ville non supportée : {ville} (Genève, Zürich, Lausanne ou Basel)")
+
+    # Même calcul qu'à l'entraînement (pièces inconnues : médiane apprise ville / taille)
+    features = transformer.transform_one(
+        city=ville_normalized, surface=surface, latitude=latitude, longitude=longitude,
+        pieces=pieces, etage=etage, bien_type=type_bien,
+        has_parking=has_parking, has_lift=has_lift,
+    )
+
+    df_pred = pd.DataFrame([features], columns=FEATURE_NAMES)
     prix = model.predict(df_pred)[0]
-    
+
     return prix
 
 # ============================================
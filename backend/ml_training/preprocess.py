@@ -1,11 +1,24 @@
 # Data preprocessing and cleaning
 
+import argparse
+import numpy as np
 import pandas as pd
 import json
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
 import re
 
+from streaming_stats import DatasetProfile, QualityReport
+
+# orjson (optionnel) : parsing JSON 2 à 5x plus rapide que json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # ============================================
 # CONFIGURATION
 # ============================================
@@ -20,84 +33,141 @@ RAW_DATA_DIR = BACKEND_DIR / "data" / "raw" / "immoscout"
 # Données nettoyées (CSV)
 PROCESSED_DATA_DIR = BACKEND_DIR / "data" / "processed"
 
+# Rapports qualité (JSON) des filtrages
+REPORTS_DIR = PROCESSED_DATA_DIR / "reports"
+
 # Configuration scraping
 VILLES = ["Genève", "Lausanne", "Zurich", "Bale"]
 TYPES_TRANSACTION = ["Location", "Vente"]
 TYPES_BIEN = ["Bureau", "Commercial"]
 
+# Ingestion : threads de lecture, annonces par lot de nettoyage
+# (fichiers en vol = 2 x threads : la mémoire ne dépend pas du volume total)
+LOAD_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+CLEAN_BATCH_SIZE = 5000
+
+# Motifs du nettoyage, compilés une fois (clean_record)
+PRICE_NON_DIGIT_RE = re.compile(r"[^\d]")
+NUMBER_RE = re.compile(r'(\d+(?:\.\d+)?)')
+INTEGER_RE = re.compile(r'(\d+)')
+ADDRESS_CITY_RE = re.compile(r'(\d{4})\s+([A-Za-zéèêàâûôîäöü\s-]+)$')
+
 # ============================================
 # FONCTION DE CHARGEMENT RÉCURSIF
 # ============================================
 
-def load_all_json_files(base_dir, villes, types_transaction, types_bien):
+def iter_json_files(base_dir, villes, types_transaction, types_bien):
     """
-    Charge tous les fichiers JSON depuis l'arborescence complète
+    Parcourt l'arborescence Transaction/Bien/Ville et renvoie
+    (fichier, ville, transaction, bien) pour chaque fichier JSON
     """
-    
-    all_data = []
-    
-    print("="*70)
-    print("🔍 CHARGEMENT DES DONNÉES IMMOSCOUT24")
-    print("="*70)
-    print(f"\n📂 Répertoire de base : {base_dir}")
-    print(f"🏙️  Villes : {', '.join(villes)}")
-    print(f"💼 Types de transaction : {', '.join(types_transaction)}")
-    print(f"🏢 Types de bien : {', '.join(types_bien)}")
-    
-    # Parcourir toute l'arborescence
     for transaction_type in types_transaction:
         for bien_type in types_bien:
             for ville in villes:
-                
+
                 # Construire le chemin
                 folder_path = base_dir / transaction_type / bien_type / ville
-                
+
                 if not folder_path.exists():
                     print(f"\n⚠️  Dossier non trouvé : {folder_path}")
                     continue
-                
+
                 print(f"\n📂 {transaction_type}/{bien_type}/{ville}")
-                
-                # Trouver tous les fichiers JSON
-                json_files = list(folder_path.glob("*.json"))
-                
+
+                # Trouver tous les fichiers JSON (ordre stable d'une exécution à l'autre)
+                json_files = sorted(folder_path.glob("*.json"))
+
                 if not json_files:
                     print(f"   ❌ Aucun fichier JSON")
                     continue
-                
+
                 print(f"   ✓ {len(json_files)} fichier(s) JSON trouvé(s)")
-                
-                # Charger chaque fichier
+
                 for json_file in json_files:
-                    try:
-                        with open(json_file, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            
-                            # Ajouter métadonnées
-                            if isinstance(data, list):
-                                for item in data:
-                                    item['source_ville'] = ville
-                                    item['source_transaction'] = transaction_type
-                                    item['source_bien_type'] = bien_type
-                                    item['source_file'] = json_file.name
-                                    all_data.append(item)
-                            elif isinstance(data, dict):
-                                data['source_ville'] = ville
-                                data['source_transaction'] = transaction_type
-                                data['source_bien_type'] = bien_type
-                                data['source_file'] = json_file.name
-                                all_data.append(data)
-                                
-                    except json.JSONDecodeError as e:
-                        print(f"   ⚠️  Erreur JSON dans {json_file.name}: {e}")
-                    except Exception as e:
-                        print(f"   ⚠️  Erreur lecture {json_file.name}: {e}")
-    
+                    yield json_file, ville, transaction_type, bien_type
+
+
+def read_json_file(json_file, ville, transaction_type, bien_type):
+    """
+    Lit un fichier JSON (orjson si disponible) et ajoute les métadonnées
+    de source à chaque annonce
+
+    Returns:
+        (annonces, message d'erreur ou None)
+    """
+    try:
+        raw = Path(json_file).read_bytes()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    except (json.JSONDecodeError, ValueError) as e:
+        # orjson.JSONDecodeError hérite de ValueError
+        return [], f"Erreur JSON dans {json_file.name}: {e}"
+    except Exception as e:
+        return [], f"Erreur lecture {json_file.name}: {e}"
+
+    if isinstance(data, dict):
+        data = [data]
+    elif not isinstance(data, list):
+        return [], None
+
+    items = []
+    for item in data:
+        # Ajouter métadonnées
+        item['source_ville'] = ville
+        item['source_transaction'] = transaction_type
+        item['source_bien_type'] = bien_type
+        item['source_file'] = json_file.name
+        items.append(item)
+    return items, None
+
+
+def iter_json_records(base_dir, villes, types_transaction, types_bien, workers=LOAD_WORKERS, files=None):
+    """
+    Générateur des annonces de toute l'arborescence, dans l'ordre du
+    parcours. Les fichiers sont lus en parallèle (pool de threads) mais
+    seuls 2 x workers fichiers sont en vol : les annonces partent au
+    nettoyage au fil de l'eau, sans liste globale en mémoire.
+    files : (fichier, ville, transaction, bien) à lire à la place du
+    parcours complet (mode incrémental)
+    """
+
+    print("="*70)
+    print("🔍 CHARGEMENT DES DONNÉES IMMOSCOUT24")
+    print("="*70)
+    print(f"\n📂 Répertoire de base : {base_dir}")
+    print(f"🏙️  Villes : {', '.join(villes)}")
+    print(f"💼 Types de transaction : {', '.join(types_transaction)}")
+    print(f"🏢 Types de bien : {', '.join(types_bien)}")
+    print(f"⚙️  Lecture : {max(1, workers)} thread(s), parser {'orjson' if orjson is not None else 'json'}")
+
+    if files is None:
+        files = iter_json_files(base_dir, villes, types_transaction, types_bien)
+    files = iter(files)
+    total = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = deque(executor.submit(read_json_file, *f) for f in islice(files, 2 * max(1, workers)))
+        while pending:
+            items, error = pending.popleft().result()
+            # Un fichier consommé -> un fichier soumis (fenêtre bornée)
+            for f in islice(files, 1):
+                pending.append(executor.submit(read_json_file, *f))
+            if error:
+                print(f"   ⚠️  {error}")
+            total += len(items)
+            yield from items
+            del items
+
     print(f"\n{'='*70}")
-    print(f"✅ TOTAL ANNONCES CHARGÉES : {len(all_data):,}")
+    print(f"✅ TOTAL ANNONCES CHARGÉES : {total:,}")
     print(f"{'='*70}")
-    
-    return all_data
+
+
+def load_all_json_files(base_dir, villes, types_transaction, types_bien, workers=LOAD_WORKERS):
+    """
+    Charge tous les fichiers JSON depuis l'arborescence complète
+    (liste complète en mémoire : préférer iter_json_records)
+    """
+    return list(iter_json_records(base_dir, villes, types_transaction, types_bien, workers))
 
 # ============================================
 # TRADUCTION ALLEMAND -> FRANÇAIS (features ImmoScout)
@@ -172,14 +242,169 @@ def translate_features(features_dict):
 # FONCTION DE NETTOYAGE
 # ============================================
 
-def clean_immoscout_data(all_data):
+def clean_record(item):
     """
-    Nettoie et structure les données ImmoscoutCH
+    Nettoie une annonce brute (avec métadonnées de source)
+
+    Returns:
+        dict de l'annonce nettoyée (lève une exception si l'annonce est invalide)
     """
+    # ============================================
+    # EXTRACTION GPS
+    # ============================================
+    gps = item.get('gps', '').split(',')
+    latitude = float(gps[0].strip()) if len(gps) > 0 and gps[0] else None
+    longitude = float(gps[1].strip()) if len(gps) > 1 and gps[1] else None
 
-    if len(all_data) == 0:
-        print("\n❌ Aucune donnée à nettoyer !")
-        return None
+    # ============================================
+    # EXTRACTION PRIX
+    # ============================================
+    # Gérer location (priceNet) et vente (totalPrice ou priceNet)
+    price_raw = None
+    if item.get('source_transaction') == 'Location':
+        price_raw = item.get('priceNet', '')
+    else:  # Vente
+        price_raw = item.get('totalPrice') or item.get('priceNet', '')
+
+    price = None
+    if price_raw:
+        # "CHF 3'750.–" ou "CHF 450'000.–" → 3750 ou 450000
+        price_clean = PRICE_NON_DIGIT_RE.sub("", str(price_raw))
+        price = float(price_clean) if price_clean else None
+
+    # ============================================
+    # EXTRACTION SURFACE (FR + DE)
+    # ============================================
+    features_raw = item.get('features', {})
+    features = translate_features(features_raw)  # Traduire DE -> FR
+
+    # Essayer différentes clés possibles (FR et DE)
+    surface_raw = (features.get('Surface habitable') or
+                  features.get('Surface utile') or
+                  features.get('Surface') or
+                  features.get('Nutzfläche') or  # DE fallback
+                  features.get('Wohnfläche') or  # DE fallback
+                  item.get('surface'))
+    
+    surface = None
+    if surface_raw:
+        # "187 m2" ou "187m²" ou juste "187" → 187
+        if isinstance(surface_raw, (int, float)):
+            surface = float(surface_raw)
+        else:
+            surface_match = NUMBER_RE.search(str(surface_raw))
+            if surface_match:
+                surface = float(surface_match.group(1))
+    
+    # ============================================
+    # EXTRACTION LOCALISATION
+    # ============================================
+    address = item.get('address', '')
+    
+    # Extraire code postal et ville de l'adresse
+    # "Avenue Rosemont 12, 1208 Genève" → 1208, Genève
+    city_match = ADDRESS_CITY_RE.search(address)
+    postal_code = city_match.group(1) if city_match else None
+    city = city_match.group(2).strip() if city_match else item.get('source_ville')
+    
+    # ============================================
+    # EXTRACTION AUTRES FEATURES (FR + DE)
+    # ============================================
+
+    # Nombre de pièces (FR: Nombre de pièce(s), DE: Zimmer)
+    pieces = (features.get("Nombre de pièce(s)") or
+             features.get("Pièces") or
+             features.get("Zimmer") or
+             features.get("Anzahl Zimmer"))
+    if pieces:
+        pieces_match = NUMBER_RE.search(str(pieces))
+        pieces = float(pieces_match.group(1)) if pieces_match else None
+
+    # Étage (FR: Etage, DE: Stockwerk)
+    etage = (features.get("Etage") or
+            features.get("Étage") or
+            features.get("Stockwerk"))
+    if etage:
+        etage_match = INTEGER_RE.search(str(etage))
+        etage = int(etage_match.group(1)) if etage_match else None
+
+    # Type de bien (FR: Type, DE: Typ)
+    property_type = (features.get("Type") or
+                   features.get("Typ") or
+                   item.get('source_bien_type', 'Bureau'))
+
+    # Disponibilité (FR: Disponibilité, DE: Verfügbarkeit)
+    disponibilite = (features.get("Disponibilité") or
+                   features.get("Disponible dès") or
+                   features.get("Verfügbarkeit") or
+                   features.get("Verfügbar ab"))
+
+    # Features secondaires (FR + DE keywords)
+    features_secondary = item.get('featuresSecondary', [])
+    has_parking = any('parc' in str(f).lower() or 'parkplatz' in str(f).lower() for f in features_secondary)
+    has_lift = any('ascenseur' in str(f).lower() or 'lift' in str(f).lower() or 'aufzug' in str(f).lower() for f in features_secondary)
+    
+    # ============================================
+    # CRÉER LE RECORD NETTOYÉ
+    # ============================================
+    record = {
+        # Identifiants
+        'id': item.get('id'),
+        'url': item.get('url'),
+        
+        # Localisation
+        'city': city,
+        'postal_code': postal_code,
+        'address': address,
+        'latitude': latitude,
+        'longitude': longitude,
+        
+        # Prix et surface
+        'price': price,
+        'surface': surface,
+        'prix_m2': price / surface if (price and surface and surface > 0) else None,
+        
+        # Caractéristiques
+        'pieces': pieces,
+        'etage': etage,
+        'property_type': property_type,
+        'disponibilite': disponibilite,
+        
+        # Équipements
+        'has_parking': has_parking,
+        'has_lift': has_lift,
+        
+        # Métadonnées
+        'title': item.get('title', '').strip('"'),
+        'scraped_at': item.get('scraped_at'),
+        'nb_images': len(item.get('images', [])),
+        
+        # Sources
+        'source_ville': item.get('source_ville'),
+        'source_transaction': item.get('source_transaction'),
+        'source_bien_type': item.get('source_bien_type'),
+        'source_file': item.get('source_file')
+    }
+
+    return record
+
+
+# Colonnes du DataFrame nettoyé (MÊME ORDRE QUE clean_record)
+CLEAN_COLUMNS = [
+    'id', 'url', 'city', 'postal_code', 'address', 'latitude', 'longitude',
+    'price', 'surface', 'prix_m2', 'pieces', 'etage', 'property_type', 'disponibilite',
+    'has_parking', 'has_lift', 'title', 'scraped_at', 'nb_images',
+    'source_ville', 'source_transaction', 'source_bien_type', 'source_file',
+]
+
+def clean_immoscout_data(all_data, batch_size=CLEAN_BATCH_SIZE):
+    """
+    Nettoie et structure les données ImmoscoutCH
+
+    all_data peut être une liste ou un générateur (iter_json_records) :
+    les annonces brutes sont nettoyées par lots de batch_size puis
+    libérées, seules les annonces nettoyées sont conservées.
+    """
 
     print("\n" + "="*70)
     print("🧹 NETTOYAGE DES DONNÉES")
@@ -187,156 +412,28 @@ def clean_immoscout_data(all_data):
 
     cleaned_records = []
     errors = []
+    n_items = 0
+
+    records = iter(all_data)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+
+        for idx, item in enumerate(batch, start=n_items):
+            try:
+                cleaned_records.append(clean_record(item))
+            except Exception as e:
+                error_msg = f"Annonce {item.get('id', idx)}: {str(e)}"
+                errors.append(error_msg)
+                continue
+        n_items += len(batch)
+        del batch
+
+    if n_items == 0:
+        print("\n❌ Aucune donnée à nettoyer !")
+        return None
 
-    for idx, item in enumerate(all_data):
-        try:
-            # ============================================
-            # EXTRACTION GPS
-            # ============================================
-            gps = item.get('gps', '').split(',')
-            latitude = float(gps[0].strip()) if len(gps) > 0 and gps[0] else None
-            longitude = float(gps[1].strip()) if len(gps) > 1 and gps[1] else None
-
-            # ============================================
-            # EXTRACTION PRIX
-            # ============================================
-            # Gérer location (priceNet) et vente (totalPrice ou priceNet)
-            price_raw = None
-            if item.get('source_transaction') == 'Location':
-                price_raw = item.get('priceNet', '')
-            else:  # Vente
-                price_raw = item.get('totalPrice') or item.get('priceNet', '')
-
-            price = None
-            if price_raw:
-                # "CHF 3'750.–" ou "CHF 450'000.–" → 3750 ou 450000
-                price_clean = re.sub(r"[^\d]", "", str(price_raw))
-                price = float(price_clean) if price_clean else None
-
-            # ============================================
-            # EXTRACTION SURFACE (FR + DE)
-            # ============================================
-            features_raw = item.get('features', {})
-            features = translate_features(features_raw)  # Traduire DE -> FR
-
-            # Essayer différentes clés possibles (FR et DE)
-            surface_raw = (features.get('Surface habitable') or
-                          features.get('Surface utile') or
-                          features.get('Surface') or
-                          features.get('Nutzfläche') or  # DE fallback
-                          features.get('Wohnfläche') or  # DE fallback
-                          item.get('surface'))
-            
-            surface = None
-            if surface_raw:
-                # "187 m2" ou "187m²" ou juste "187" → 187
-                if isinstance(surface_raw, (int, float)):
-                    surface = float(surface_raw)
-                else:
-                    surface_match = re.search(r'(\d+(?:\.\d+)?)', str(surface_raw))
-                    if surface_match:
-                        surface = float(surface_match.group(1))
-            
-            # ============================================
-            # EXTRACTION LOCALISATION
-            # ============================================
-            address = item.get('address', '')
-            
-            # Extraire code postal et ville de l'adresse
-            # "Avenue Rosemont 12, 1208 Genève" → 1208, Genève
-            city_match = re.search(r'(\d{4})\s+([A-Za-zéèêàâûôîäöü\s-]+)$', address)
-            postal_code = city_match.group(1) if city_match else None
-            city = city_match.group(2).strip() if city_match else item.get('source_ville')
-            
-            # ============================================
-            # EXTRACTION AUTRES FEATURES (FR + DE)
-            # ============================================
-
-            # Nombre de pièces (FR: Nombre de pièce(s), DE: Zimmer)
-            pieces = (features.get("Nombre de pièce(s)") or
-                     features.get("Pièces") or
-                     features.get("Zimmer") or
-                     features.get("Anzahl Zimmer"))
-            if pieces:
-                pieces_match = re.search(r'(\d+(?:\.\d+)?)', str(pieces))
-                pieces = float(pieces_match.group(1)) if pieces_match else None
-
-            # Étage (FR: Etage, DE: Stockwerk)
-            etage = (features.get("Etage") or
-                    features.get("Étage") or
-                    features.get("Stockwerk"))
-            if etage:
-                etage_match = re.search(r'(\d+)', str(etage))
-                etage = int(etage_match.group(1)) if etage_match else None
-
-            # Type de bien (FR: Type, DE: Typ)
-            property_type = (features.get("Type") or
-                           features.get("Typ") or
-                           item.get('source_bien_type', 'Bureau'))
-
-            # Disponibilité (FR: Disponibilité, DE: Verfügbarkeit)
-            disponibilite = (features.get("Disponibilité") or
-                           features.get("Disponible dès") or
-                           features.get("Verfügbarkeit") or
-                           features.get("Verfügbar ab"))
-
-            # Features secondaires (FR + DE keywords)
-            features_secondary = item.get('featuresSecondary', [])
-            # Traduire les features secondaires aussi
-            features_secondary_translated = [FEATURE_TRANSLATIONS_DE_FR.get(f, f) for f in features_secondary]
-
-            has_parking = any('parc' in str(f).lower() or 'parkplatz' in str(f).lower() for f in features_secondary)
-            has_lift = any('ascenseur' in str(f).lower() or 'lift' in str(f).lower() or 'aufzug' in str(f).lower() for f in features_secondary)
-            
-            # ============================================
-            # CRÉER LE RECORD NETTOYÉ
-            # ============================================
-            record = {
-                # Identifiants
-                'id': item.get('id'),
-                'url': item.get('url'),
-                
-                # Localisation
-                'city': city,
-                'postal_code': postal_code,
-                'address': address,
-                'latitude': latitude,
-                'longitude': longitude,
-                
-                # Prix et surface
-                'price': price,
-                'surface': surface,
-                'prix_m2': price / surface if (price and surface and surface > 0) else None,
-                
-                # Caractéristiques
-                'pieces': pieces,
-                'etage': etage,
-                'property_type': property_type,
-                'disponibilite': disponibilite,
-                
-                # Équipements
-                'has_parking': has_parking,
-                'has_lift': has_lift,
-                
-                # Métadonnées
-                'title': item.get('title', '').strip('"'),
-                'scraped_at': item.get('scraped_at'),
-                'nb_images': len(item.get('images', [])),
-                
-                # Sources
-                'source_ville': item.get('source_ville'),
-                'source_transaction': item.get('source_transaction'),
-                'source_bien_type': item.get('source_bien_type'),
-                'source_file': item.get('source_file')
-            }
-            
-            cleaned_records.append(record)
-            
-        except Exception as e:
-            error_msg = f"Annonce {item.get('id', idx)}: {str(e)}"
-            errors.append(error_msg)
-            continue
-    
     print(f"\n✅ {len(cleaned_records):,} annonces nettoyées")
     
     if errors:
@@ -352,13 +449,111 @@ def clean_immoscout_data(all_data):
     
     return df
 
+# ============================================
+# NORMALISATION DES VILLES
+# ============================================
+
+def normalize_city(city):
+    """Normaliser les variantes de noms de villes"""
+    city_lower = str(city).lower().strip()
+    
+    # Genève
+    if city_lower in ['genève', 'geneva', 'genf', 'geneve', 'ginevra']:
+        return 'Genève'
+    
+    # Zurich
+    if city_lower in ['zürich', 'zurich']:
+        return 'Zürich'
+    
+    # Lausanne
+    if city_lower == 'lausanne':
+        return 'Lausanne'
+    
+    # Quartiers de Genève à normaliser
+    geneva_neighborhoods = ['les acacias', 'cointrin', 'champel', 'plainpalais', 
+                            'le grand-saconnex', 'le petit-saconnex', 'eaux-vives-lac']
+    if city_lower in geneva_neighborhoods:
+        return 'Genève'
+    
+    # Quartiers de Zürich
+    zurich_neighborhoods = ['oerlikon', 'seebach', 'leimbach zh']
+    if city_lower in zurich_neighborhoods:
+        return 'Zürich'
+
+    # Bâle / Basel
+    if city_lower in ['bâle', 'basel', 'basle', 'bale']:
+        return 'Basel'
+
+    # Quartiers de Basel
+    basel_neighborhoods = ['riehen', 'bettingen', 'birsfelden', 'muttenz', 'pratteln', 'allschwil', 'binningen']
+    if city_lower in basel_neighborhoods:
+        return 'Basel'
+
+    # Par défaut, capitaliser proprement
+    return city.strip().title()
+
 # ============================================
 # FONCTION DE FILTRAGE ET VALIDATION
 # ============================================
 
-def filter_and_validate(df):
+# Données essentielles, surfaces plausibles, percentiles des outliers de prix
+ESSENTIAL_COLUMNS = ['price', 'surface', 'city', 'latitude', 'longitude']
+SURFACE_MIN, SURFACE_MAX = 5, 5000
+PRICE_QUANTILES = (0.005, 0.995)
+
+# Transactions conservées, dans l'ordre du dataset final
+PRICE_TRANSACTIONS = ['Location', 'Vente']
+
+# Profil du dataset final (rapport qualité JSON)
+FINAL_PROFILE = {
+    'counts': ['city', 'source_transaction', 'source_bien_type', 'categorie_taille', 'categorie_prix'],
+    'numeric': ['price', 'surface', 'prix_m2', 'pieces'],
+    'grouped': [(['source_transaction'], 'price'), (['city', 'source_transaction'], 'prix_m2')],
+}
+
+
+def essential_mask(df):
+    """Étape 2 : lignes dont les données essentielles sont renseignées"""
+    return df[ESSENTIAL_COLUMNS].notna().all(axis=1).to_numpy()
+
+
+def surface_mask(df):
+    """Étape 3 : surfaces plausibles"""
+    surface = df['surface'].to_numpy(dtype=float, na_value=np.nan)
+    return (surface >= SURFACE_MIN) & (surface <= SURFACE_MAX)
+
+
+def price_population(df):
+    """
+    Masque des lignes conservées par les étapes 2-3 de filter_and_validate :
+    celles sur lesquelles les percentiles de prix sont calculés
+    (MÊMES MASQUES QUE filter_and_validate, doublons exclus à part)
+    """
+    return pd.Series(essential_mask(df) & surface_mask(df), index=df.index)
+
+
+def price_outlier_bounds(prices, transaction, price_bounds=None):
+    """
+    Bornes (basse, haute) des prix d'une transaction : percentiles exacts
+    de prices (MÊME INTERPOLATION QUE Series.quantile), ou bornes fournies
+    (sketches du mode incrémental)
+    """
+    if price_bounds is not None and transaction in price_bounds:
+        return price_bounds[transaction]
+    q_low, q_high = np.quantile(prices, PRICE_QUANTILES)
+    return q_low, q_high
+
+
+def filter_and_validate(df, price_bounds=None, report=None):
     """
     Filtre et valide les données nettoyées
+
+    Les étapes 1 à 4 combinent des masques booléens sur df : un seul
+    sous-DataFrame est extrait, à la fin du filtrage.
+    price_bounds : {transaction: (borne basse, borne haute)} des outliers
+    de prix ; par défaut, percentiles calculés sur les lignes retenues.
+    report : QualityReport (streaming_stats.py) complété par les étapes,
+    les bornes et le profil du dataset final
     """
     
     print("\n" + "="*70)
@@ -367,43 +562,54 @@ def filter_and_validate(df):
     
     lignes_initiales = len(df)
     print(f"\n📊 Lignes initiales : {lignes_initiales:,}")
+    if report is not None:
+        report.rows_in = lignes_initiales
+
+    def record(name, avant, restantes):
+        if report is not None:
+            report.step(name, avant - restantes, restantes)
     
     # 1. Supprimer doublons
-    avant = len(df)
-    df = df.drop_duplicates(subset=['id'])
-    print(f"\n1️⃣  Doublons : {avant - len(df)} supprimés → {len(df):,} lignes")
+    keep = ~df['id'].duplicated().to_numpy()
+    avant, n = lignes_initiales, int(keep.sum())
+    print(f"\n1️⃣  Doublons : {avant - n} supprimés → {n:,} lignes")
+    record("doublons", avant, n)
     
     # 2. Garder seulement lignes avec données essentielles
-    avant = len(df)
-    df = df.dropna(subset=['price', 'surface', 'city', 'latitude', 'longitude'])
-    print(f"2️⃣  Données incomplètes : {avant - len(df)} supprimées → {len(df):,} lignes")
+    keep &= essential_mask(df)
+    avant, n = n, int(keep.sum())
+    print(f"2️⃣  Données incomplètes : {avant - n} supprimées → {n:,} lignes")
+    record("donnees_incompletes", avant, n)
     
     # 3. Filtrer surfaces aberrantes
-    avant = len(df)
-    df = df[(df['surface'] >= 5) & (df['surface'] <= 5000)]
-    print(f"3️⃣  Surfaces aberrantes (<5m² ou >5000m²) : {avant - len(df)} supprimées → {len(df):,} lignes")
-    
-    # 4. Filtrer prix aberrants (percentiles 0.5% et 99.5%)
-    avant = len(df)
-    
-    # Séparer location et vente pour les outliers
-    df_location = df[df['source_transaction'] == 'Location']
-    df_vente = df[df['source_transaction'] == 'Vente']
-    
-    # Filtrer locations
-    if len(df_location) > 0:
-        q_low = df_location['price'].quantile(0.005)
-        q_high = df_location['price'].quantile(0.995)
-        df_location = df_location[(df_location['price'] >= q_low) & (df_location['price'] <= q_high)]
-    
-    # Filtrer ventes
-    if len(df_vente) > 0:
-        q_low = df_vente['price'].quantile(0.005)
-        q_high = df_vente['price'].quantile(0.995)
-        df_vente = df_vente[(df_vente['price'] >= q_low) & (df_vente['price'] <= q_high)]
-    
-    df = pd.concat([df_location, df_vente], ignore_index=True)
-    print(f"4️⃣  Outliers prix : {avant - len(df)} supprimés → {len(df):,} lignes")
+    keep &= surface_mask(df)
+    avant, n = n, int(keep.sum())
+    print(f"3️⃣  Surfaces aberrantes (<{SURFACE_MIN}m² ou >{SURFACE_MAX}m²) : {avant - n} supprimées → {n:,} lignes")
+    record("surfaces_aberrantes", avant, n)
+    
+    # 4. Filtrer prix aberrants (percentiles 0.5% et 99.5%), séparément
+    # pour location et vente ; lignes des locations puis des ventes
+    transactions = df['source_transaction'].to_numpy()
+    prices = df['price'].to_numpy(dtype=float, na_value=np.nan)
+    bounds = {}
+    rows = []
+    for transaction in PRICE_TRANSACTIONS:
+        in_transaction = keep & (transactions == transaction)
+        if in_transaction.any():
+            q_low, q_high = price_outlier_bounds(prices[in_transaction], transaction, price_bounds)
+            bounds[transaction] = [float(q_low), float(q_high)]
+            in_transaction &= (prices >= q_low) & (prices <= q_high)
+        rows.append(np.flatnonzero(in_transaction))
+    rows = np.concatenate(rows)
+    
+    source = " (bornes : sketches de quantiles)" if price_bounds is not None else ""
+    print(f"4️⃣  Outliers prix{source} : {n - len(rows)} supprimés → {len(rows):,} lignes")
+    record("outliers_prix", n, len(rows))
+    if report is not None:
+        report.details['price_bounds'] = bounds
+        report.details['price_bounds_source'] = 'sketch' if price_bounds is not None else 'exact'
+    
+    df = df.iloc[rows].reset_index(drop=True)
     
     # 5. Catégoriser les données
     print(f"\n5️⃣  Création des catégories...")
@@ -438,101 +644,171 @@ def filter_and_validate(df):
     print(f"   ✓ Catégories créées")
     
     # ============================================
-    # STATISTIQUES FINALES
+    # STATISTIQUES FINALES (rapport qualité JSON)
     # ============================================
     
-    print("\n" + "="*70)
-    print("📊 STATISTIQUES DATASET FINAL")
-    print("="*70)
-    
     print(f"\n📏 Dimensions : {len(df):,} lignes × {len(df.columns)} colonnes")
-    print(f"🎯 Taux de conservation : {len(df)/lignes_initiales*100:.1f}%")
-    
-    print(f"\n🏙️  RÉPARTITION PAR VILLE :")
-    print(df['city'].value_counts())
-    
-    print(f"\n💼 RÉPARTITION PAR TYPE DE TRANSACTION :")
-    print(df['source_transaction'].value_counts())
+    if lignes_initiales:
+        print(f"🎯 Taux de conservation : {len(df)/lignes_initiales*100:.1f}%")
     
-    print(f"\n🏢 RÉPARTITION PAR TYPE DE BIEN :")
-    print(df['source_bien_type'].value_counts())
-    
-    print(f"\n💰 STATISTIQUES PRIX :")
-    for transaction in df['source_transaction'].unique():
-        df_trans = df[df['source_transaction'] == transaction]
-        print(f"\n  {transaction} :")
-        print(f"    • Moyenne : {df_trans['price'].mean():,.0f} CHF")
-        print(f"    • Médiane : {df_trans['price'].median():,.0f} CHF")
-        print(f"    • Min : {df_trans['price'].min():,.0f} CHF")
-        print(f"    • Max : {df_trans['price'].max():,.0f} CHF")
-    
-    print(f"\n📐 STATISTIQUES SURFACE :")
-    print(f"  • Moyenne : {df['surface'].mean():.0f}m²")
-    print(f"  • Médiane : {df['surface'].median():.0f}m²")
-    print(f"  • Min : {df['surface'].min():.0f}m²")
-    print(f"  • Max : {df['surface'].max():.0f}m²")
-    
-    print(f"\n💵 PRIX/M² MÉDIAN PAR VILLE :")
-    prix_m2_ville = df.groupby(['city', 'source_transaction'])['prix_m2'].median()
-    print(prix_m2_ville)
-    
-    print(f"\n🏢 DISTRIBUTION PAR TAILLE :")
-    print(df['categorie_taille'].value_counts().sort_index())
+    if report is not None:
+        # Répartitions, prix par transaction, prix/m² par ville (une passe, quantiles à 0,5 %)
+        report.profile = DatasetProfile(**FINAL_PROFILE).compute(df)
     
     print("="*70)
     
     return df
 
+# ============================================
+# PRÉTRAITEMENT INCRÉMENTAL
+# ============================================
+
+def update_incremental_store(rebuild=False, base_dir=RAW_DATA_DIR, store_dir=None):
+    """
+    Met à jour le store des annonces nettoyées (incremental_store.py) :
+    seuls les fichiers JSON nouveaux ou modifiés (empreinte SHA-256 du
+    manifeste) sont lus et nettoyés, puis fusionnés avec dédoublonnage
+    sur id ; les annonces des fichiers modifiés ou supprimés sont retirées.
+    store_dir : dossier du store (défaut : incremental_store.INCREMENTAL_DIR)
+
+    Returns:
+        (store, ScanResult)
+    """
+    from incremental_store import IncrementalStore
+
+    store = IncrementalStore() if store_dir is None else IncrementalStore(store_dir)
+    if rebuild:
+        store.reset()
+
+    print("="*70)
+    print("🔁 PRÉTRAITEMENT INCRÉMENTAL")
+    print("="*70)
+
+    files = iter_json_files(base_dir, VILLES, TYPES_TRANSACTION, TYPES_BIEN)
+    scan = store.scan(files)
+    print(f"\n📋 Manifeste : {len(store.files):,} fichier(s) déjà traité(s)")
+    print(f"   • Inchangés : {scan.unchanged:,}")
+    print(f"   • Nouveaux ou modifiés : {len(scan.pending):,}")
+    print(f"   • Modifiés ou supprimés (annonces retirées) : {len(scan.removed):,}")
+
+    if scan.removed:
+        removed = store.remove(scan.removed)
+        print(f"\n🗑️  {removed:,} annonce(s) retirée(s) du store")
+
+    if scan.pending:
+        records = iter_json_records(base_dir, VILLES, TYPES_TRANSACTION, TYPES_BIEN, files=scan.pending)
+        df = clean_immoscout_data(records)
+        if df is None or len(df) == 0:
+            df = pd.DataFrame(columns=CLEAN_COLUMNS)
+        added = store.add(df, scan.states, price_population(df))
+        print(f"\n➕ {added:,} annonce(s) ajoutée(s) ({len(df) - added:,} doublon(s) d'id ignoré(s))")
+
+    # Fichiers seulement touches : nouveau mtime enregistre (pas de nouveau hachage au prochain passage)
+    if scan.changed or scan.touched:
+        manifest_path = store.save()
+        print(f"\n✅ Manifeste : {manifest_path} ({len(store):,} annonces)")
+
+    return store, scan
+
+
+def load_incremental_data(rebuild=False, base_dir=RAW_DATA_DIR, store_dir=None):
+    """
+    Annonces nettoyées de tous les fichiers et bornes des outliers de prix,
+    sans relire les fichiers déjà traités : bornes = quantiles des sketches
+    fusionnés du manifeste (erreur relative bornée, streaming_stats.py)
+
+    Returns:
+        (DataFrame nettoyé ou None, bornes de prix par transaction, ScanResult)
+    """
+    store, scan = update_incremental_store(rebuild, base_dir, store_dir)
+
+    price_bounds = {
+        transaction: (sketch.quantile(PRICE_QUANTILES[0]), sketch.quantile(PRICE_QUANTILES[1]))
+        for transaction, sketch in store.price_sketches().items()
+    }
+    for transaction, (q_low, q_high) in price_bounds.items():
+        print(f"   • Bornes prix {transaction} : {q_low:,.0f} - {q_high:,.0f} CHF")
+
+    return store.read(), price_bounds, scan
+
 # ============================================
 # FONCTION PRINCIPALE
 # ============================================
 
-def process_immoscout_data():
+def process_immoscout_data(export_csv=True, incremental=False, rebuild=False):
     """
     Pipeline complet de traitement
+
+    Le résultat est écrit en dataset Parquet partitionné (dataset_store.py),
+    lu par post_clean_immoscout.py ; export_csv : exports CSV lisibles en plus.
+    incremental : ne lire et nettoyer que les fichiers JSON nouveaux ou
+    modifiés depuis le dernier passage (rebuild : manifeste remis à zéro).
     """
+    # pyarrow n'est requis que pour l'écriture du dataset
+    from dataset_store import FINAL_DATASET, dataset_exists, read_dataset, write_dataset
 
     # Créer le dossier processed s'il n'existe pas
     PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    # 1. Charger toutes les données
-    all_data = load_all_json_files(RAW_DATA_DIR, VILLES, TYPES_TRANSACTION, TYPES_BIEN)
+    if incremental:
+        # 1-2. Nettoyer les seuls fichiers nouveaux, fusionner au store
+        df, price_bounds, scan = load_incremental_data(rebuild)
 
-    if not all_data:
-        return None
-
-    # 2. Nettoyer
-    df = clean_immoscout_data(all_data)
+        if not scan.changed and dataset_exists(FINAL_DATASET):
+            print("\n✅ Aucun fichier nouveau : dataset final inchangé")
+            return read_dataset(FINAL_DATASET)
+    else:
+        # 1-2. Charger (lecture parallèle, en flux) et nettoyer au fil de l'eau
+        records = iter_json_records(RAW_DATA_DIR, VILLES, TYPES_TRANSACTION, TYPES_BIEN)
+        df = clean_immoscout_data(records)
+        price_bounds = None
 
     if df is None or len(df) == 0:
         return None
 
-    # 3. Filtrer et valider
-    df_final = filter_and_validate(df)
+    # 3. Filtrer et valider (rapport qualité JSON)
+    report = QualityReport("immoscout_suisse_final")
+    if incremental:
+        report.details['incremental'] = {
+            'files_unchanged': scan.unchanged,
+            'files_processed': len(scan.pending),
+            'files_removed': len(scan.removed),
+        }
+    df_final = filter_and_validate(df, price_bounds, report)
+
+    # Ville normalisée : clé de partition du dataset
+    df_final['city_normalized'] = df_final['city'].apply(normalize_city)
 
     # 4. Export
     print("\n" + "="*70)
     print("💾 EXPORT")
     print("="*70)
 
-    output_file = PROCESSED_DATA_DIR / "immoscout_suisse_final.csv"
-    df_final.to_csv(output_file, index=False, encoding='utf-8-sig')
-    print(f"\n✅ Dataset exporté : {output_file}")
+    dataset_dir = write_dataset(df_final, FINAL_DATASET)
+    print(f"\n✅ Dataset Parquet exporté : {dataset_dir}")
     print(f"📊 {len(df_final):,} lignes × {len(df_final.columns)} colonnes")
 
-    # Export séparé location vs vente
-    df_location = df_final[df_final['source_transaction'] == 'Location']
-    df_vente = df_final[df_final['source_transaction'] == 'Vente']
+    report_file = report.write(REPORTS_DIR / "immoscout_suisse_final_quality.json")
+    print(f"✅ Rapport qualité : {report_file}")
+
+    if export_csv:
+        output_file = PROCESSED_DATA_DIR / "immoscout_suisse_final.csv"
+        df_final.to_csv(output_file, index=False, encoding='utf-8-sig')
+        print(f"✅ CSV exporté : {output_file}")
+
+        # Export séparé location vs vente
+        df_location = df_final[df_final['source_transaction'] == 'Location']
+        df_vente = df_final[df_final['source_transaction'] == 'Vente']
 
-    if len(df_location) > 0:
-        output_location = PROCESSED_DATA_DIR / "immoscout_suisse_location.csv"
-        df_location.to_csv(output_location, index=False, encoding='utf-8-sig')
-        print(f"✅ Location exporté : {output_location} ({len(df_location):,} lignes)")
+        if len(df_location) > 0:
+            output_location = PROCESSED_DATA_DIR / "immoscout_suisse_location.csv"
+            df_location.to_csv(output_location, index=False, encoding='utf-8-sig')
+            print(f"✅ Location exporté : {output_location} ({len(df_location):,} lignes)")
 
-    if len(df_vente) > 0:
-        output_vente = PROCESSED_DATA_DIR / "immoscout_suisse_vente.csv"
-        df_vente.to_csv(output_vente, index=False, encoding='utf-8-sig')
-        print(f"✅ Vente exporté : {output_vente} ({len(df_vente):,} lignes)")
+        if len(df_vente) > 0:
+            output_vente = PROCESSED_DATA_DIR / "immoscout_suisse_vente.csv"
+            df_vente.to_csv(output_vente, index=False, encoding='utf-8-sig')
+            print(f"✅ Vente exporté : {output_vente} ({len(df_vente):,} lignes)")
 
     print("\n🎉 TRAITEMENT TERMINÉ !")
 
@@ -543,7 +819,16 @@ def process_immoscout_data():
 # ============================================
 
 if __name__ == "__main__":
-    df = process_immoscout_data()
+    parser = argparse.ArgumentParser(description="Prétraitement des annonces ImmoScout24")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne nettoyer que les fichiers JSON nouveaux ou modifiés (manifeste)")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Mode incrémental : repartir d'un manifeste vide")
+    parser.add_argument('--no-csv', action='store_true', help="Pas d'export CSV")
+    args = parser.parse_args()
+
+    df = process_immoscout_data(export_csv=not args.no_csv, incremental=args.incremental or args.rebuild,
+                                rebuild=args.rebuild)
     
     if df is not None:
         print("\n📋 APERÇU DES DONNÉES (10 premières lignes) :")
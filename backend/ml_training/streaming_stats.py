@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+SwissRelocator - Streaming Stats
+================================
+Statistiques des pretraitements: sketches de quantiles fusionnables d'un
+lot (ou d'un fichier) a l'autre, profils et rapports qualite.
+
+- QuantileSketch: quantiles approches a erreur relative bornee (DDSketch,
+  Masson et al., VLDB 2019). Utilise par le pretraitement incremental
+  (preprocess.py): les bornes des outliers de prix sont recalculees en
+  fusionnant les sketches des fichiers deja traites, sans relire leurs
+  annonces.
+- DatasetProfile: comptages, min / max / moyenne exacts et quantiles
+  (QuantileSketch) de plusieurs colonnes et par groupe, en une passe par
+  lot; partage par preprocess.py et post_clean_immoscout.py
+- QualityReport: rapport qualite JSON d'un filtrage (lignes retirees par
+  etape, bornes, profil du dataset final)
+"""
+
+import json
+import math
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Erreur relative des quantiles (0.5%: ~1400 intervalles pour des prix de 1 a 1e8 CHF)
+DEFAULT_RELATIVE_ACCURACY = 0.005
+
+
+# ============================================
+# SKETCH DE QUANTILES
+# ============================================
+
+class QuantileSketch:
+    """
+    Les valeurs > 0 sont comptees dans des intervalles geometriques
+    ]gamma^(k-1), gamma^k], gamma = (1 + a) / (1 - a): le quantile restitue
+    est a une erreur relative a de la valeur exacte de meme rang, en memoire
+    O(log(max / min) / a) quel que soit le nombre de valeurs. Les valeurs
+    <= 0 sont comptees a part. Deux sketches de meme precision se fusionnent
+    par addition des compteurs (merge).
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy doit etre dans ]0, 1[: {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.non_positive = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return self.count
+
+    def bin_keys(self, positive: np.ndarray) -> np.ndarray:
+        """Intervalle k de chaque valeur > 0 (gamma^(k-1) < v <= gamma^k)"""
+        return np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+
+    def add(self, values: Iterable[float]) -> "QuantileSketch":
+        """Ajoute des valeurs (les NaN et infinis sont ignores)"""
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return self
+
+        positive = values[values > 0]
+        keys, counts = np.unique(self.bin_keys(positive), return_counts=True)
+        return self.add_bins(keys, counts, len(values) - len(positive),
+                             float(values.min()), float(values.max()))
+
+    def add_bins(self, keys: Sequence[int], counts: Sequence[int], non_positive: int = 0,
+                 minimum: float = math.inf, maximum: float = -math.inf) -> "QuantileSketch":
+        """
+        Ajoute des valeurs finies deja reparties: effectifs par intervalle
+        (keys de bin_keys), nombre de valeurs <= 0 et extremes
+        """
+        counts = np.asarray(counts).tolist()
+        for key, count in zip(np.asarray(keys).tolist(), counts):
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.non_positive += int(non_positive)
+        self.count += sum(counts) + int(non_positive)
+        self.min = min(self.min, float(minimum))
+        self.max = max(self.max, float(maximum))
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Fusion de sketches de precisions differentes "
+                             f"({self.relative_accuracy} / {other.relative_accuracy})")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.non_positive += other.non_positive
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> float:
+        """
+        Valeur de rang q * (n - 1) (meme rang que pandas.Series.quantile,
+        sans interpolation), NaN si le sketch est vide
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f"q doit etre dans [0, 1]: {q}")
+        if self.count == 0:
+            return math.nan
+
+        rank = q * (self.count - 1)
+        if rank < self.non_positive:
+            value = 0.0
+        else:
+            seen = self.non_positive
+            for key in sorted(self.bins):
+                seen += self.bins[key]
+                if seen > rank:
+                    break
+            # Milieu (relatif) de l'intervalle: erreur <= relative_accuracy
+            value = 2 * self.gamma ** key / (self.gamma + 1)
+        return min(max(value, self.min), self.max)
+
+    # ============================================
+    # SERIALISATION (manifeste JSON)
+    # ============================================
+
+    def to_dict(self) -> Dict[str, Any]:
+        keys = sorted(self.bins)
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "keys": keys,
+            "counts": [self.bins[k] for k in keys],
+            "non_positive": self.non_positive,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch.bins = dict(zip(data["keys"], data["counts"]))
+        sketch.non_positive = data["non_positive"]
+        sketch.count = data["count"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        return sketch
+
+
+def merge_sketches(sketches: Iterable[QuantileSketch],
+                   relative_accuracy: Optional[float] = None) -> QuantileSketch:
+    """Fusion de plusieurs sketches (sketch vide si aucun)"""
+    merged = None
+    for sketch in sketches:
+        if merged is None:
+            merged = QuantileSketch(sketch.relative_accuracy)
+        merged.merge(sketch)
+    if merged is None:
+        merged = QuantileSketch(relative_accuracy or DEFAULT_RELATIVE_ACCURACY)
+    return merged
+
+
+# ============================================
+# PROFIL EN UNE PASSE (RAPPORTS QUALITE)
+# ============================================
+
+# Quantiles restitues par les resumes numeriques (QuantileSketch.quantile)
+SUMMARY_QUANTILES = {"p5": 0.05, "p25": 0.25, "median": 0.5, "p75": 0.75, "p95": 0.95}
+
+# Taille maximale du tableau dense (groupe, intervalle) de np.bincount;
+# au-dela, cellules distinctes par np.unique
+DENSE_CELLS = 1 << 20
+
+
+def _floats(values) -> np.ndarray:
+    return pd.Series(values, copy=False).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _json_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class NumericSummary:
+    """
+    Resume d'une colonne numerique (ou d'un groupe): count, missing (NaN ou
+    infini), min, max et moyenne exacts, quantiles SUMMARY_QUANTILES du sketch
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.size = 0
+        self.total = 0.0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def to_dict(self) -> Dict[str, Any]:
+        count = self.sketch.count
+        summary = {
+            "count": count,
+            "missing": self.size - count,
+            "mean": self.total / count if count else None,
+            "min": self.sketch.min if count else None,
+            "max": self.sketch.max if count else None,
+        }
+        summary.update({name: self.sketch.quantile(q) if count else None
+                        for name, q in SUMMARY_QUANTILES.items()})
+        return summary
+
+
+class _Values:
+    """Valeurs finies d'une colonne d'un lot et leurs intervalles de sketch (calcules une fois)"""
+
+    def __init__(self, series: pd.Series, sketch: QuantileSketch):
+        values = _floats(series)
+        self.rows = np.flatnonzero(np.isfinite(values))
+        self.values = values[self.rows]
+        self.positive = self.values > 0
+        self.keys = sketch.bin_keys(self.values[self.positive])
+
+
+def _update_summaries(summaries: Dict[Any, NumericSummary], codes: np.ndarray, labels: Sequence[Any],
+                      values: _Values, relative_accuracy: float) -> None:
+    """
+    Met a jour le resume de chaque groupe (codes: groupe de chaque ligne,
+    -1 hors groupe) en une passe: effectifs, sommes et intervalles par
+    np.bincount, extremes par np.minimum.at / np.maximum.at
+    """
+    n_groups = len(labels)
+    sizes = np.bincount(codes[codes >= 0], minlength=n_groups)
+    groups = codes[values.rows]
+    grouped = groups >= 0
+    groups, finite, positive = groups[grouped], values.values[grouped], values.positive[grouped]
+    keys = values.keys[grouped[values.positive]]
+
+    totals = np.bincount(groups, weights=finite, minlength=n_groups)
+    non_positive = np.bincount(groups[~positive], minlength=n_groups)
+    minimums = np.full(n_groups, np.inf)
+    maximums = np.full(n_groups, -np.inf)
+    np.minimum.at(minimums, groups, finite)
+    np.maximum.at(maximums, groups, finite)
+
+    # Effectifs par (groupe, intervalle): cellules triees par groupe
+    offset = int(keys.min(initial=0))
+    span = int(keys.max(initial=offset)) - offset + 1
+    cells = groups[positive] * span + (keys - offset)
+    if n_groups * span <= max(DENSE_CELLS, len(cells)):
+        dense = np.bincount(cells, minlength=n_groups * span)
+        cells = np.flatnonzero(dense)
+        bin_counts = dense[cells]
+    else:
+        cells, bin_counts = np.unique(cells, return_counts=True)
+    cell_groups, cell_keys = np.divmod(cells, span)
+    cell_keys += offset
+    bounds = np.searchsorted(cell_groups, np.arange(n_groups + 1))
+
+    for group in np.flatnonzero(sizes).tolist():
+        summary = summaries.get(labels[group])
+        if summary is None:
+            summary = summaries[labels[group]] = NumericSummary(relative_accuracy)
+        summary.size += int(sizes[group])
+        summary.total += float(totals[group])
+        start, stop = bounds[group], bounds[group + 1]
+        summary.sketch.add_bins(cell_keys[start:stop], bin_counts[start:stop], non_positive[group],
+                                minimums[group], maximums[group])
+
+
+class DatasetProfile:
+    """
+    Profil d'un DataFrame, mis a jour en une passe par lot (update) et
+    fusionnable d'un lot a l'autre: comptages de valeurs (counts), resumes
+    numeriques (numeric) et resumes par groupe (grouped: (colonnes du
+    groupe, colonne resumee)). Chaque colonne est factorisee et chaque
+    colonne resumee repartie en intervalles de sketch une seule fois par
+    lot; comptages, min / max / moyenne sont exacts, les quantiles (et
+    medianes) a relative_accuracy pres.
+    """
+
+    def __init__(self, counts: Sequence[str] = (), numeric: Sequence[str] = (),
+                 grouped: Sequence[Tuple[Sequence[str], str]] = (),
+                 relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.counts = list(counts)
+        self.numeric = list(numeric)
+        self.grouped = [(tuple(columns), value) for columns, value in grouped]
+        self.relative_accuracy = relative_accuracy
+        self.reset()
+
+    def reset(self) -> "DatasetProfile":
+        self.rows = 0
+        self.value_counts: Dict[str, Dict[Any, int]] = {column: {} for column in self.counts}
+        self.missing: Dict[str, int] = dict.fromkeys(self.counts, 0)
+        self.categorical: Dict[str, bool] = dict.fromkeys(self.counts, False)
+        self.summaries: Dict[str, NumericSummary] = {}
+        self.group_summaries: Dict[Tuple[Tuple[str, ...], str], Dict[Tuple, NumericSummary]] = {
+            key: {} for key in self.grouped}
+        return self
+
+    def update(self, df: pd.DataFrame) -> "DatasetProfile":
+        """Ajoute un lot de lignes au profil"""
+        factorized = {}
+        prepared = {}
+
+        def codes_of(column):
+            """(codes, libelles) de la colonne, -1 pour les valeurs manquantes"""
+            if column not in factorized:
+                series = df[column]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    factorized[column] = (series.cat.codes.to_numpy(dtype=np.int64), series.cat.categories.tolist())
+                else:
+                    codes, uniques = pd.factorize(series)
+                    factorized[column] = (codes, uniques.tolist())
+            return factorized[column]
+
+        def values_of(column):
+            if column not in prepared:
+                prepared[column] = _Values(df[column], QuantileSketch(self.relative_accuracy))
+            return prepared[column]
+
+        self.rows += len(df)
+
+        for column in self.counts:
+            codes, labels = codes_of(column)
+            counted = np.bincount(codes[codes >= 0], minlength=len(labels))
+            value_counts = self.value_counts[column]
+            for label, count in zip(labels, counted.tolist()):
+                value_counts[label] = value_counts.get(label, 0) + count
+            self.missing[column] += int((codes < 0).sum())
+            self.categorical[column] = isinstance(df[column].dtype, pd.CategoricalDtype)
+
+        # Resume d'une colonne: groupe unique (libelle: la colonne)
+        everything = np.zeros(len(df), dtype=np.int64)
+        for column in self.numeric:
+            _update_summaries(self.summaries, everything, [column], values_of(column), self.relative_accuracy)
+
+        for columns, value in self.grouped:
+            if len(columns) == 1:
+                codes, labels = codes_of(columns[0])
+                labels = [(label,) for label in labels]
+            else:
+                # Groupes observes: codes des colonnes combines (base mixte) puis factorises
+                parts = [codes_of(column) for column in columns]
+                observed = np.logical_and.reduce([part_codes >= 0 for part_codes, _ in parts])
+                combined = np.ravel_multi_index([part_codes[observed] for part_codes, _ in parts],
+                                                [len(part_labels) for _, part_labels in parts])
+                codes = np.full(len(df), -1, dtype=np.int64)
+                codes[observed], uniques = pd.factorize(combined)
+                keys = np.unravel_index(uniques, [len(part_labels) for _, part_labels in parts])
+                labels = list(zip(*[[part_labels[code] for code in part_keys.tolist()]
+                                    for (_, part_labels), part_keys in zip(parts, keys)]))
+            _update_summaries(self.group_summaries[(columns, value)], codes, labels,
+                              values_of(value), self.relative_accuracy)
+        return self
+
+    def compute(self, df: pd.DataFrame) -> "DatasetProfile":
+        """Profil d'un DataFrame entier (une passe)"""
+        return self.reset().update(df)
+
+    def to_dict(self) -> Dict[str, Any]:
+        counts = {}
+        for column in self.counts:
+            items = list(self.value_counts[column].items())
+            if not self.categorical[column]:
+                # Ordre de value_counts(), sans les valeurs absentes
+                items = sorted(((value, count) for value, count in items if count), key=lambda item: -item[1])
+            counts[column] = {
+                "values": {str(_json_value(value)): count for value, count in items},
+                "missing": self.missing[column],
+            }
+
+        grouped = {}
+        for (columns, value), summaries in self.group_summaries.items():
+            labels = {" / ".join(str(_json_value(k)) for k in key): summary
+                      for key, summary in summaries.items()}
+            grouped[f"{value} par {' / '.join(columns)}"] = {
+                label: labels[label].to_dict() for label in sorted(labels)}
+
+        return {
+            "rows": self.rows,
+            "counts": counts,
+            "numeric": {column: self.summaries.get(column, NumericSummary(self.relative_accuracy)).to_dict()
+                        for column in self.numeric},
+            "grouped": grouped,
+        }
+
+
+# ============================================
+# RAPPORT QUALITE
+# ============================================
+
+class QualityReport:
+    """Rapport qualite JSON d'un filtrage: etapes, bornes utilisees, profil final"""
+
+    def __init__(self, dataset: str, rows_in: int = 0):
+        self.dataset = dataset
+        self.rows_in = rows_in
+        self.steps: List[Dict[str, Any]] = []
+        self.details: Dict[str, Any] = {}
+        self.profile: Optional[DatasetProfile] = None
+
+    def step(self, name: str, removed: int, remaining: int) -> None:
+        self.steps.append({"step": name, "removed": int(removed), "remaining": int(remaining)})
+
+    def to_dict(self) -> Dict[str, Any]:
+        rows_out = self.steps[-1]["remaining"] if self.steps else self.rows_in
+        return {
+            "dataset": self.dataset,
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "rows_in": self.rows_in,
+            "rows_out": rows_out,
+            "retention": round(rows_out / self.rows_in, 4) if self.rows_in else None,
+            "steps": self.steps,
+            **self.details,
+            "profile": self.profile.to_dict() if self.profile is not None else None,
+        }
+
+    def write(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.to_dict(), ensure_ascii=False, indent=1, default=_json_value),
+                            encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
@@ -4,12 +4,18 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import Ridge, Lasso
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import xgboost as xgb
 import joblib
+import json
+import os
+from datetime import datetime, timezone
+
+from dataset_store import CLEAN_FINAL_DATASET, read_dataset
+from app_modules import load_app_module
 
 # ============================================
 # CONFIGURATION DES CHEMINS
@@ -18,9 +24,19 @@ import joblib
 PROJECT_ROOT = Path(__file__).parent.parent.parent  # SwissRelocator/
 BACKEND_DIR = PROJECT_ROOT / "backend"
 
-# Données d'entrée (CSV nettoyé par post_clean_immoscout.py)
-PROCESSED_DATA_DIR = BACKEND_DIR / "data" / "processed"
-INPUT_CSV = PROCESSED_DATA_DIR / "immoscout_suisse_clean_final.csv"
+# Features calculées par le même code que l'API : app/services/rent_features.py,
+# chargé sous son nom qualifié services.rent_features (app/ n'est pas sur sys.path)
+rent_features = load_app_module("services.rent_features")
+FEATURE_NAMES = rent_features.FEATURE_NAMES
+FEATURE_STATE_FILENAME = rent_features.FEATURE_STATE_FILENAME
+RentFeatureTransformer = rent_features.RentFeatureTransformer
+
+# Données d'entrée (dataset Parquet écrit par post_clean_immoscout.py) :
+# seules les colonnes dont dérivent les 18 features et la cible sont lues
+INPUT_COLUMNS = [
+    'latitude', 'longitude', 'city_normalized', 'surface', 'pieces', 'etage',
+    'source_bien_type', 'has_parking', 'has_lift', 'price',
+]
 
 # Modèles de sortie
 ML_MODELS_DIR = BACKEND_DIR / "ml_models"
@@ -33,7 +49,7 @@ print("="*70)
 print("🤖 MACHINE LEARNING - PRÉDICTION PRIX LOCATION BUREAUX SUISSE")
 print("="*70)
 
-df = pd.read_csv(INPUT_CSV)
+df = read_dataset(CLEAN_FINAL_DATASET, columns=INPUT_COLUMNS)
 
 print(f"\n📊 Dataset : {len(df)} lignes × {len(df.columns)} colonnes")
 
@@ -45,73 +61,26 @@ print("\n" + "="*70)
 print("🔧 FEATURE ENGINEERING")
 print("="*70)
 
-# Créer une copie
-df_ml = df.copy()
-
-# 2.1 Features géographiques enrichies
-print("\n1️⃣  Features géographiques...")
-
-# Distance du centre-ville (approximation avec GPS)
-city_centers = {
-    'Genève': (46.2044, 6.1432),
-    'Zürich': (47.3769, 8.5417),
-    'Lausanne': (46.5197, 6.6323),
-    'Basel': (47.5596, 7.5886)
-}
-
-def calculate_distance_from_center(row):
-    """Calculer distance euclidienne du centre-ville"""
-    if row['city_normalized'] in city_centers:
-        center_lat, center_lon = city_centers[row['city_normalized']]
-        lat_diff = row['latitude'] - center_lat
-        lon_diff = row['longitude'] - center_lon
-        return np.sqrt((lat_diff * 111)**2 + (lon_diff * 85)**2)
-    return None
-
-df_ml['distance_centre'] = df_ml.apply(calculate_distance_from_center, axis=1)
-
-# 2.2 Features de surface
-print("2️⃣  Features de surface...")
-df_ml['surface_log'] = np.log1p(df_ml['surface'])
-df_ml['surface_squared'] = df_ml['surface'] ** 2
-
-# 2.3 Features catégorielles
-print("3️⃣  Encodage features catégorielles...")
-
-# Ville
-df_ml['ville_encoded'] = LabelEncoder().fit_transform(df_ml['city_normalized'])
-
-# Type de bien
-df_ml['type_bien_encoded'] = LabelEncoder().fit_transform(df_ml['source_bien_type'])
-
-# Parking (gérer les NaN)
-df_ml['has_parking_int'] = df_ml['has_parking'].fillna(False).astype(int)
-
-# Ascenseur (gérer les NaN)
-df_ml['has_lift_int'] = df_ml['has_lift'].fillna(False).astype(int)
-
-# 2.4 Features d'étage (GÉRER LES NaN)
-print("4️⃣  Features d'étage...")
-df_ml['etage_filled'] = df_ml['etage'].fillna(-1)  # -1 = inconnu
-df_ml['is_ground_floor'] = (df_ml['etage_filled'] == 0).astype(int)
-df_ml['is_high_floor'] = (df_ml['etage_filled'] >= 5).astype(int)
-df_ml['etage_unknown'] = (df_ml['etage'].isna()).astype(int)
-
-# 2.5 Features de pièces (GÉRER LES NaN)
-print("5️⃣  Features pièces...")
-# Imputer avec la médiane par ville et taille de surface
-df_ml['pieces_filled'] = df_ml.groupby(['city_normalized', 'categorie_taille'])['pieces'].transform(
-    lambda x: x.fillna(x.median())
+# Transformer partagé avec l'API (predict_rent_router.py) et predict_price.py :
+# codes ville / type de bien et médianes des pièces appris ici, sauvegardés à côté du modèle
+print("\n1️⃣  Apprentissage de l'état des features (codes, médianes des pièces)...")
+transformer = RentFeatureTransformer.fit(
+    df['city_normalized'], df['surface'], df['pieces'], df['source_bien_type']
 )
-# Si toujours NaN, utiliser médiane globale
-df_ml['pieces_filled'] = df_ml['pieces_filled'].fillna(df_ml['pieces'].median())
-df_ml['pieces_unknown'] = (df_ml['pieces'].isna()).astype(int)
 
-# 2.6 Interaction features (sans data leakage)
-df_ml['surface_ville'] = df_ml['surface'] * df_ml['ville_encoded']
-df_ml['surface_distance'] = df_ml['surface'] * df_ml['distance_centre']
+print("2️⃣  Calcul vectorisé des 18 features...")
+df_ml = pd.DataFrame(
+    transformer.transform(
+        df['city_normalized'], df['surface'],
+        latitude=df['latitude'], longitude=df['longitude'],
+        pieces=df['pieces'], etage=df['etage'], bien_type=df['source_bien_type'],
+        has_parking=df['has_parking'], has_lift=df['has_lift'],
+    ),
+    columns=FEATURE_NAMES, index=df.index,
+)
+df_ml[['city_normalized', 'price']] = df[['city_normalized', 'price']]
 
-print(f"   ✓ {len(df_ml.columns)} features créées")
+print(f"   ✓ {len(FEATURE_NAMES)} features créées")
 
 # ============================================
 # 3. SÉLECTION DES FEATURES
@@ -122,29 +91,12 @@ print("📋 SÉLECTION DES FEATURES")
 print("="*70)
 
 # Features à utiliser pour le ML (SANS data leakage - pas de prix_m2)
-features_to_use = [
-    # Géographiques
-    'latitude', 'longitude', 'distance_centre', 'ville_encoded',
-
-    # Surface
-    'surface', 'surface_log', 'surface_squared',
-
-    # Caractéristiques (NaN gérés)
-    'pieces_filled', 'pieces_unknown',
-    'etage_filled', 'etage_unknown', 'is_ground_floor', 'is_high_floor',
-    'type_bien_encoded',
-
-    # Équipements
-    'has_parking_int', 'has_lift_int',
-
-    # Interactions (sans prix_m2)
-    'surface_ville',
-    'surface_distance'
-]
+features_to_use = FEATURE_NAMES
 
 # Supprimer lignes avec NaN dans les features CRITIQUES uniquement
-critical_features = ['latitude', 'longitude', 'surface', 'price', 'distance_centre']
-df_ml_clean = df_ml.dropna(subset=critical_features)
+# (GPS lu dans le dataset : le transformer complète les coordonnées manquantes par le centre-ville)
+critical = df[['latitude', 'longitude', 'surface', 'price']].notna().all(axis=1) & df_ml['distance_centre'].notna()
+df_ml_clean = df_ml[critical]
 
 print(f"\n✅ Features sélectionnées : {len(features_to_use)}")
 print(f"✅ Dataset après nettoyage NaN critiques : {len(df_ml_clean)} lignes")
@@ -376,17 +328,45 @@ ML_MODELS_DIR.mkdir(parents=True, exist_ok=True)
 # Sauvegarder le modèle et le scaler
 model_path = ML_MODELS_DIR / "immo_ch_model.pkl"
 scaler_path = ML_MODELS_DIR / "immo_ch_scaler.pkl"
+features_path = ML_MODELS_DIR / "immo_ch_features.txt"
+feature_state_path = ML_MODELS_DIR / FEATURE_STATE_FILENAME
+metadata_path = ML_MODELS_DIR / "immo_ch_model_meta.json"
+
 
-joblib.dump(best_model, model_path)
-joblib.dump(scaler, scaler_path)
+def atomic_write(path, write):
+    """Écrit dans un fichier temporaire puis le renomme (l'API recharge à chaud ml_models/)"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+atomic_write(model_path, lambda p: joblib.dump(best_model, p))
+atomic_write(scaler_path, lambda p: joblib.dump(scaler, p))
 
 print(f"\n✅ Modèle sauvegardé : {model_path}")
 print(f"✅ Scaler sauvegardé : {scaler_path}")
 
 # Sauvegarder les features utilisées
-features_path = ML_MODELS_DIR / "immo_ch_features.txt"
-with open(features_path, 'w') as f:
-    f.write('\n'.join(features_to_use))
+atomic_write(features_path, lambda p: p.write_text('\n'.join(features_to_use)))
 print(f"✅ Features sauvegardées : {features_path}")
 
+# État des features (codes, médianes des pièces) : relu par l'API et predict_price.py
+transformer.save(feature_state_path)
+print(f"✅ État des features sauvegardé : {feature_state_path}")
+
+# Métadonnées de version (lues par le registre de modèles de l'API)
+trained_at = datetime.now(timezone.utc)
+metadata = {
+    "version": trained_at.strftime("%Y%m%d-%H%M%S"),
+    "trained_at": trained_at.isoformat(timespec="seconds"),
+    "model_type": f"{best_model_name} Regressor" if best_model_name == 'XGBoost' else best_model_name,
+    "r2_score": round(float(results[best_model_name]['test_r2']), 4),
+    "mae_chf": round(float(results[best_model_name]['test_mae'])),
+    "n_train": int(len(X_train)),
+    "features_count": len(features_to_use),
+}
+# Écrit en dernier: le registre recharge une fois tous les fichiers stables
+atomic_write(metadata_path, lambda p: p.write_text(json.dumps(metadata, indent=2), encoding='utf-8'))
+print(f"✅ Métadonnées sauvegardées : {metadata_path} (version {metadata['version']})")
+
 print("\n🎉 ENTRAÎNEMENT TERMINÉ !")
\ No newline at end of file
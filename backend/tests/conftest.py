@@ -0,0 +1,15 @@
+"""
+Configuration pytest du backend
+===============================
+Les tests importent les modules de l'API par leur nom depuis app/
+(services.real_estate_predictor, core.exceptions...), comme l'API et les
+benchmarks le font entre eux: app/ est ajoute a sys.path.
+"""
+
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+if str(APP_DIR) not in sys.path:
+    sys.path.insert(0, str(APP_DIR))
@@ -0,0 +1,120 @@
+# Tests for the model registry hot reload
+"""
+ModelRegistry recharge le bundle quand l'empreinte des fichiers change
+(stable sur deux tours), garde la version active si le nouveau bundle est
+invalide et ne retente pas une empreinte deja en echec.
+"""
+
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+from services.model_registry import ModelRegistry
+from services.real_estate_predictor import PandasEngine
+
+FEATURES = ['surface', 'latitude']
+
+
+class ConstantModel:
+    """Modele factice servi par PandasEngine"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def predict(self, df):
+        return np.full(len(df), self.value)
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    (tmp_path / "features.txt").write_text("\n".join(FEATURES))
+    return tmp_path
+
+
+def write_bundle(models_dir, version, model, mtime_ns):
+    """Ecrit le modele et ses metadonnees avec un mtime donne (empreinte distincte)"""
+    model_path = models_dir / "model.pkl"
+    joblib.dump(model, model_path)
+    (models_dir / "metadata.json").write_text(json.dumps({"version": version}))
+    for path in (model_path, models_dir / "metadata.json"):
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def make_registry(models_dir):
+    return ModelRegistry(
+        models_dir, "model.pkl", "scaler.pkl", "features.txt", "metadata.json",
+        default_features=FEATURES,
+        warmup_samples=lambda bundle: [{'surface': 80.0, 'latitude': 46.2}],
+    )
+
+
+def test_load_publishes_bundle(models_dir):
+    write_bundle(models_dir, "v1", ConstantModel(2000.0), 1_000_000_000)
+    registry = make_registry(models_dir)
+    published = []
+    registry.subscribe(published.append)
+
+    bundle = registry.load()
+
+    assert registry.active is bundle
+    assert published == [bundle]
+    assert bundle.version == "v1"
+    assert bundle.features_list == FEATURES
+    assert isinstance(bundle.engine, PandasEngine)
+    assert bundle.token == ("v1", registry.fingerprint())
+
+
+def test_missing_model_not_published(models_dir):
+    registry = make_registry(models_dir)
+    assert registry.load() is None
+    assert registry.active is None
+    assert "Modele non trouve" in registry.last_error
+
+
+def test_reload_after_stable_fingerprint(models_dir):
+    write_bundle(models_dir, "v1", ConstantModel(2000.0), 1_000_000_000)
+    registry = make_registry(models_dir)
+    first = registry.load()
+    assert not registry.reload_if_changed()
+
+    write_bundle(models_dir, "v2", ConstantModel(2500.0), 2_000_000_000)
+    # Premier tour: empreinte nouvelle, attente d'un second tour identique
+    assert not registry.reload_if_changed()
+    assert registry.active is first
+
+    assert registry.reload_if_changed()
+    assert registry.active.version == "v2"
+    assert registry.active.engine.predict_one({'surface': 80.0, 'latitude': 46.2}) == 2500.0
+    assert [entry["version"] for entry in registry.history] == ["v1", "v2"]
+    assert not registry.reload_if_changed()
+
+
+def test_failed_fingerprint_not_retried(models_dir, monkeypatch):
+    write_bundle(models_dir, "v1", ConstantModel(2000.0), 1_000_000_000)
+    registry = make_registry(models_dir)
+    first = registry.load()
+
+    # Nouvelle version invalide: la chauffe rejette sa prediction
+    write_bundle(models_dir, "v2", ConstantModel(float("nan")), 2_000_000_000)
+    assert not registry.reload_if_changed()
+    assert not registry.reload_if_changed()
+    assert registry.active is first
+    assert "chauffe" in registry.last_error
+
+    loads = []
+    original_load = registry.load
+    monkeypatch.setattr(registry, "load", lambda: loads.append(1) or original_load())
+    for _ in range(3):
+        assert not registry.reload_if_changed()
+    assert loads == []
+
+    # Fichier corrige: nouvelle empreinte, rechargement
+    write_bundle(models_dir, "v3", ConstantModel(2600.0), 3_000_000_000)
+    assert not registry.reload_if_changed()
+    assert registry.reload_if_changed()
+    assert loads == [1]
+    assert registry.active.version == "v3"
+    assert registry.last_error is None
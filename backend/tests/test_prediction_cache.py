@@ -0,0 +1,61 @@
+# Tests for the prediction cache model binding
+"""
+Le cache des predictions est lie a la version du modele (bundle.token):
+bind_model() le vide quand la version change et put() ignore une
+prediction calculee par une version remplacee entre-temps.
+"""
+
+from services.prediction_cache import PredictionCache
+
+FEATURES = ['surface', 'latitude']
+
+
+def test_key_is_quantized():
+    cache = PredictionCache(decimals=4)
+    assert cache.make_key({'surface': 80.0, 'latitude': 46.204412}, FEATURES) == \
+        cache.make_key({'latitude': 46.204409, 'surface': 80.0}, FEATURES)
+
+
+def test_bind_same_token_keeps_entries():
+    cache = PredictionCache()
+    assert cache.bind_model(("v1", ()))
+    cache.put("key", 2100.0, token=("v1", ()))
+
+    assert not cache.bind_model(("v1", ()))
+    assert cache.get("key") == 2100.0
+    assert cache.stats()["invalidations"] == 0
+
+
+def test_bind_new_token_clears_cache():
+    cache = PredictionCache()
+    cache.bind_model(("v1", ()))
+    cache.put("key", 2100.0, token=("v1", ()))
+
+    assert cache.bind_model(("v2", ()))
+    assert cache.get("key") is None
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_put_from_replaced_model_ignored():
+    cache = PredictionCache()
+    cache.bind_model(("v1", ()))
+    # Requete demarree sur v1, terminee apres la publication de v2
+    cache.bind_model(("v2", ()))
+    cache.put("key", 2100.0, token=("v1", ()))
+    assert cache.get("key") is None
+
+    cache.put("key", 2300.0, token=("v2", ()))
+    assert cache.get("key") == 2300.0
+
+
+def test_lru_eviction():
+    cache = PredictionCache(max_size=2)
+    cache.put("a", 1.0)
+    cache.put("b", 2.0)
+    cache.get("a")
+    cache.put("c", 3.0)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1.0
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,92 @@
+# Tests for the prediction executor backpressure
+"""
+Au-dela de workers + max_queue predictions en cours ou en attente,
+PredictionExecutor leve PredictionQueueFullError au lieu d'empiler.
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from core.exceptions import PredictionQueueFullError
+from services.prediction_executor import PredictionExecutor
+
+
+class BlockingEngine:
+    """Moteur factice: chaque prediction attend que le test la libere"""
+
+    name = "blocking"
+    feature_names = ['surface']
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def predict_one(self, features):
+        self.release.wait(timeout=5)
+        return features['surface'] * 2.0
+
+    def predict_matrix(self, X, columns=None):
+        self.release.wait(timeout=5)
+        return X[:, 0] * 2.0
+
+
+@pytest.mark.parametrize("mode", ["thread", "inline"])
+def test_predictions_within_capacity(mode):
+    executor = PredictionExecutor(mode=mode, workers=2, max_queue=2)
+    engine = BlockingEngine()
+    engine.release.set()
+    executor.configure(engine)
+
+    async def run():
+        single = await executor.predict_one({'surface': 50.0})
+        batch = await executor.predict_matrix(np.array([[10.0], [20.0]]))
+        return single, batch
+
+    try:
+        single, batch = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert single == 100.0
+    np.testing.assert_array_equal(batch, [20.0, 40.0])
+    assert executor.stats()["completed"] == 2
+    assert executor.stats()["rejected"] == 0
+
+
+def test_full_queue_raises():
+    executor = PredictionExecutor(mode="thread", workers=1, max_queue=1)
+    engine = BlockingEngine()
+    executor.configure(engine)
+    assert executor.capacity == 2
+
+    async def run():
+        # Une prediction en cours, une en attente: la file est pleine
+        running = [asyncio.create_task(executor.predict_one({'surface': float(i)})) for i in range(2)]
+        await asyncio.sleep(0)
+        assert executor.stats()["pending"] == 2
+
+        with pytest.raises(PredictionQueueFullError):
+            await executor.predict_one({'surface': 3.0})
+        with pytest.raises(PredictionQueueFullError):
+            await executor.predict_matrix(np.array([[3.0]]))
+
+        engine.release.set()
+        return await asyncio.gather(*running)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert results == [0.0, 2.0]
+    stats = executor.stats()
+    assert stats["pending"] == 0
+    assert stats["completed"] == 2
+    assert stats["rejected"] == 2
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        PredictionExecutor(mode="gpu")
@@ -0,0 +1,66 @@
+# Tests for the rent model inference engines
+"""
+BoosterEngine (booster XGBoost natif, float32) doit predire comme
+PandasEngine (wrapper scikit-learn sur DataFrame) pour le meme modele.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+xgb = pytest.importorskip("xgboost")
+
+from services.real_estate_predictor import BoosterEngine, PandasEngine, create_engine  # noqa: E402
+
+FEATURES = ['surface', 'pieces', 'latitude', 'longitude']
+
+# Ecart tolere: le booster calcule en float32
+RTOL = 1e-5
+ATOL = 1e-3
+
+
+@pytest.fixture(scope="module")
+def model():
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.uniform(20, 200, 300),
+        rng.integers(1, 7, 300),
+        rng.uniform(46.0, 47.6, 300),
+        rng.uniform(6.0, 9.0, 300),
+    ])
+    y = 15 * X[:, 0] + 200 * X[:, 1] + rng.normal(0, 50, 300)
+    regressor = xgb.XGBRegressor(n_estimators=20, max_depth=3, random_state=0)
+    regressor.fit(pd.DataFrame(X, columns=FEATURES), y)
+    return regressor, X
+
+
+def test_create_engine_picks_booster(model):
+    regressor, _ = model
+    assert isinstance(create_engine(regressor, FEATURES), BoosterEngine)
+
+
+def test_predict_one_matches_pandas(model):
+    regressor, X = model
+    booster, pandas = BoosterEngine(regressor.get_booster(), FEATURES), PandasEngine(regressor, FEATURES)
+
+    for row in X[:25]:
+        features = dict(zip(FEATURES, row.tolist()))
+        assert booster.predict_one(features) == pytest.approx(pandas.predict_one(features), rel=RTOL, abs=ATOL)
+
+
+def test_predict_matrix_matches_pandas(model):
+    regressor, X = model
+    booster, pandas = BoosterEngine(regressor.get_booster(), FEATURES), PandasEngine(regressor, FEATURES)
+
+    np.testing.assert_allclose(booster.predict_matrix(X), pandas.predict_matrix(X), rtol=RTOL, atol=ATOL)
+
+    # Colonnes dans un autre ordre: remises dans l'ordre du modele
+    columns = FEATURES[::-1]
+    np.testing.assert_allclose(booster.predict_matrix(X[:, ::-1], columns=columns),
+                               pandas.predict_matrix(X), rtol=RTOL, atol=ATOL)
+
+
+def test_booster_rejects_feature_order_mismatch(model):
+    regressor, _ = model
+    with pytest.raises(ValueError):
+        BoosterEngine(regressor.get_booster(), FEATURES[::-1])